@@ -1,15 +1,101 @@
-from google import genai
-from google.genai import types
 from dotenv import load_dotenv
 import time
 import requests
 import os
-import json
-import re
+import sys
+import tempfile
+import threading
+from Functions.job_queue import JobQueue
+from Functions.structured_output import parse_or_repair, StructuredOutputError
+from Model.evaluation import EmotionAnalysis
+from Providers.registry import get_video_analyzer
+from Providers.local_storage import stored_path
+from Functions.video_upload import uploaded_video_path
+from Functions.metrics import track
+from Functions.video_preprocess import preprocess_video
 load_dotenv()
-# Retrieve the API key and initialize the client.
+# Retrieve the API key; the client is created on first use so fake and replay
+# providers never need it.
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-client = genai.Client(api_key=GOOGLE_API_KEY)
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            from google import genai
+            _client = genai.Client(api_key=GOOGLE_API_KEY)
+        return _client
+
+# Processing-state polling starts fast (short clips are ready in seconds) and
+# backs off towards VIDEO_POLL_MAX_SECONDS for long recordings.
+VIDEO_POLL_INITIAL_SECONDS = float(os.getenv("VIDEO_POLL_INITIAL_SECONDS", "1"))
+VIDEO_POLL_MAX_SECONDS = float(os.getenv("VIDEO_POLL_MAX_SECONDS", "15"))
+VIDEO_PROCESSING_TIMEOUT_SECONDS = float(os.getenv("VIDEO_PROCESSING_TIMEOUT_SECONDS", "900"))
+VIDEO_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+def is_transient_error(exc):
+    """Network failures, rate limits and 5xx responses are worth retrying; anything else is not."""
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, TimeoutError)):
+        return True
+    # The SDK is only loaded once a live analysis has run, and only its errors need checking
+    errors = sys.modules.get("google.genai.errors")
+    if errors is None:
+        return False
+    if isinstance(exc, errors.ServerError):
+        return True
+    if isinstance(exc, errors.ClientError) and exc.code == 429:
+        return True
+    return False
+
+video_analysis_jobs = JobQueue(
+    "video-analysis",
+    workers=int(os.getenv("VIDEO_ANALYSIS_WORKERS", "2")),
+    max_retries=int(os.getenv("VIDEO_ANALYSIS_RETRIES", "2")),
+    retry_on=is_transient_error,
+    result_ttl=float(os.getenv("VIDEO_ANALYSIS_RESULT_TTL_SECONDS", "86400")),
+)
+
+def repair_json(prompt, max_tokens):
+    """Text-only call used to fix malformed analysis JSON without sending the video again."""
+    from google.genai import types
+    with track("video_repair"):
+        response = get_client().models.generate_content(
+            model="gemini-2.0-flash",
+            contents=[prompt],
+            config=types.GenerateContentConfig(
+                http_options=types.HttpOptions(timeout=30000),
+                max_output_tokens=max_tokens,
+                response_mime_type="application/json"
+            )
+        )
+    return response.text
+
+def _analyze(cloud_url):
+    with track("video_analysis"):
+        return get_video_analyzer().analyze(cloud_url)
+
+def submit_video_analysis(cloud_url):
+    """Queue the configured video analyzer (``analyze_video_emotion_from_cloud_url`` when live) and return the job record."""
+    job = video_analysis_jobs.submit(_analyze, cloud_url)
+    job["video_url"] = cloud_url
+    return job
+
+def wait_for_file_processing(video_file):
+    """
+    Poll the Gen AI file API until the upload leaves the PROCESSING state, with
+    exponential backoff between VIDEO_POLL_INITIAL_SECONDS and VIDEO_POLL_MAX_SECONDS.
+    """
+    delay = VIDEO_POLL_INITIAL_SECONDS
+    deadline = time.monotonic() + VIDEO_PROCESSING_TIMEOUT_SECONDS
+    while video_file.state.name == "PROCESSING":
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Video processing did not finish within {VIDEO_PROCESSING_TIMEOUT_SECONDS:g}s")
+        time.sleep(delay)
+        video_file = get_client().files.get(name=video_file.name)
+        delay = min(delay * 1.5, VIDEO_POLL_MAX_SECONDS)
+    return video_file
 
 def analyze_video_emotion_from_cloud_url(cloud_url):
     """
@@ -24,32 +110,45 @@ def analyze_video_emotion_from_cloud_url(cloud_url):
         dict: The parsed JSON response with timestamp emotions and overall analysis.
     """
     local_filename = None
+    processed_filename = None
     video_file = None
     
     try:
-        # Determine the local filename from the URL.
-        local_filename = cloud_url.split("/")[-1]
-        print(f"Downloading video from {cloud_url} as {local_filename}...")
-        
-        # Download the video file.
-        response = requests.get(cloud_url)
-        if response.status_code != 200:
-            raise ValueError(f"Failed to download file from {cloud_url} (status code: {response.status_code})")
+        # A recording in this deployment's local store, or one whose storage upload
+        # failed, is read in place (and never deleted here)
+        video_path = stored_path(cloud_url) or uploaded_video_path(cloud_url)
+        if video_path is None:
+            # Download to a unique temp file so concurrent jobs never share a path.
+            suffix = os.path.splitext(cloud_url.split("/")[-1])[1] or ".webm"
+            fd, local_filename = tempfile.mkstemp(suffix=suffix)
+            os.close(fd)
+            video_path = local_filename
+            print(f"Downloading video from {cloud_url} as {local_filename}...")
+            
+            # Stream the video to disk instead of holding it in memory.
+            with track("video_download"), requests.get(cloud_url, stream=True, timeout=60) as response:
+                if response.status_code != 200:
+                    raise ValueError(f"Failed to download file from {cloud_url} (status code: {response.status_code})")
+                with open(local_filename, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=VIDEO_DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            print("Download complete.")
         
-        with open(local_filename, 'wb') as f:
-            f.write(response.content)
-        print("Download complete.")
+        # Optionally shrink the recording first; upload, remote processing and
+        # inference all scale with its size.
+        preprocessing = preprocess_video(video_path)
+        if preprocessing["path"] != video_path:
+            processed_filename = video_path = preprocessing["path"]
         
         # Upload the file to the Gen AI service.
-        print("Uploading file...")
-        video_file = client.files.upload(file=local_filename)
+        print(f"Uploading file ({os.path.getsize(video_path) / 1e6:.1f}MB)...")
+        with track("video_upload"):
+            video_file = get_client().files.upload(file=video_path)
         print(f"Completed upload: {video_file.uri}")
         
         # Poll until the video processing is complete.
-        while video_file.state.name == "PROCESSING":
-            #print("Waiting for video to be processed.")
-            time.sleep(10)
-            video_file = client.files.get(name=video_file.name)
+        with track("video_poll"):
+            video_file = wait_for_file_processing(video_file)
         
         if video_file.state.name == "FAILED":
             raise ValueError(video_file.state.name)
@@ -81,160 +180,82 @@ def analyze_video_emotion_from_cloud_url(cloud_url):
             "Your response must contain nothing but valid JSON that can be directly parsed."
         )
         
+        from google.genai import types
         print("Making LLM inference request for interview analysis...")
         # Invoke the Gemini Flash model to perform emotion analysis with a 60-second timeout.
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=[video_file, prompt],
-            config=types.GenerateContentConfig(
-                http_options=types.HttpOptions(timeout=60000) , # Timeout of 60 seconds,
-                max_output_tokens=8000
+        with track("video_infer"):
+            response = get_client().models.generate_content(
+                model="gemini-2.0-flash",
+                contents=[video_file, prompt],
+                config=types.GenerateContentConfig(
+                    http_options=types.HttpOptions(timeout=60000) , # Timeout of 60 seconds,
+                    max_output_tokens=8000
+                )
             )
-        )
         
         response_text = response.text
         
-        # Clean the response to handle potential markdown code blocks
-        cleaned_json_text = clean_json_response(response_text)
-        
-        # Print the cleaned JSON text
-        print("\n--- RESPONSE JSON ---")
-        print(cleaned_json_text)
-        
-        # Attempt to parse the response as JSON and save it to a file.
-        json_filename = "interview_analysis.json"
+        # Parse the response; nothing is written to shared files, since several
+        # analysis jobs run at once.
         try:
-            analysis_data = json.loads(cleaned_json_text)
-            
-            # Save the JSON to a file with pretty formatting
-            with open(json_filename, "w") as f:
-                json.dump(analysis_data, f, indent=2)
-            print(f"Saved JSON analysis to {json_filename}")
-            
-            # Print the JSON with pretty formatting
-            print("\n--- FORMATTED JSON ---")
-            print(json.dumps(analysis_data, indent=2))
-            
-            # Print the structured analysis in a readable format
-            print("\n--- TIMESTAMP ANALYSIS ---")
-            for timestamp, behaviors in analysis_data.get("timestamps", {}).items():
-                print(f"\n{timestamp}:")
-                for behavior, count in behaviors.items():
-                    print(f"  {behavior}: {count}")
-            
-            # Print strengths
-            if "interview_strengths" in analysis_data:
-                print("\n--- INTERVIEW STRENGTHS ---")
-                for strength in analysis_data["interview_strengths"]:
-                    print(f"  • {strength}")
-                    
-            # Print areas for improvement
-            if "areas_for_improvement" in analysis_data:
-                print("\n--- AREAS FOR IMPROVEMENT ---")
-                for area in analysis_data["areas_for_improvement"]:
-                    print(f"  • {area}")
-            
-            print("\n--- OVERALL ANALYSIS ---")
-            print(analysis_data.get("overall_analysis", "No overall analysis provided"))
+            # Fences and small syntax slips are handled locally; anything worse
+            # gets a text-only repair call rather than re-analysing the video
+            analysis_data = parse_or_repair(response_text, EmotionAnalysis, repair=repair_json).model_dump()
+            print(f"Interview analysis complete: {len(analysis_data.get('timestamps', {}))} timestamps")
             
             # Cleanup all files before returning
-            cleanup_files(local_filename, video_file, json_filename)
+            cleanup_files(local_filename, video_file, processed_video=processed_filename)
             
             # Return the successfully parsed JSON object
             return analysis_data
             
-        except Exception as e:
-            print("Warning: The response is not a valid JSON object. Error:", e)
-            print("Original response:", response_text)
+        except StructuredOutputError as e:
+            print(f"Warning: The response is not a valid JSON object. Error: {e}")
             
             # Cleanup all files before returning
-            cleanup_files(local_filename, video_file, json_filename)
+            cleanup_files(local_filename, video_file, processed_video=processed_filename)
             
             # Return the cleaned text as fallback
-            return cleaned_json_text
+            return e.text
     
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         
         # Cleanup any files that might have been created before the error
-        cleanup_files(local_filename, video_file)
+        cleanup_files(local_filename, video_file, processed_video=processed_filename)
         
         # Re-raise the exception
         raise
 
-def cleanup_files(local_video=None, video_file=None, json_file=None):
+def cleanup_files(local_video=None, video_file=None, processed_video=None):
     """
     Clean up all files created during the analysis process.
     
     Parameters:
         local_video (str): Path to the downloaded video file
         video_file: The file object from the genai client
-        json_file (str): Path to the JSON output file
+        processed_video (str): Path to the pre-processed copy of the video
     """
     print("\nCleaning up files...")
     
-    # Delete the local video file if it exists
-    if local_video and os.path.exists(local_video):
-        try:
-            os.remove(local_video)
-            print(f"Deleted local video file: {local_video}")
-        except Exception as e:
-            print(f"Failed to delete local video file: {str(e)}")
+    # Delete the local video files if they exist
+    for path in (local_video, processed_video):
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+                print(f"Deleted local video file: {path}")
+            except Exception as e:
+                print(f"Failed to delete local video file: {str(e)}")
     
     # Delete the uploaded file from the service if it exists
     if video_file:
         try:
-            client.files.delete(name=video_file.name)
+            get_client().files.delete(name=video_file.name)
             print(f"Deleted uploaded file from service: {video_file.uri}")
         except Exception as e:
             print(f"Failed to delete uploaded file from service: {str(e)}")
     
-    # Delete the JSON file if it exists
-    if json_file and os.path.exists(json_file):
-        try:
-            os.remove(json_file)
-            print(f"Deleted JSON file: {json_file}")
-        except Exception as e:
-            print(f"Failed to delete JSON file: {str(e)}")
-    
     print("Cleanup complete.")
 
-def clean_json_response(text):
-    """
-    Clean the LLM response to extract just the JSON content,
-    removing any markdown code block syntax or additional text.
-    
-    Parameters:
-        text (str): The raw text response from the LLM
-        
-    Returns:
-        str: Cleaned JSON text
-    """
-    # First, try to extract content from markdown code blocks
-    code_block_pattern = r"```(?:json)?\s*([\s\S]*?)\s*```"
-    matches = re.findall(code_block_pattern, text)
-    
-    if matches:
-        # Use the first code block found
-        return matches[0].strip()
-    
-    # If no code blocks found, look for JSON-like content (starts with { and ends with })
-    json_pattern = r"(\{[\s\S]*\})"
-    matches = re.findall(json_pattern, text)
-    
-    if matches:
-        # Use the first JSON-like content found
-        return matches[0].strip()
-    
-    # If all else fails, return the original text with minimal cleaning
-    # Remove any lines that don't look like they could be part of JSON
-    lines = text.split('\n')
-    filtered_lines = []
-    for line in lines:
-        if line.strip() and not line.strip().startswith('```') and not line.strip().startswith('#'):
-            filtered_lines.append(line)
-    
-    return '\n'.join(filtered_lines)
-
 # data=analyze_video_emotion_from_cloud_url("https://res.cloudinary.com/dh91ceeql/video/upload/v1744129657/interview_recordings/Sahil%20Kumar%20Resume%20%282024%29.pdf-interview.webm")
 # print(data)
\ No newline at end of file
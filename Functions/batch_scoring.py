@@ -0,0 +1,289 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import threading
+from dotenv import load_dotenv
+from Functions.executor import run_blocking
+from Functions.job_queue import JobQueue
+from Functions.create_analysis_to_chats import request_scorecard
+from Model.score_card import ScoreCard
+
+load_dotenv()
+
+# Scorecards requested at the same time, and the sustained request rate towards Anthropic.
+BATCH_SCORING_CONCURRENCY = int(os.getenv("BATCH_SCORING_CONCURRENCY", "4"))
+BATCH_SCORING_RATE_PER_MINUTE = float(os.getenv("BATCH_SCORING_RATE_PER_MINUTE", "30"))
+BATCH_SCORING_RETRIES = int(os.getenv("BATCH_SCORING_RETRIES", "3"))
+BATCH_SCORING_RETRY_BACKOFF_SECONDS = float(os.getenv("BATCH_SCORING_RETRY_BACKOFF_SECONDS", "10"))
+SCORECARD_TIMEOUT_SECONDS = float(os.getenv("SCORECARD_TIMEOUT_SECONDS", "120"))
+# Inputs and JSONL results of batches submitted over HTTP
+BATCH_SCORING_DIR = os.getenv("BATCH_SCORING_DIR", "batch_scoring")
+
+_BATCH_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+_write_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter: ``rate_per_minute`` tokens refill
+    continuously and at most ``burst`` accumulate while idle.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def is_retryable_error(exc) -> bool:
+    """Rate limits, overloads, 5xx responses and connection problems are worth retrying."""
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    # Only a live Anthropic client raises its errors; fake and replay runs never import the SDK
+    anthropic = sys.modules.get("anthropic")
+    if anthropic is None:
+        return False
+    if isinstance(exc, anthropic.APIConnectionError):
+        return True
+    if isinstance(exc, anthropic.APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    return False
+
+
+def conversation_id(conversation: dict, position: int) -> str:
+    return str(conversation.get("_id") or conversation.get("id") or f"conversation-{position}")
+
+
+def load_conversations(path: str) -> list:
+    """
+    Read conversations from a JSON array or a JSONL file. Each conversation has
+    an ``_id`` (or ``id``) and ``messages`` of ``{"user", "response"}`` pairs, the
+    shape ``generate_scorecard`` takes, and optionally the rubric ``criteria``
+    to score it with.
+    """
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def load_checkpoint(output_path: str) -> set:
+    """
+    The results file doubles as the checkpoint: conversations that already have
+    a successful line are skipped when a run is resumed. Failed ones are retried,
+    and the newest line for a conversation is the one that counts.
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by the interruption; that conversation is scored again.
+                continue
+            if record.get("status") == "ok":
+                completed.add(record["conversation_id"])
+            else:
+                completed.discard(record.get("conversation_id"))
+    return completed
+
+
+def _append_line(output_path: str, record: dict):
+    with _write_lock, open(output_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+async def _score_with_retries(conversation: dict, limiter: TokenBucket, score, retries: int, backoff: float):
+    attempts = 0
+    while True:
+        attempts += 1
+        await limiter.acquire()
+        try:
+            result = await run_blocking(score, conversation, conversation.get("criteria"), timeout=SCORECARD_TIMEOUT_SECONDS)
+        except Exception as e:
+            if attempts > retries or not is_retryable_error(e):
+                return {"error": str(e) or type(e).__name__}, attempts
+            delay = backoff * (2 ** (attempts - 1))
+            print(f"[batch-scoring] {conversation.get('_id')}: transient error, retrying in {delay:g}s: {str(e)}")
+            await asyncio.sleep(delay)
+            continue
+        return result, attempts
+
+
+async def score_batch(conversations: list, output_path: str, concurrency: int = BATCH_SCORING_CONCURRENCY,
+                      rate_per_minute: float = BATCH_SCORING_RATE_PER_MINUTE, retries: int = BATCH_SCORING_RETRIES,
+                      score=request_scorecard, progress: dict = None) -> dict:
+    """
+    Score many conversations with at most ``concurrency`` in flight and no more
+    than ``rate_per_minute`` requests started per minute, appending one JSONL
+    line per conversation to ``output_path`` as it finishes. Conversations
+    already scored in ``output_path`` are skipped, so re-running an interrupted
+    batch with the same output resumes it.
+
+    Parameters:
+        conversations (list): Conversations in ``generate_scorecard`` format
+        output_path (str): JSONL results file, also used as the checkpoint
+        score: ``score(conversation, criteria)`` scoring one conversation (raising on API errors)
+        progress (dict): Optional dict kept up to date with the counters below
+
+    Returns:
+        dict: total, skipped, succeeded, failed
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    completed = load_checkpoint(output_path)
+    pending = []
+    for position, conversation in enumerate(conversations):
+        conversation = dict(conversation)
+        conversation["_id"] = conversation_id(conversation, position)
+        if conversation["_id"] not in completed:
+            pending.append(conversation)
+
+    summary = progress if progress is not None else {}
+    summary.update(total=len(conversations), skipped=len(conversations) - len(pending), succeeded=0, failed=0)
+    limiter = TokenBucket(rate_per_minute, burst=concurrency)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run(conversation):
+        async with slots:
+            result, attempts = await _score_with_retries(
+                conversation, limiter, score, retries, BATCH_SCORING_RETRY_BACKOFF_SECONDS
+            )
+        ok = "error" not in result
+        record = {
+            "conversation_id": conversation["_id"],
+            "status": "ok" if ok else "error",
+            "attempts": attempts,
+            "scored_at": time.time(),
+        }
+        if ok:
+            record["scorecard"] = result
+        else:
+            record["error"] = result["error"]
+        await run_blocking(_append_line, output_path, record)
+        summary["succeeded" if ok else "failed"] += 1
+
+    await asyncio.gather(*(run(conversation) for conversation in pending))
+    return dict(summary)
+
+
+# One batch at a time, so concurrent batches never multiply the request rate.
+batch_scoring_jobs = JobQueue("batch-scoring", workers=1, max_retries=0, result_ttl=7 * 86400)
+# batch_id -> {"job_id", "progress"} for batches submitted in this process; other
+# workers only see the results file (status "unknown")
+batches = {}
+
+
+def valid_batch_id(batch_id: str) -> bool:
+    return bool(_BATCH_ID.match(batch_id or ""))
+
+
+def batch_paths(batch_id: str):
+    """(input, results) JSONL paths of an HTTP batch."""
+    return (os.path.join(BATCH_SCORING_DIR, f"{batch_id}.input.jsonl"),
+            os.path.join(BATCH_SCORING_DIR, f"{batch_id}.jsonl"))
+
+
+def _save_input(path: str, conversations: list):
+    os.makedirs(BATCH_SCORING_DIR, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for conversation in conversations:
+            f.write(json.dumps(conversation) + "\n")
+
+
+async def submit_batch(conversations=None, batch_id: str = None) -> dict:
+    """
+    Queue a batch for background scoring. The input is saved next to the
+    results, so re-submitting an existing ``batch_id`` without conversations
+    resumes it from its checkpoint (e.g. after a restart).
+    """
+    batch_id = batch_id or uuid.uuid4().hex
+    input_path, output_path = batch_paths(batch_id)
+    if conversations:
+        await run_blocking(_save_input, input_path, conversations)
+    elif os.path.exists(input_path):
+        conversations = await run_blocking(load_conversations, input_path)
+    else:
+        raise FileNotFoundError(f"No conversations given and no saved input for batch {batch_id}.")
+
+    running = batches.get(batch_id)
+    if running:
+        job = batch_scoring_jobs.get(running["job_id"])
+        if job and job["status"] in ("queued", "running"):
+            return batch_status(batch_id)
+
+    progress = {"total": len(conversations), "skipped": 0, "succeeded": 0, "failed": 0}
+    job = batch_scoring_jobs.submit(score_batch, conversations, output_path, progress=progress)
+    batches[batch_id] = {"job_id": job["job_id"], "progress": progress}
+    return batch_status(batch_id)
+
+
+def batch_status(batch_id: str):
+    entry = batches.get(batch_id)
+    output_path = batch_paths(batch_id)[1]
+    if entry is None:
+        if not os.path.exists(output_path):
+            return None
+        # Submitted before a restart: only the results on disk are known.
+        return {"batch_id": batch_id, "status": "unknown", "results_available": True}
+    job = batch_scoring_jobs.get(entry["job_id"]) or {}
+    return {
+        "batch_id": batch_id,
+        "job_id": entry["job_id"],
+        "status": job.get("status", "unknown"),
+        "error": job.get("error"),
+        "progress": entry["progress"],
+        "results_available": os.path.exists(output_path),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m Functions.batch_scoring",
+        description="Score many interview transcripts and write the scorecards as JSONL.",
+    )
+    parser.add_argument("input", help="JSON array or JSONL file of conversations ({_id, messages: [{user, response}]})")
+    parser.add_argument("-o", "--output", help="JSONL results file; re-running with the same file resumes (default: <input>.scores.jsonl)")
+    parser.add_argument("-c", "--concurrency", type=int, default=BATCH_SCORING_CONCURRENCY)
+    parser.add_argument("-r", "--rate", type=float, default=BATCH_SCORING_RATE_PER_MINUTE, help="Requests per minute")
+    parser.add_argument("--retries", type=int, default=BATCH_SCORING_RETRIES)
+    parser.add_argument("--rubric", help="ScoreCard JSON file used for conversations without their own criteria")
+    args = parser.parse_args(argv)
+
+    output_path = args.output or f"{os.path.splitext(args.input)[0]}.scores.jsonl"
+    conversations = load_conversations(args.input)
+    if args.rubric:
+        with open(args.rubric, encoding="utf-8") as f:
+            criteria = ScoreCard.model_validate_json(f.read()).model_dump()["criterias"]
+        conversations = [{"criteria": criteria, **conversation} for conversation in conversations]
+    summary = asyncio.run(score_batch(
+        conversations, output_path, concurrency=args.concurrency, rate_per_minute=args.rate, retries=args.retries
+    ))
+    print(json.dumps({"output": output_path, **summary}))
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import os
+import json
+import asyncio
+import zipfile
+from dotenv import load_dotenv
+from Functions.executor import run_blocking
+from Functions.extraction_cache import extract_resume
+from Functions.extract_text_from_pdf import PDFTooLargeError
+from Functions.pdf_pool import PDF_POOL_WORKERS, PDFExtractionTimeout, check_pdf_size
+
+load_dotenv()
+
+# Resumes read and extracted at the same time within one bulk request. The
+# process pool caps actual parsing; a few extra slots keep it fed while files are read.
+BULK_UPLOAD_CONCURRENCY = int(os.getenv("BULK_UPLOAD_CONCURRENCY", str(PDF_POOL_WORKERS * 2)))
+# Upper bound on resumes per request (multipart parts plus zip entries).
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "5000"))
+
+
+class BulkSource:
+    """
+    One resume in a bulk request: its file name, size (if known), a blocking
+    reader and where it came from (the part name, or archive/path for a zip entry).
+    """
+
+    def __init__(self, file_name: str, size, read, error: str = None, origin: str = None, status_code: int = 400):
+        self.file_name = file_name
+        self.size = size
+        self.read = read
+        self.error = error
+        self.origin = origin or file_name
+        self.status_code = status_code
+
+
+def _zip_sources(archive: str, upload_file) -> list:
+    try:
+        bundle = zipfile.ZipFile(upload_file.file)
+    except zipfile.BadZipFile as e:
+        return [BulkSource(archive, None, None, f"Invalid zip archive: {str(e)}")]
+
+    sources = []
+    for info in bundle.infolist():
+        base_name = os.path.basename(info.filename)
+        if info.is_dir() or info.filename.startswith("__MACOSX/") or base_name.startswith("."):
+            continue
+        if not base_name.lower().endswith(".pdf"):
+            sources.append(BulkSource(base_name, None, None, "Invalid file type. Only PDF files are accepted."))
+            continue
+        # The uncompressed size comes from the central directory, so oversized
+        # entries are rejected without inflating them.
+        sources.append(BulkSource(base_name, info.file_size, lambda info=info: bundle.read(info),
+                                  origin=f"{archive}/{info.filename}"))
+    return sources
+
+
+def collect_sources(upload_files) -> list:
+    """
+    Flatten the uploaded parts into resumes: PDFs are taken as is and each zip
+    contributes the PDFs inside it. Unsupported files become error entries
+    rather than failing the request, as do resumes whose file name is already
+    taken by an earlier one.
+    """
+    sources = []
+    for upload_file in upload_files:
+        name = upload_file.filename or ""
+        if name.lower().endswith(".zip"):
+            sources.extend(_zip_sources(name, upload_file))
+        elif name.lower().endswith(".pdf"):
+            upload_file.file.seek(0)
+            sources.append(BulkSource(name, upload_file.size, upload_file.file.read))
+        else:
+            sources.append(BulkSource(name, None, None, "Invalid file type. Please upload PDF or zip files."))
+    _reject_duplicates(sources)
+    return sources
+
+
+def _reject_duplicates(sources: list):
+    # Sessions are keyed by file name, so two resumes with the same name (e.g. the
+    # same basename in different zip folders) would overwrite each other. The first keeps it.
+    first = {}
+    for source in sources:
+        if source.error:
+            continue
+        if source.file_name in first:
+            source.error = f"Duplicate file name {source.file_name!r} ({source.origin}); already used by {first[source.file_name]}."
+            source.status_code = 409
+        else:
+            first[source.file_name] = source.origin
+
+
+def _error_line(file_name: str, status_code: int, error: str) -> dict:
+    return {"file": file_name, "status": "error", "status_code": status_code, "error": error}
+
+
+async def _ingest_one(source: BulkSource, register) -> dict:
+    if source.error:
+        return _error_line(source.file_name, source.status_code, source.error)
+    try:
+        if source.size is not None:
+            check_pdf_size(source.size)
+        contents = await run_blocking(source.read)
+        extraction = await extract_resume(contents)
+        chunks = await register(source.file_name, extraction)
+    except PDFTooLargeError as e:
+        return _error_line(source.file_name, 413, str(e))
+    except PDFExtractionTimeout as e:
+        return _error_line(source.file_name, 422, str(e))
+    except Exception as e:
+        return _error_line(source.file_name, 500, str(e))
+    return {"file": source.file_name, "status": "ok", "pages": extraction["page_count"], "chunks": chunks}
+
+
+async def ingest_stream(sources: list, register):
+    """
+    Extract and register every source with at most BULK_UPLOAD_CONCURRENCY in
+    flight, yielding one NDJSON line per resume as soon as it finishes, then a
+    summary line. A failed file only produces an error line.
+
+    Parameters:
+        sources (list): BulkSource entries from ``collect_sources``
+        register: ``async register(file_name, extraction)`` storing the session
+            state for one resume and returning its chunk count
+    """
+    slots = asyncio.Semaphore(BULK_UPLOAD_CONCURRENCY)
+
+    async def bounded(source):
+        async with slots:
+            return await _ingest_one(source, register)
+
+    tasks = [asyncio.create_task(bounded(source)) for source in sources]
+    succeeded = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            line = await next_done
+            succeeded += line["status"] == "ok"
+            yield json.dumps(line) + "\n"
+        yield json.dumps({"summary": {"total": len(tasks), "succeeded": succeeded, "failed": len(tasks) - succeeded}}) + "\n"
+    finally:
+        # The client went away mid-stream: stop the remaining extractions.
+        for task in tasks:
+            task.cancel()
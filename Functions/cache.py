@@ -0,0 +1,147 @@
+import os
+import threading
+from collections import OrderedDict
+from Functions.executor import run_blocking
+
+
+class TwoTierCache:
+    """
+    A small content-addressed cache with an in-memory LRU tier in front of an
+    on-disk tier. Keys are expected to be hex digests, so they double as file
+    names. Values are kept as Python objects in memory and serialized with
+    ``dumps``/``loads`` (bytes in, bytes out) on disk.
+
+    Parameters:
+        directory (str): Where the disk tier lives; created if missing
+        max_memory_items (int): Entries kept in the LRU tier
+        max_disk_items (int): Files kept on disk before the oldest are evicted
+        dumps: Callable turning a value into bytes
+        loads: Callable turning bytes back into a value
+        suffix (str): File extension for disk entries
+    """
+
+    def __init__(self, directory, max_memory_items=256, max_disk_items=5000,
+                 dumps=None, loads=None, suffix=".bin"):
+        self.directory = directory
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.dumps = dumps or (lambda value: value)
+        self.loads = loads or (lambda data: data)
+        self.suffix = suffix
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._disk_items = sum(1 for f in os.listdir(directory) if f.endswith(suffix))
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def get_memory(self, key):
+        """Memory-tier lookup only; never touches the disk."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+        return None
+
+    def get_disk(self, key):
+        """Disk-tier lookup; promotes hits into memory. Counts a miss otherwise."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = self.loads(f.read())
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            print(f"Warning: Dropping unreadable cache entry {path}: {str(e)}")
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+        # Touch the file so eviction stays least-recently-used on disk too.
+        os.utime(path)
+        with self._lock:
+            self.disk_hits += 1
+        self._remember(key, value)
+        return value
+
+    def get(self, key):
+        value = self.get_memory(key)
+        if value is not None:
+            return value
+        return self.get_disk(key)
+
+    def set(self, key, value):
+        self._remember(key, value)
+        path = self._path(key)
+        existed = os.path.exists(path)
+        # Write to a temp file first so a concurrent reader never sees a partial entry.
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self.dumps(value))
+        os.replace(temp_path, path)
+        if not existed:
+            with self._lock:
+                self._disk_items += 1
+                over_limit = self._disk_items > self.max_disk_items
+            if over_limit:
+                self._evict_disk()
+
+    async def aget(self, key):
+        """Like ``get`` but reads the disk tier off the event loop."""
+        value = self.get_memory(key)
+        if value is not None:
+            return value
+        return await run_blocking(self.get_disk, key)
+
+    async def aset(self, key, value):
+        """Like ``set`` but writes the disk tier off the event loop."""
+        await run_blocking(self.set, key, value)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except FileNotFoundError:
+                    pass
+        entries.sort()
+        # Trim to 90% of the limit so eviction (a directory scan) is not paid on every write.
+        excess = len(entries) - int(self.max_disk_items * 0.9)
+        for _, path in entries[:max(excess, 0)]:
+            self._remove(path)
+        with self._lock:
+            self._disk_items = len(entries) - max(excess, 0)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "disk_items": self._disk_items,
+            }
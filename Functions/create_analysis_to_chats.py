@@ -1,133 +1,158 @@
 import  json
 import os
+import functools
 from dotenv import load_dotenv
-from anthropic import AnthropicVertex  # Ensure your AnthropicVertex package is installed and configured
-# Load environment variables and set credentials
+from Functions.structured_output import parse_or_repair, StructuredOutputError
+from Model.evaluation import InterviewEvaluation
+from Providers.registry import get_llm, EVALUATOR_MODEL
+from Functions.metrics import track
+# Load environment variables
 load_dotenv()
-# Build credentials from environment variables and write to a file
-credentials_json = {
-    "type": os.getenv("type"),
-    "project_id": os.getenv("project_id"),
-    "private_key_id": os.getenv("private_key_id"),
-    "private_key": os.getenv("private_key").replace('\\n', '\n'),  # Ensure correct newline handling
-    "client_email": os.getenv("client_email"),
-    "client_id": os.getenv("client_id"),
-    "auth_uri": os.getenv("auth_uri"),
-    "token_uri": os.getenv("token_uri"),
-    "auth_provider_x509_cert_url": os.getenv("auth_provider_x509_cert_url"),
-    "client_x509_cert_url": os.getenv("client_x509_cert_url"),
-    "universe_domain": os.getenv("universe_domain")
-}
+SCORECARD_MAX_TOKENS = 3000
+# Fixing malformed JSON needs no transcript and no judgement, so a smaller model does it
+SCORECARD_REPAIR_MODEL = os.getenv("SCORECARD_REPAIR_MODEL", "claude-3-5-haiku@20241022")
 
-with open("credentials.json", "w") as f:
-    json.dump(credentials_json, f, indent=2)
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = r"credentials.json"
-project_id = os.getenv("project_id")
-region = os.getenv("region")
-client = AnthropicVertex(project_id=project_id, region=region)
-# Function to generate a structured interview scorecard using Anthropic's evaluation
-def generate_scorecard(conversation: dict) -> dict:
-    # Hardcoded evaluation criteria for interviews
-    # Note: The evaluation for technical knowledge and problem solving (domain expertise) should be more elaborate
-    hardcoded_criterias = [
-        {
-            "parameter": "Technical Knowledge",
-            "top_score": 100,
-            "marking_type": "Numeric",
-            "scoring_guide": "Evaluate the candidate's in-depth technical and domain expertise. Provide detailed evidence and justification."
-        },
-        {
-            "parameter": "Problem Solving",
-            "top_score": 100,
-            "marking_type": "Numeric",
-            "scoring_guide": "Assess the candidate's analytical skills and ability to solve complex problems with comprehensive explanation."
-        },
-        {
-            "parameter": "Communication",
-            "top_score": 80,
-            "marking_type": "Numeric",
-            "scoring_guide": "Evaluate clarity, articulation, and conciseness in communication. Provide brief evidence."
-        },
-        {
-            "parameter": "Interpersonal Skills",
-            "top_score": 80,
-            "marking_type": "Pass/Fail",
-            "scoring_guide": "Assess teamwork, collaboration, and overall soft skills with minimal elaboration."
-        }
-    ]
-    
-    # System prompt instructing for only JSON response and clear instructions for elaboration levels
-    system_prompt = """
-    You are an expert evaluator for technical interviews. Evaluate the following conversation based on these hardcoded criteria:
-    
-    - Technical Knowledge (Max Score: 100, Numeric): Provide an in-depth analysis of the candidate's technical and domain expertise.
-    - Problem Solving (Max Score: 100, Numeric): Deliver a detailed explanation of the candidate's problem-solving abilities.
-    - Communication (Max Score: 80, Numeric): Provide a concise evaluation of communication skills.
-    - Interpersonal Skills (Max Score: 80, Pass/Fail): Offer a brief assessment of soft skills.
-    
-    Your response MUST be a valid JSON object with no additional text.
-    Follow exactly this JSON format:
+# Default evaluation criteria, used when no company rubric is selected
+# Note: The evaluation for technical knowledge and problem solving (domain expertise) should be more elaborate
+SCORECARD_CRITERIA = [
     {
-      "evaluations": [
-        {
-          "parameter": "<Parameter Name>",
-          "result": "<'Pass'/'Fail' or numeric score>",
-          "score": "<Score>/<Max Score>",
-          "evidence": ["<evidence text>"]
-        }
-      ],
-      "Overall_score": "<Total Score>/<Total Max Score>",
-      "Overall_grammar": "<Assessment of grammar quality>",
-      "Overall_accent": "<Assessment of tone and communication>",
-      "Overall_analysis": "<Overall interview analysis summary>"
+        "parameter": "Technical Knowledge",
+        "top_score": 100,
+        "marking_type": "Numeric",
+        "scoring_guide": "Evaluate the candidate's in-depth technical and domain expertise. Provide detailed evidence and justification."
+    },
+    {
+        "parameter": "Problem Solving",
+        "top_score": 100,
+        "marking_type": "Numeric",
+        "scoring_guide": "Assess the candidate's analytical skills and ability to solve complex problems with comprehensive explanation."
+    },
+    {
+        "parameter": "Communication",
+        "top_score": 80,
+        "marking_type": "Numeric",
+        "scoring_guide": "Evaluate clarity, articulation, and conciseness in communication. Provide brief evidence."
+    },
+    {
+        "parameter": "Interpersonal Skills",
+        "top_score": 80,
+        "marking_type": "Pass/Fail",
+        "scoring_guide": "Assess teamwork, collaboration, and overall soft skills with minimal elaboration."
+    }
+]
+# Extra instruction that only applies to the default rubric
+SCORECARD_DEFAULT_GUIDANCE = (
+    "Provide more elaborate analysis for Technical Knowledge and Problem Solving, "
+    "while keeping Communication and Interpersonal Skills evaluation concise."
+)
+
+# Output format shared by every rubric
+SCORECARD_JSON_FORMAT = """Your response MUST be a valid JSON object with no additional text.
+Follow exactly this JSON format:
+{
+  "evaluations": [
+    {
+      "parameter": "<Parameter Name>",
+      "result": "<'Pass'/'Fail' or numeric score>",
+      "score": "<Score>/<Max Score>",
+      "evidence": ["<evidence text>"]
     }
+  ],
+  "Overall_score": "<Total Score>/<Total Max Score>",
+  "Overall_grammar": "<Assessment of grammar quality>",
+  "Overall_accent": "<Assessment of tone and communication>",
+  "Overall_analysis": "<Overall interview analysis summary>"
+}"""
+# Mark the rubric prompt as a cacheable prefix (Anthropic prompt caching). Prompts
+# below the model's minimum cacheable length are simply sent uncached.
+SCORECARD_PROMPT_CACHING = os.getenv("SCORECARD_PROMPT_CACHING", "true").lower() == "true"
+
+@functools.lru_cache(maxsize=256)
+def _compile_rubric(criteria_json: str, guidance: str = "") -> str:
+    criteria = json.loads(criteria_json)
+    lines = "\n".join(
+        f"- {c['parameter']} (Max Score: {c['top_score']}, {c['marking_type']}): {c['scoring_guide']}"
+        for c in criteria
+    )
+    if guidance:
+        lines = f"{lines}\n\n{guidance}"
+    return (
+        "You are an expert evaluator for technical interviews. "
+        "Evaluate the following conversation based on these criteria:\n\n"
+        f"{lines}\n\n{SCORECARD_JSON_FORMAT}"
+    )
+
+def compile_rubric_prompt(criteria=None) -> str:
+    """
+    System prompt for a rubric (``Criteria`` dicts; the default rubric when
+    None). Each distinct rubric is compiled once and reused, so the prefix is
+    byte-identical across calls and can be served from the provider's cache.
     """
+    if criteria is None:
+        criteria = SCORECARD_CRITERIA
+    guidance = SCORECARD_DEFAULT_GUIDANCE if criteria == SCORECARD_CRITERIA else ""
+    return _compile_rubric(json.dumps(criteria, sort_keys=True), guidance)
+
+def repair_json(prompt: str, max_tokens: int) -> str:
+    with track("scorecard_repair"):
+        return get_llm("evaluator").complete(prompt, model=SCORECARD_REPAIR_MODEL, max_tokens=max_tokens)
+
+# Function to generate a structured interview scorecard using Anthropic's evaluation
+def generate_scorecard(conversation: dict, criteria=None) -> dict:
+    try:
+        return request_scorecard(conversation, criteria)
+    except Exception as e:
+        return {
+            "error": str(e),
+            "message": "Failed to generate scorecard"
+        }
+
+def request_scorecard(conversation: dict, criteria=None) -> dict:
+    """
+    Same as ``generate_scorecard`` but lets Anthropic API errors propagate, so
+    callers such as batch scoring can retry rate limits and outages.
+
+    Parameters:
+        conversation (dict): ``{"_id", "messages": [{"user", "response"}]}``
+        criteria (list): Rubric criteria; the default rubric when None
+    """
+    system_prompt = compile_rubric_prompt(criteria)
     
     # Format the conversation transcript strictly from the stored messages
     conversation_text = "\n".join([
         f"User: {m['user']}\nAssistant: {m['response']}" for m in conversation.get('messages', [])
     ])
     
-    analysis_prompt = f"""
-    Evaluate the following interview conversation based on the criteria above. Provide more elaborate analysis for Technical Knowledge and Problem Solving, while keeping Communication and Interpersonal Skills evaluation concise.
-    
-    **Conversation Transcript:**
-    {conversation_text}
-    """
+    # The rubric is already in the system prompt; the user turn carries only the transcript
+    analysis_prompt = (
+        "Evaluate the following interview conversation based on the criteria above.\n\n"
+        f"**Conversation Transcript:**\n{conversation_text}"
+    )
     
-    full_prompt = system_prompt + "\n" + analysis_prompt
-    
-    try:
-        # Send evaluation request to Anthropic
-        response = client.messages.create(
-            model="claude-3-5-sonnet-v2@20241022",
-            max_tokens=3000,
+    # Send evaluation request to the evaluator (Anthropic unless configured otherwise)
+    with track("scorecard_llm"):
+        claude_response_text = get_llm("evaluator").complete(
+            analysis_prompt,
             system=system_prompt,
-            messages=[{
-                "role": "user",
-                "content": full_prompt
-            }]
+            cache_system=SCORECARD_PROMPT_CACHING,
+            model=EVALUATOR_MODEL,
+            max_tokens=SCORECARD_MAX_TOKENS
         )
-        claude_response_text = response.content[0].text
-        
-        # Attempt to parse the JSON response
-        try:
-            parsed_scores = json.loads(claude_response_text)
-        except json.JSONDecodeError as json_error:
-            return {
-                "error": f"JSON Parsing Error: {str(json_error)}",
-                "raw_response": claude_response_text,
-                "message": "Anthropic's response was not in valid JSON format."
-            }
-        
-        scorecard_result = {
-            "conversation_id": conversation.get("_id", "unknown_id"),
-            "claude_analysis": parsed_scores
-        }
-        return scorecard_result
     
-    except Exception as e:
+    # Parse and validate the scorecard; malformed output gets a small repair call
+    # instead of throwing the whole evaluation away
+    try:
+        evaluation = parse_or_repair(claude_response_text, InterviewEvaluation, repair=repair_json)
+    except StructuredOutputError as parse_error:
         return {
-            "error": str(e),
-            "message": "Failed to generate scorecard"
+            "error": f"JSON Parsing Error: {str(parse_error)}",
+            "raw_response": claude_response_text,
+            "message": "Anthropic's response was not in valid JSON format."
         }
+    parsed_scores = evaluation.model_dump()
+    
+    scorecard_result = {
+        "conversation_id": conversation.get("_id", "unknown_id"),
+        "claude_analysis": parsed_scores
+    }
+    return scorecard_result
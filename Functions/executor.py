@@ -0,0 +1,42 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from Functions.metrics import registry
+
+load_dotenv()
+
+# Size of the shared pool used for SDK calls that have no async variant
+# (Cloudinary uploads, file writes, ...). Bounded so a burst of interviews
+# queues work instead of spawning unbounded threads.
+BLOCKING_IO_WORKERS = int(os.getenv("BLOCKING_IO_WORKERS", "32"))
+
+_executor = ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS, thread_name_prefix="blocking-io")
+# Calls running or waiting for a thread; above BLOCKING_IO_WORKERS means work is queueing
+in_flight = registry.gauge(
+    "interview_blocking_pool_in_flight", "Calls submitted to the shared blocking pool and not yet finished.")
+registry.callback("interview_blocking_pool_workers", "Size of the shared blocking pool.", (),
+                  lambda: [((), BLOCKING_IO_WORKERS)])
+
+
+async def run_blocking(func, *args, timeout=None, **kwargs):
+    """
+    Run a blocking callable on the shared bounded thread pool so it never
+    stalls the event loop.
+
+    Parameters:
+        func: The synchronous callable to run
+        timeout (float): Optional wall-clock limit in seconds; raises asyncio.TimeoutError when exceeded
+
+    Returns:
+        Whatever ``func`` returns.
+    """
+    in_flight.inc()
+    work = _executor.submit(functools.partial(func, *args, **kwargs))
+    # Counted on the thread-pool future, so a call abandoned by ``timeout`` stays counted until it really ends
+    work.add_done_callback(lambda _: in_flight.dec())
+    future = asyncio.wrap_future(work)
+    if timeout is None:
+        return await future
+    return await asyncio.wait_for(future, timeout)
@@ -1,9 +1,80 @@
-import fitz  # PyMuPDF
+import re
+
+KNOWN_SECTIONS = {
+    "summary", "profile", "objective", "about", "about me", "experience", "work experience",
+    "professional experience", "employment", "employment history", "internships", "internship",
+    "education", "academics", "projects", "personal projects", "academic projects", "skills",
+    "technical skills", "core skills", "certifications", "certificates", "achievements",
+    "awards", "publications", "research", "leadership", "activities", "extracurricular activities",
+    "volunteering", "languages", "interests", "hobbies", "courses", "coursework", "positions of responsibility",
+}
+
+class PDFTooLargeError(ValueError):
+    """The PDF exceeds a configured page or size limit."""
+
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
 
 # Helper function to extract text from PDF bytes
 def extract_text_from_bytes(pdf_bytes: bytes) -> str:
-    text_content = ""
+    import fitz  # PyMuPDF; loaded on first use, the web process only routes PDFs to the pool
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        # join() builds the result once instead of re-copying it for every page
+        return "".join(page.get_text() for page in doc)
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces, strip line ends and squeeze blank lines."""
+    lines = [_SPACES.sub(" ", line).strip() for line in text.splitlines()]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip().rstrip(":").strip()
+    if not stripped or len(stripped) > 40:
+        return False
+    if stripped.lower() in KNOWN_SECTIONS:
+        return True
+    # A short capitalized label on its own line ("Experience summary:") opens a section.
+    if line.strip().endswith(":") and stripped[0].isupper() and len(stripped.split()) <= 4:
+        return True
+    # Short all-caps lines ("WORK HISTORY") are headings in most resume layouts.
+    letters = [c for c in stripped if c.isalpha()]
+    return len(letters) >= 4 and all(c.isupper() for c in letters) and len(stripped.split()) <= 4
+
+
+def split_sections(text: str) -> list:
+    """Split resume text into [(title, body)] using heading-like lines."""
+    sections = []
+    title, lines = "Header", []
+    for line in text.splitlines():
+        if _is_heading(line):
+            if any(l.strip() for l in lines):
+                sections.append((title, "\n".join(lines)))
+            title, lines = line.strip().rstrip(":").strip().title(), []
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((title, "\n".join(lines)))
+    return sections
+
+
+def extract_structured_from_bytes(pdf_bytes: bytes, max_pages=None) -> dict:
+    """
+    Extract a resume into a JSON-friendly structure. Raises PDFTooLargeError,
+    before any page is parsed, when the document has more than ``max_pages`` pages.
+
+    Returns:
+        dict: ``pages`` (normalized text per page), ``text`` (pages joined by
+        blank lines), ``sections`` ([title, body] pairs) and ``page_count``.
+    """
+    import fitz  # PyMuPDF
     with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
-        for page in doc:
-            text_content += page.get_text()
-    return text_content
\ No newline at end of file
+        if max_pages is not None and doc.page_count > max_pages:
+            raise PDFTooLargeError(f"PDF has {doc.page_count} pages; the limit is {max_pages}.")
+        pages = [normalize_whitespace(page.get_text()) for page in doc]
+    text = "\n\n".join(page for page in pages if page)
+    return {
+        "pages": pages,
+        "text": text,
+        "sections": [list(section) for section in split_sections(text)],
+        "page_count": len(pages),
+    }
@@ -0,0 +1,34 @@
+import os
+import json
+import hashlib
+from dotenv import load_dotenv
+from Functions.cache import TwoTierCache
+from Functions.pdf_pool import extract_in_pool
+
+load_dotenv()
+
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", "extraction_cache")
+EXTRACTION_CACHE_MEMORY_ITEMS = int(os.getenv("EXTRACTION_CACHE_MEMORY_ITEMS", "512"))
+EXTRACTION_CACHE_DISK_ITEMS = int(os.getenv("EXTRACTION_CACHE_DISK_ITEMS", "20000"))
+
+extraction_cache = TwoTierCache(
+    EXTRACTION_CACHE_DIR,
+    max_memory_items=EXTRACTION_CACHE_MEMORY_ITEMS,
+    max_disk_items=EXTRACTION_CACHE_DISK_ITEMS,
+    dumps=lambda result: json.dumps(result).encode("utf-8"),
+    loads=lambda data: json.loads(data.decode("utf-8")),
+    suffix=".json",
+)
+
+
+async def extract_resume(pdf_bytes: bytes) -> dict:
+    """
+    Structured extraction of a PDF, cached by the SHA-256 of its bytes, so a
+    re-uploaded resume is served from memory or disk without re-parsing.
+    """
+    key = hashlib.sha256(pdf_bytes).hexdigest()
+    result = await extraction_cache.aget(key)
+    if result is None:
+        result = await extract_in_pool(pdf_bytes)
+        await extraction_cache.aset(key, result)
+    return result
@@ -0,0 +1,131 @@
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from Functions.executor import run_blocking
+
+
+class JobQueue:
+    """
+    A small in-process background job queue. Jobs run on a fixed number of
+    asyncio workers; synchronous job functions are pushed onto the shared
+    blocking pool so they never run on the event loop. Finished jobs are kept
+    for ``result_ttl`` seconds (and at most ``max_jobs`` entries) so clients can
+    fetch results later. Jobs live in this process only: with several
+    workers, a job can only be polled on the worker that accepted it.
+
+    Parameters:
+        name (str): Used in log lines
+        workers (int): Jobs allowed to run at the same time
+        max_retries (int): Extra attempts for failures accepted by ``retry_on``
+        retry_backoff (float): Seconds before the first retry, doubled each time
+        retry_on: Predicate deciding whether an exception is transient
+        result_ttl (float): Seconds a finished job is retained
+        max_jobs (int): Upper bound on retained jobs
+    """
+
+    def __init__(self, name, workers=2, max_retries=2, retry_backoff=5.0, retry_on=None,
+                 result_ttl=3600.0, max_jobs=1000):
+        self.name = name
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_on = retry_on or (lambda exc: False)
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self._queue = None
+        self._worker_tasks = []
+        self._done_events = {}
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._worker_tasks = [task for task in self._worker_tasks if not task.done()]
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.create_task(self._worker()))
+
+    def _prune(self):
+        now = time.time()
+        for job_id in list(self.jobs):
+            job = self.jobs[job_id]
+            finished = job["status"] in ("completed", "failed")
+            if finished and (now - job["finished_at"] > self.result_ttl or len(self.jobs) > self.max_jobs):
+                del self.jobs[job_id]
+                self._done_events.pop(job_id, None)
+
+    def submit(self, func, *args, **kwargs) -> dict:
+        """Queue ``func(*args, **kwargs)``; returns the job record immediately."""
+        self._prune()
+        self._ensure_workers()
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self.jobs[job_id] = job
+        self._done_events[job_id] = asyncio.Event()
+        self._queue.put_nowait((job_id, func, args, kwargs))
+        return job
+
+    def get(self, job_id: str):
+        return self.jobs.get(job_id)
+
+    def counts(self) -> dict:
+        """Number of known jobs per status."""
+        counts = dict.fromkeys(("queued", "running", "retrying", "completed", "failed"), 0)
+        for job in list(self.jobs.values()):
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return counts
+
+    async def wait(self, job_id: str, timeout=None):
+        """
+        Wait until the job finishes (or ``timeout`` elapses) and return its record.
+        Raises asyncio.TimeoutError if it is still running after ``timeout``.
+        """
+        event = self._done_events.get(job_id)
+        if event is not None and not event.is_set():
+            await asyncio.wait_for(event.wait(), timeout)
+        return self.jobs.get(job_id)
+
+    async def _run(self, func, args, kwargs):
+        if asyncio.iscoroutinefunction(func):
+            return await func(*args, **kwargs)
+        return await run_blocking(func, *args, **kwargs)
+
+    async def _worker(self):
+        while True:
+            job_id, func, args, kwargs = await self._queue.get()
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            while True:
+                job["attempts"] += 1
+                try:
+                    job["result"] = await self._run(func, args, kwargs)
+                    job["status"] = "completed"
+                    job["error"] = None
+                    break
+                except Exception as e:
+                    job["error"] = str(e)
+                    if job["attempts"] > self.max_retries or not self.retry_on(e):
+                        job["status"] = "failed"
+                        print(f"[{self.name}] Job {job_id} failed after {job['attempts']} attempt(s): {str(e)}")
+                        break
+                    delay = self.retry_backoff * (2 ** (job["attempts"] - 1))
+                    job["status"] = "retrying"
+                    print(f"[{self.name}] Job {job_id} hit a transient error, retrying in {delay:g}s: {str(e)}")
+                    await asyncio.sleep(delay)
+                    job["status"] = "running"
+            job["finished_at"] = time.time()
+            event = self._done_events.get(job_id)
+            if event is not None:
+                event.set()
@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from collections import deque
+from dotenv import load_dotenv
+from Functions.metrics import registry
+
+load_dotenv()
+
+LOOP_WATCHDOG_ENABLED = os.getenv("LOOP_WATCHDOG_ENABLED", "true").lower() == "true"
+# A callback holding the loop longer than this is recorded as a stall
+LOOP_STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "100"))
+LOOP_WATCHDOG_INTERVAL_MS = float(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", "25"))
+LOOP_STALL_HISTORY = int(os.getenv("LOOP_STALL_HISTORY", "100"))
+# Frames kept per captured stack (innermost last)
+LOOP_STALL_STACK_DEPTH = 40
+
+loop_lag_seconds = registry.histogram(
+    "interview_event_loop_lag_seconds",
+    "How late the event loop ran a timer (time other callbacks held the loop).",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+loop_stalls = registry.counter(
+    "interview_event_loop_stalls_total",
+    "Event-loop stalls longer than LOOP_STALL_THRESHOLD_MS.",
+)
+
+
+def format_stack(frame, depth: int = LOOP_STALL_STACK_DEPTH) -> list:
+    """``file:line in function`` entries, outermost first, for the innermost ``depth`` frames."""
+    return [f"{entry.filename}:{entry.lineno} in {entry.name}" + (f"\n    {entry.line}" if entry.line else "")
+            for entry in traceback.extract_stack(frame)[-depth:]]
+
+
+class LoopWatchdog:
+    """
+    Detects callbacks that block the event loop.
+
+    A heartbeat task on the loop wakes every LOOP_WATCHDOG_INTERVAL_MS and
+    measures how late it ran; that lateness is the loop lag. A daemon thread
+    watches the heartbeat. Once it is LOOP_STALL_THRESHOLD_MS overdue, the
+    thread captures the loop thread's stack, which shows the blocking call
+    itself. The stall is recorded with its full duration when the loop comes
+    back. Code that holds the GIL (rather than blocking in I/O) can stop the
+    watcher from running; such stalls are still recorded, without a stack.
+    """
+
+    def __init__(self, threshold_ms: float = LOOP_STALL_THRESHOLD_MS, interval_ms: float = LOOP_WATCHDOG_INTERVAL_MS,
+                 history: int = LOOP_STALL_HISTORY):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.stalls = deque(maxlen=history)
+        self.loop_thread_id = None
+        self._beat = None
+        self._captured = None
+        self._lock = threading.Lock()
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start watching the running loop (call from inside it)."""
+        if self.running:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._beat - self.interval)
+            loop_lag_seconds.observe(lag)
+            if lag >= self.threshold:
+                self._record(lag)
+            else:
+                with self._lock:
+                    self._captured = None
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue < self.threshold:
+                continue
+            with self._lock:
+                if self._captured is not None and self._captured["beat"] == beat:
+                    continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = format_stack(frame) if frame is not None else None
+            with self._lock:
+                self._captured = {"beat": beat, "stack": stack, "detected_after_ms": round(overdue * 1000, 1)}
+
+    def _record(self, lag: float):
+        with self._lock:
+            captured, self._captured = self._captured, None
+        if captured is not None and captured["beat"] != self._beat:
+            captured = None
+        stall = {
+            "at": time.time() - lag,
+            "duration_ms": round(lag * 1000, 1),
+            "stack": captured["stack"] if captured else None,
+            "detected_after_ms": captured["detected_after_ms"] if captured else None,
+        }
+        self.stalls.append(stall)
+        loop_stalls.inc()
+        where = stall["stack"][-1].split("\n")[0] if stall["stack"] else "stack not captured"
+        print(f"Warning: Event loop blocked for {stall['duration_ms']:g}ms at {where}")
+
+    def recent(self, limit: int = 20) -> list:
+        return list(self.stalls)[-limit:][::-1]
+
+
+loop_watchdog = LoopWatchdog()
@@ -0,0 +1,196 @@
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from Functions.extract_text_from_pdf import extract_structured_from_bytes, PDFTooLargeError
+from Functions.metrics import track
+from Functions.executor import run_blocking
+
+load_dotenv()
+
+# PyMuPDF parsing is CPU-bound, so it runs in worker processes (one per core by
+# default) where it neither holds the GIL nor competes with interview traffic.
+PDF_POOL_WORKERS = int(os.getenv("PDF_POOL_WORKERS", str(os.cpu_count() or 1)))
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "50"))
+MAX_PDF_BYTES = int(os.getenv("MAX_PDF_BYTES", str(10 * 1024 * 1024)))
+PDF_EXTRACT_TIMEOUT_SECONDS = float(os.getenv("PDF_EXTRACT_TIMEOUT_SECONDS", "20"))
+
+
+class PDFExtractionTimeout(Exception):
+    """Parsing did not finish within PDF_EXTRACT_TIMEOUT_SECONDS."""
+
+
+class PDFWorkerLost(Exception):
+    """The worker process died while parsing (e.g. PyMuPDF crashed on the document)."""
+
+
+def _serve(conn):
+    """Worker process loop: run each (func, args) received and send back (ok, result or error)."""
+    conn.send((True, None))
+    while True:
+        try:
+            func, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = (True, func(*args))
+        except PDFTooLargeError as e:
+            reply = (False, e)
+        except Exception as e:
+            # Library exceptions do not always pickle; the message is what callers report
+            reply = (False, RuntimeError(str(e)))
+        conn.send(reply)
+
+
+class _PDFWorker:
+    """One worker process, fed one document at a time over a pipe."""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.stopped = False
+
+    def wait_ready(self):
+        self.conn.recv()
+
+    def run(self, func, args, timeout):
+        """
+        Run ``func(*args)`` in the worker (blocking). The time limit starts once
+        the work has been handed over, so time spent waiting for a free worker
+        never counts. A worker that runs over it is killed.
+        """
+        try:
+            self.conn.send((func, args))
+            if not self.conn.poll(timeout):
+                self.stop()
+                raise PDFExtractionTimeout(f"PDF extraction took longer than {timeout:g}s.")
+            ok, value = self.conn.recv()
+        except (EOFError, OSError):
+            self.stop()
+            raise PDFWorkerLost("The PDF worker exited while parsing this document.")
+        if not ok:
+            raise value
+        return value
+
+    def stop(self):
+        self.stopped = True
+        try:
+            self.process.kill()
+        except Exception:
+            pass
+        self.process.join()
+
+
+_context = None
+# Idle workers; a request waits here for a free one
+_idle = None
+# Every running worker, idle or busy
+_workers = set()
+_pool_lock = None
+_replace_tasks = set()
+# One thread per worker waits on its pipe, so parsing never holds a thread of the shared blocking pool
+_waiters = ThreadPoolExecutor(max_workers=PDF_POOL_WORKERS, thread_name_prefix="pdf-pool")
+
+
+def _start_workers(count: int) -> list:
+    """
+    Start ``count`` workers and wait until each is up (blocking). Starting the
+    forkserver and its workers waits on pipes, so this always runs off the event loop.
+    """
+    global _context
+    if _context is None:
+        # Workers fork from a clean forkserver that preloads the extractor and PyMuPDF, so they
+        # never inherit the app's threads, sockets or gRPC channels the way a
+        # plain fork of this process would.
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["fitz", "Functions.extract_text_from_pdf", "Functions.pdf_pool"])
+        _context = context
+    workers = [_PDFWorker(_context) for _ in range(count)]
+    for worker in workers:
+        worker.wait_ready()
+    return workers
+
+
+async def ensure_pool():
+    """Start the workers on the shared thread pool if they are not running yet."""
+    global _idle, _pool_lock
+    if _idle is not None:
+        return
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        if _idle is None:
+            workers = await run_blocking(_start_workers, PDF_POOL_WORKERS)
+            idle = asyncio.Queue()
+            for worker in workers:
+                _workers.add(worker)
+                idle.put_nowait(worker)
+            _idle = idle
+
+
+async def _replace_worker():
+    idle = _idle
+    try:
+        [worker] = await run_blocking(_start_workers, 1)
+    except Exception as e:
+        print(f"Warning: Could not start a replacement PDF worker: {str(e)}")
+        return
+    if idle is not _idle:
+        # The pool was shut down meanwhile
+        await run_blocking(worker.stop)
+        return
+    _workers.add(worker)
+    idle.put_nowait(worker)
+
+
+def _release(worker: _PDFWorker, work: asyncio.Future):
+    if not work.cancelled():
+        work.exception()  # retrieved here in case the caller was cancelled
+    if worker not in _workers:
+        return
+    if not worker.stopped:
+        _idle.put_nowait(worker)
+        return
+    # Only the worker that hung (or crashed) is replaced; the others keep parsing
+    _workers.discard(worker)
+    task = asyncio.get_running_loop().create_task(_replace_worker())
+    _replace_tasks.add(task)
+    task.add_done_callback(_replace_tasks.discard)
+
+
+async def _run_in_worker(func, *args):
+    await ensure_pool()
+    worker = await _idle.get()
+    work = asyncio.get_running_loop().run_in_executor(_waiters, worker.run, func, args, PDF_EXTRACT_TIMEOUT_SECONDS)
+    work.add_done_callback(lambda work: _release(worker, work))
+    # Shielded: a cancelled caller must not hand the worker back while it is still parsing
+    return await asyncio.shield(work)
+
+
+def check_pdf_size(size: int):
+    if size > MAX_PDF_BYTES:
+        raise PDFTooLargeError(f"PDF is {size} bytes; the limit is {MAX_PDF_BYTES}.")
+
+
+async def extract_in_pool(pdf_bytes: bytes) -> dict:
+    """
+    Run ``extract_structured_from_bytes`` on a free worker with MAX_PDF_BYTES,
+    MAX_PDF_PAGES and PDF_EXTRACT_TIMEOUT_SECONDS enforced. The timeout covers
+    parsing only, not the wait for a worker, and a document that runs over it
+    has its worker killed (and replaced) so it cannot keep a core pinned.
+    """
+    check_pdf_size(len(pdf_bytes))
+    with track("pdf_extract"):
+        return await _run_in_worker(extract_structured_from_bytes, pdf_bytes, MAX_PDF_PAGES)
+
+
+def shutdown_pool():
+    global _idle
+    workers = list(_workers)
+    _workers.clear()
+    _idle = None
+    for worker in workers:
+        worker.stop()
@@ -0,0 +1,107 @@
+import os
+import asyncio
+from typing import List
+from dotenv import load_dotenv
+from Functions.token_count import estimate_tokens
+from Functions.response_to_question import build_response_prompt, build_end_prompt, summarize_async
+from Model.turn_log import Turn, render_history
+
+load_dotenv()
+
+# Upper bound for the whole interviewer prompt (template + resume + history + answer).
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+# Most recent turns always sent verbatim (as long as the budget allows at least one).
+RECENT_TURNS_VERBATIM = int(os.getenv("RECENT_TURNS_VERBATIM", "4"))
+# Older turns are folded into the running summary in batches of this size.
+SUMMARY_BATCH_TURNS = int(os.getenv("SUMMARY_BATCH_TURNS", "2"))
+
+
+class PromptContext:
+    """
+    Builds the conversation part of each interviewer prompt under a token budget.
+
+    The last RECENT_TURNS_VERBATIM turns go in verbatim; everything older is
+    represented by a running summary that is refreshed incrementally in a
+    background task, so summarization never sits on the turn's critical path.
+    The summary is kept in the session store ("summaries" namespace) so any
+    worker can pick the interview up.
+    """
+
+    NAMESPACE = "summaries"
+
+    def __init__(self, store, file_name: str, saved: dict = None):
+        self.store = store
+        self.file_name = file_name
+        saved = saved or {}
+        self.summary = saved.get("summary", "")
+        # Number of leading turns already folded into the summary.
+        self.summarized_turns = saved.get("turns", 0)
+        self._refresh_task = None
+
+    @classmethod
+    async def load(cls, store, file_name: str) -> "PromptContext":
+        """The interview's context with its saved summary, read from the store off the event loop."""
+        return cls(store, file_name, await store.aget(cls.NAMESPACE, file_name))
+
+    async def reset(self):
+        await self.store.adelete(self.NAMESPACE, self.file_name)
+        self.summary = ""
+        self.summarized_turns = 0
+
+    def _history(self, turns: List[Turn], verbatim: int, summary: str) -> str:
+        recent = turns[len(turns) - verbatim:] if verbatim else []
+        if summary:
+            return f"Summary of earlier conversation: {summary}\n{render_history(recent)}"
+        return render_history(recent)
+
+    def build(self, pdf_content: str, query: str, turns: List[Turn], final: bool = False, stage=None):
+        """
+        Returns (history, prompt_tokens): the history string to pass to the
+        prompt builders and the estimated size of the resulting prompt.
+        """
+        build_prompt = build_end_prompt if final else build_response_prompt
+        # Every turn not yet folded into the summary goes in verbatim (normally
+        # just the recent window, a little more while a refresh is pending);
+        # only the budget can push it lower.
+        verbatim = min(len(turns), max(RECENT_TURNS_VERBATIM, len(turns) - self.summarized_turns))
+        summary = self.summary
+
+        def prompt_for(history):
+            if final:
+                return build_prompt(pdf_content, query, history)
+            return build_prompt(pdf_content, query, history, stage)
+
+        while True:
+            history = self._history(turns, verbatim, summary)
+            prompt_tokens = estimate_tokens(prompt_for(history))
+            if prompt_tokens <= PROMPT_TOKEN_BUDGET or (verbatim <= 1 and not summary):
+                return history, prompt_tokens
+            if verbatim > 1:
+                verbatim -= 1
+            else:
+                # Last resort: trim the summary itself, keeping its most recent part.
+                overflow_chars = (prompt_tokens - PROMPT_TOKEN_BUDGET) * 4
+                summary = summary[overflow_chars:] if overflow_chars < len(summary) else ""
+
+    def schedule_refresh(self, turns: List[Turn]):
+        """
+        Fold turns that have aged out of the verbatim window into the summary,
+        in the background. At most one refresh runs at a time per interview.
+        """
+        target = len(turns) - RECENT_TURNS_VERBATIM
+        if target - self.summarized_turns < SUMMARY_BATCH_TURNS:
+            return
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self._refresh(list(turns[self.summarized_turns:target]), target))
+
+    async def _refresh(self, new_turns: List[Turn], target: int):
+        try:
+            summary = await summarize_async(self.summary, render_history(new_turns))
+        except Exception as e:
+            # Keep the previous summary; the turns stay verbatim until the next attempt.
+            print(f"Warning: Could not refresh interview summary for {self.file_name}: {str(e)}")
+            return
+        self.summary = summary
+        self.summarized_turns = target
+        await self.store.aset(self.NAMESPACE, self.file_name, {"summary": summary, "turns": target})
@@ -0,0 +1,162 @@
+import sys
+import fnmatch
+import argparse
+import threading
+import socketserver
+from collections import deque
+
+
+class RESPStandIn(socketserver.ThreadingTCPServer):
+    """
+    In-memory stand-in for a Redis server speaking RESP2, covering the commands
+    RedisSessionStore uses (AUTH, SELECT, PING, GET, SET, DEL, EXISTS, RPUSH,
+    LRANGE, SCAN). It lets the session store run across several workers
+    without installing Redis, and lets its client be checked against a real
+    socket, including a lost reply (``drop_replies``).
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, password=None):
+        super().__init__((host, port), _Handler)
+        self.password = password
+        self.data = {}
+        self.data_lock = threading.Lock()
+        # Commands to run without replying, then drop the connection (a reply lost to a timeout)
+        self.drop_replies = 0
+        # Most recent command names, for inspecting a check run; bounded for long-running use
+        self.commands = deque(maxlen=1000)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}{host}:{port}/0"
+
+    def start(self):
+        """Serve from a daemon thread; returns self."""
+        threading.Thread(target=self.serve_forever, name="resp-stand-in", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def run(self, args: list):
+        command = args[0].decode("utf-8").upper()
+        self.commands.append(command)
+        with self.data_lock:
+            if command == "PING":
+                return "+PONG"
+            if command == "SELECT":
+                return "+OK"
+            if command == "GET":
+                value = self.data.get(args[1])
+                if isinstance(value, list):
+                    return _WrongType()
+                return value
+            if command == "SET":
+                self.data[args[1]] = args[2]
+                return "+OK"
+            if command == "DEL":
+                return sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+            if command == "EXISTS":
+                return sum(1 for key in args[1:] if key in self.data)
+            if command == "RPUSH":
+                items = self.data.setdefault(args[1], [])
+                if not isinstance(items, list):
+                    return _WrongType()
+                items.extend(args[2:])
+                return len(items)
+            if command == "LRANGE":
+                items = self.data.get(args[1], [])
+                start, stop = int(args[2]), int(args[3])
+                return items[start:None if stop == -1 else stop + 1]
+            if command == "SCAN":
+                # The whole keyspace in one batch; cursor "0" ends the scan
+                options = [a.decode("utf-8").upper() for a in args[2::2]]
+                pattern = args[2 + 2 * options.index("MATCH") + 1].decode("utf-8") if "MATCH" in options else "*"
+                return [b"0", [key for key in self.data if fnmatch.fnmatchcase(key.decode("utf-8"), pattern)]]
+        return _Error(f"ERR unknown command '{command}'")
+
+
+class _Error(str):
+    pass
+
+
+class _WrongType(_Error):
+    def __new__(cls):
+        return super().__new__(cls, "WRONGTYPE Operation against a key holding the wrong kind of value")
+
+
+def _encode(value) -> bytes:
+    if isinstance(value, _Error):
+        return b"-%s\r\n" % value.encode("utf-8")
+    if isinstance(value, str) and value.startswith("+"):
+        return value.encode("utf-8") + b"\r\n"
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"*%d\r\n" % len(value) + b"".join(_encode(item) for item in value)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        server = self.server
+        authenticated = server.password is None
+        while True:
+            args = self._read_command()
+            if not args:
+                return
+            if args[0].upper() == b"AUTH":
+                authenticated = args[-1].decode("utf-8") == server.password
+                reply = "+OK" if authenticated else _Error("WRONGPASS invalid password")
+            elif not authenticated:
+                reply = _Error("NOAUTH Authentication required.")
+            else:
+                reply = server.run(args)
+                if server.drop_replies > 0:
+                    server.drop_replies -= 1
+                    return
+            self.wfile.write(_encode(reply))
+            self.wfile.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m Functions.resp_server",
+        description="Run an in-memory Redis stand-in for SESSION_STORE=redis (development only; nothing is persisted).",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--password")
+    args = parser.parse_args(argv)
+    server = RESPStandIn(args.host, args.port, args.password)
+    print(f"RESP stand-in listening; set REDIS_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,18 @@
-import google.generativeai as genai
 import os
+import asyncio
+import re
+import time
 from dotenv import load_dotenv
+from Providers.registry import get_llm
+from Functions.metrics import track, observe_stage
 
 load_dotenv()
-api_key = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=api_key)
-model = genai.GenerativeModel('gemini-2.0-flash')
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
 
-def response(pdf_content, query, history):
-    prompt = f"""
+def build_response_prompt(pdf_content, query, history, stage=None):
+    if stage is None:
+        stage = len(history.split()) // 100
+    return f"""
 You are Alex, a technical interviewer with 15+ years of experience. Keep responses under 30 words.
 
 Instructions:
@@ -20,27 +24,17 @@ Instructions:
 - Show authentic interview behavior (brief pauses, clarification requests)
 - Don't label question types or explain your approach
 
-Current interview stage: {len(history.split()) // 100}% complete
+Current interview stage: {stage}% complete
 Prior conversation: {history}
 
 Candidate's latest response: {query}
 
 Your next question or brief response (max 20 words):
-see history and try to cover entire resume.
+see history and try to cover entire resume, preferring areas listed as "Not yet covered".
 """
 
-    try:
-        response = model.generate_content(prompt, generation_config=genai.GenerationConfig(
-            temperature=0.7,
-            top_p=0.95,
-            top_k=40,
-        ))
-        return response.text
-    except Exception as e:
-        return f"An error occurred: {e}"
-    
-def end_response(pdf_content, query, history):
-    prompt = f"""
+def build_end_prompt(pdf_content, query, history):
+    return f"""
 You are a professional interviewer concluding an interview. End the conversation in no more than 20 words, stating that we will contact you for the next round and thanking you.
 
 Resume Content:
@@ -54,8 +48,138 @@ Candidate's Latest Response:
 
 Interviewer (you):
 """
+
+def build_summary_prompt(previous_summary, transcript):
+    return f"""
+Summarize this technical interview so far for the interviewer's notes, in at most 120 words.
+Keep: topics and resume areas already covered, questions already asked, notable strengths or gaps in the answers.
+Drop pleasantries. Write plain text, no lists.
+
+Summary so far:
+{previous_summary or "(none)"}
+
+New conversation to fold in:
+{transcript}
+
+Updated summary:
+"""
+
+response_generation_config = {
+    "temperature": 0.7,
+    "top_p": 0.95,
+    "top_k": 40,
+}
+end_generation_config = {"temperature": 0.7}
+summary_generation_config = {"temperature": 0.2, "max_tokens": 256}
+
+def response(pdf_content, query, history):
+    prompt = build_response_prompt(pdf_content, query, history)
+    try:
+        with track("llm_generate"):
+            return get_llm("interviewer").complete(prompt, **response_generation_config)
+    except Exception as e:
+        return f"An error occurred: {e}"
+    
+def end_response(pdf_content, query, history):
+    prompt = build_end_prompt(pdf_content, query, history)
     try:
-        response = model.generate_content(prompt, generation_config=genai.GenerationConfig(temperature=0.7))
-        return response.text
+        with track("llm_generate"):
+            return get_llm("interviewer").complete(prompt, **end_generation_config)
     except Exception as e:
         return f"An error occurred: {e}"
+
+async def _generate_async(prompt, generation_config, stage="llm_generate"):
+    # The SDK timeout bounds the HTTP call; wait_for also covers retries and
+    # connection setup so a hung request can never hold a turn forever.
+    with track(stage):
+        return await asyncio.wait_for(
+            get_llm("interviewer").generate(prompt, timeout=LLM_TIMEOUT_SECONDS, **generation_config),
+            LLM_TIMEOUT_SECONDS
+        )
+
+async def response_async(pdf_content, query, history, stage=None):
+    """Non-blocking variant of ``response`` for use inside the event loop."""
+    try:
+        return await _generate_async(build_response_prompt(pdf_content, query, history, stage), response_generation_config)
+    except asyncio.TimeoutError:
+        return f"An error occurred: Gemini did not respond within {LLM_TIMEOUT_SECONDS:g}s"
+    except Exception as e:
+        return f"An error occurred: {e}"
+
+async def end_response_async(pdf_content, query, history):
+    """Non-blocking variant of ``end_response`` for use inside the event loop."""
+    try:
+        return await _generate_async(build_end_prompt(pdf_content, query, history), end_generation_config)
+    except asyncio.TimeoutError:
+        return f"An error occurred: Gemini did not respond within {LLM_TIMEOUT_SECONDS:g}s"
+    except Exception as e:
+        return f"An error occurred: {e}"
+
+async def summarize_async(previous_summary, transcript):
+    """Fold ``transcript`` into ``previous_summary``. Errors propagate so the caller keeps the old summary."""
+    return (await _generate_async(build_summary_prompt(previous_summary, transcript), summary_generation_config, "llm_summary")).strip()
+
+async def _stream_generate_async(prompt, generation_config):
+    chunks = get_llm("interviewer").stream(prompt, timeout=LLM_TIMEOUT_SECONDS, **generation_config).__aiter__()
+    started = time.perf_counter()
+    first = True
+    try:
+        # llm_stream covers the whole reply, including time the caller spends between chunks
+        with track("llm_stream"):
+            while True:
+                # Bound the gap between chunks rather than the whole reply, so a
+                # long answer is fine but a stalled stream is not.
+                try:
+                    text = await asyncio.wait_for(chunks.__anext__(), LLM_TIMEOUT_SECONDS)
+                except StopAsyncIteration:
+                    break
+                if first:
+                    observe_stage("llm_first_chunk", time.perf_counter() - started)
+                    first = False
+                if text:
+                    yield text
+    finally:
+        await chunks.aclose()
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+MIN_SENTENCE_CHARS = 12
+
+async def stream_sentences(pdf_content, query, history, final=False, stage=None):
+    """
+    Stream the interviewer's reply from Gemini, yielding it one sentence at a
+    time as soon as each sentence is complete.
+
+    Parameters:
+        final (bool): Use the closing prompt instead of the question prompt
+
+    Yields:
+        str: Complete sentences. Errors are yielded as text, matching ``response``.
+    """
+    if final:
+        prompt, config = build_end_prompt(pdf_content, query, history), end_generation_config
+    else:
+        prompt, config = build_response_prompt(pdf_content, query, history, stage), response_generation_config
+
+    buffer = ""
+    try:
+        async for text in _stream_generate_async(prompt, config):
+            buffer += text
+            parts = _SENTENCE_END.split(buffer)
+            # The last part may still be mid-sentence; keep it buffered.
+            buffer = parts.pop()
+            pending = ""
+            for part in parts:
+                pending = f"{pending} {part}" if pending else part
+                # Avoid synthesizing tiny fragments such as "Great." on their own.
+                if len(pending) >= MIN_SENTENCE_CHARS:
+                    yield pending
+                    pending = ""
+            if pending:
+                buffer = f"{pending} {buffer}" if buffer else pending
+    except asyncio.TimeoutError:
+        buffer += f" An error occurred: Gemini did not respond within {LLM_TIMEOUT_SECONDS:g}s"
+    except Exception as e:
+        buffer += f" An error occurred: {e}"
+
+    if buffer.strip():
+        yield buffer.strip()
@@ -0,0 +1,132 @@
+import os
+import re
+import math
+from collections import Counter
+from dotenv import load_dotenv
+from Functions.token_count import estimate_tokens
+from Functions.extract_text_from_pdf import split_sections
+
+load_dotenv()
+
+RESUME_CHUNK_WORDS = int(os.getenv("RESUME_CHUNK_WORDS", "80"))
+RESUME_CONTEXT_TOKENS = int(os.getenv("RESUME_CONTEXT_TOKENS", "600"))
+RESUME_RELEVANT_CHUNKS = int(os.getenv("RESUME_RELEVANT_CHUNKS", "3"))
+RESUME_UNCOVERED_CHUNKS = int(os.getenv("RESUME_UNCOVERED_CHUNKS", "2"))
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "i", "in", "is", "it",
+    "its", "my", "of", "on", "or", "that", "the", "this", "to", "was", "we", "were", "with", "you", "your",
+    "me", "our", "so", "did", "do", "what", "how", "which", "can", "about", "tell", "yes", "no", "also",
+}
+
+_TERM = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def tokenize(text: str) -> list:
+    terms = []
+    for term in _TERM.findall(text.lower()):
+        term = term.rstrip(".")
+        if term and term not in STOPWORDS:
+            terms.append(term)
+    return terms
+
+
+def build_resume_index(text: str, sections=None) -> dict:
+    """
+    Chunk the resume by section (about RESUME_CHUNK_WORDS words per chunk) and
+    build a BM25 index over the chunks. The result is plain JSON so it can live
+    in the session store next to the extracted text.
+
+    Parameters:
+        text (str): Full resume text
+        sections (list): Optional pre-detected [(title, body)] pairs, e.g. from
+            ``extract_structured_from_bytes``
+    """
+    chunks = []
+    for title, body in (sections if sections is not None else split_sections(text)):
+        words = body.split()
+        for start in range(0, len(words), RESUME_CHUNK_WORDS):
+            chunk_text = " ".join(words[start:start + RESUME_CHUNK_WORDS])
+            chunks.append({"section": title, "text": chunk_text})
+
+    term_freqs = []
+    document_freq = Counter()
+    for chunk in chunks:
+        counts = Counter(tokenize(f"{chunk['section']} {chunk['text']}"))
+        term_freqs.append(dict(counts))
+        document_freq.update(counts.keys())
+    lengths = [sum(tf.values()) for tf in term_freqs]
+    return {
+        "chunks": chunks,
+        "term_freqs": term_freqs,
+        "lengths": lengths,
+        "avg_length": (sum(lengths) / len(lengths)) if lengths else 0.0,
+        "document_freq": dict(document_freq),
+    }
+
+
+class ResumeIndex:
+    """BM25 search plus per-chunk coverage counts over a ``build_resume_index`` result."""
+
+    def __init__(self, index: dict, coverage=None):
+        self.index = index
+        self.chunks = index["chunks"]
+        self.coverage = list(coverage) if coverage else [0] * len(self.chunks)
+        total = len(self.chunks)
+        self._idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in index["document_freq"].items()
+        }
+
+    def scores(self, query: str) -> list:
+        terms = set(tokenize(query))
+        avg_length = self.index["avg_length"] or 1.0
+        results = []
+        for tf, length in zip(self.index["term_freqs"], self.index["lengths"]):
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    score += self._idf.get(term, 0.0) * freq * (BM25_K1 + 1) / (freq + norm)
+            results.append(score)
+        return results
+
+    def record_coverage(self, text: str):
+        """Credit the chunk the interviewer's question was about, if any."""
+        scores = self.scores(text)
+        if scores and max(scores) > 0:
+            self.coverage[scores.index(max(scores))] += 1
+
+    def select_context(self, query: str, max_tokens: int = RESUME_CONTEXT_TOKENS) -> str:
+        """
+        Resume excerpts for one turn: the chunks most relevant to the candidate's
+        latest answer, then the least-covered chunks to steer towards, within
+        ``max_tokens``. Falls back to the first chunks when nothing matches.
+        """
+        if not self.chunks:
+            return ""
+        scores = self.scores(query)
+        relevant = [i for i in sorted(range(len(scores)), key=lambda i: -scores[i]) if scores[i] > 0]
+        relevant = relevant[:RESUME_RELEVANT_CHUNKS]
+        uncovered = sorted((i for i in range(len(self.chunks)) if i not in relevant),
+                           key=lambda i: (self.coverage[i], i))[:RESUME_UNCOVERED_CHUNKS]
+
+        lines, used = [], 0
+        for heading, picks in (("Related to the latest answer", relevant), ("Not yet covered", uncovered)):
+            picked = []
+            for i in picks:
+                line = f"- [{self.chunks[i]['section']}] {self.chunks[i]['text']}"
+                cost = estimate_tokens(line)
+                if used + cost > max_tokens and (picked or lines):
+                    continue
+                picked.append(line)
+                used += cost
+            if picked:
+                lines.append(f"{heading}:")
+                lines.extend(picked)
+        return "\n".join(lines)
@@ -0,0 +1,58 @@
+import uuid
+from Functions.create_analysis_to_chats import SCORECARD_CRITERIA, compile_rubric_prompt
+from Model.score_card import ScoreCard
+
+DEFAULT_RUBRIC_ID = "default"
+
+
+class RubricStore:
+    """
+    Company scoring rubrics (``ScoreCard``) kept in the session store
+    ("rubrics" namespace) so every worker scores with the same definitions.
+    The built-in default rubric is always available and read-only.
+    """
+
+    NAMESPACE = "rubrics"
+
+    def __init__(self, store):
+        self.store = store
+
+    @staticmethod
+    def default() -> dict:
+        return {
+            "id": DEFAULT_RUBRIC_ID,
+            "name": "Default interview rubric",
+            "created_company": "default",
+            "criterias": SCORECARD_CRITERIA,
+        }
+
+    def list(self, company: str = None) -> list:
+        rubrics = [self.default()] + [self.store.get(self.NAMESPACE, key) for key in self.store.keys(self.NAMESPACE)]
+        return [r for r in rubrics if r and (company is None or r["created_company"] == company)]
+
+    def get(self, rubric_id: str):
+        if rubric_id in (None, DEFAULT_RUBRIC_ID):
+            return self.default()
+        return self.store.get(self.NAMESPACE, rubric_id)
+
+    def save(self, scorecard: ScoreCard, rubric_id: str = None) -> dict:
+        rubric = {"id": rubric_id or uuid.uuid4().hex, **scorecard.model_dump()}
+        # Compile up front so a rubric's first interview does not pay for it
+        compile_rubric_prompt(rubric["criterias"])
+        self.store.set(self.NAMESPACE, rubric["id"], rubric)
+        return rubric
+
+    def delete(self, rubric_id: str) -> bool:
+        if not self.store.contains(self.NAMESPACE, rubric_id):
+            return False
+        self.store.delete(self.NAMESPACE, rubric_id)
+        return True
+
+    def criteria(self, rubric_id: str):
+        """Criteria of a rubric for ``generate_scorecard``; None for the default rubric. Raises KeyError if unknown."""
+        if rubric_id in (None, DEFAULT_RUBRIC_ID):
+            return None
+        rubric = self.get(rubric_id)
+        if rubric is None:
+            raise KeyError(rubric_id)
+        return rubric["criterias"]
@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+import uuid
+import threading
+from collections import Counter, OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+PROFILE_DEFAULT_INTERVAL_MS = float(os.getenv("PROFILE_DEFAULT_INTERVAL_MS", "10"))
+# Finished profiles kept for download
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", "5"))
+
+
+class ProfilerBusy(Exception):
+    """A profile is already running in this process."""
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Wall-clock stack sampler. A background thread reads the stacks of the
+    selected threads every ``interval`` seconds (``sys._current_frames``) and
+    counts identical stacks, so the profiled code runs untouched. Overhead is
+    one stack walk per sampled thread per tick. Waiting shows up too (a blocked
+    loop thread sits in the blocking call), which is what finding stalls needs.
+
+    Results are in the collapsed-stack format (``frame;frame;frame count``)
+    read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self):
+        self.profiles = OrderedDict()
+        self._lock = threading.Lock()
+        self._active = None
+
+    def start(self, seconds: float, interval: float, thread_ids=None) -> dict:
+        """
+        Sample for ``seconds`` (capped at PROFILE_MAX_SECONDS).
+
+        Parameters:
+            seconds (float): Profile duration
+            interval (float): Seconds between samples
+            thread_ids: Threads to sample; every thread except the sampler when None
+
+        Returns:
+            dict: The profile record; raises ProfilerBusy if one is running.
+        """
+        with self._lock:
+            if self._active is not None:
+                raise ProfilerBusy(f"Profile {self._active['profile_id']} is still running")
+            profile = {
+                "profile_id": uuid.uuid4().hex,
+                "status": "running",
+                "started_at": time.time(),
+                "finished_at": None,
+                "seconds": min(seconds, PROFILE_MAX_SECONDS),
+                "interval_ms": interval * 1000,
+                "threads": "all" if thread_ids is None else len(thread_ids),
+                "samples": 0,
+                "_stacks": Counter(),
+                "_stop": threading.Event(),
+            }
+            self._active = profile
+            self.profiles[profile["profile_id"]] = profile
+            while len(self.profiles) > PROFILE_HISTORY:
+                self.profiles.popitem(last=False)
+        threading.Thread(
+            target=self._sample, args=(profile, interval, thread_ids), name="sampling-profiler", daemon=True
+        ).start()
+        return self.describe(profile)
+
+    def stop(self):
+        """Stop the running profile early; returns it, or None if nothing was running."""
+        with self._lock:
+            profile = self._active
+        if profile is None:
+            return None
+        profile["_stop"].set()
+        return self.describe(profile)
+
+    def _sample(self, profile: dict, interval: float, thread_ids):
+        own_id = threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + profile["seconds"]
+        stacks = profile["_stacks"]
+        try:
+            while time.monotonic() < deadline and not profile["_stop"].wait(interval):
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id or (thread_ids is not None and thread_id not in thread_ids):
+                        continue
+                    if thread_id not in names:
+                        names = {t.ident: t.name for t in threading.enumerate()}
+                    labels = []
+                    while frame is not None:
+                        labels.append(_frame_label(frame.f_code))
+                        frame = frame.f_back
+                    labels.append(names.get(thread_id, str(thread_id)))
+                    stacks[";".join(reversed(labels))] += 1
+                profile["samples"] += 1
+            profile["status"] = "completed"
+        except Exception as e:
+            profile["status"] = "failed"
+            profile["error"] = str(e)
+        finally:
+            profile["finished_at"] = time.time()
+            with self._lock:
+                if self._active is profile:
+                    self._active = None
+
+    def get(self, profile_id: str):
+        profile = self.profiles.get(profile_id)
+        return self.describe(profile) if profile else None
+
+    def describe(self, profile: dict, top: int = 15) -> dict:
+        """The public view of a profile: status plus the functions most often on top of the stack."""
+        record = {key: value for key, value in profile.items() if not key.startswith("_")}
+        functions = Counter()
+        for stack, count in list(profile["_stacks"].items()):
+            # Self time: where the thread actually was (an idle loop shows up as select)
+            functions[stack.rsplit(";", 1)[-1]] += count
+        record["top_functions"] = [{"function": label, "samples": count} for label, count in functions.most_common(top)]
+        return record
+
+    def collapsed(self, profile_id: str):
+        """The profile in collapsed-stack text, or None if unknown."""
+        profile = self.profiles.get(profile_id)
+        if profile is None:
+            return None
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(profile["_stacks"].items()))
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,137 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+from dotenv import load_dotenv
+from Functions.cache import TwoTierCache
+from Providers.registry import provider_mode, EVALUATOR_MODEL
+from Functions.create_analysis_to_chats import compile_rubric_prompt, SCORECARD_MAX_TOKENS
+
+load_dotenv()
+
+SCORECARD_CACHE_DIR = os.getenv("SCORECARD_CACHE_DIR", "scorecard_cache")
+SCORECARD_CACHE_MEMORY_ITEMS = int(os.getenv("SCORECARD_CACHE_MEMORY_ITEMS", "256"))
+SCORECARD_CACHE_DISK_ITEMS = int(os.getenv("SCORECARD_CACHE_DISK_ITEMS", "20000"))
+# How long an end_chat response is replayed for the same Idempotency-Key
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+scorecard_cache = TwoTierCache(
+    SCORECARD_CACHE_DIR,
+    max_memory_items=SCORECARD_CACHE_MEMORY_ITEMS,
+    max_disk_items=SCORECARD_CACHE_DISK_ITEMS,
+    dumps=lambda result: json.dumps(result).encode("utf-8"),
+    loads=lambda data: json.loads(data.decode("utf-8")),
+    suffix=".json",
+)
+
+# Evaluations currently running, keyed like the cache, so concurrent duplicates share one call
+_in_flight = {}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text) -> str:
+    return _WHITESPACE.sub(" ", str(text or "")).strip()
+
+
+def scorecard_cache_key(conversation: dict, criteria=None, model: str = EVALUATOR_MODEL) -> str:
+    """
+    Hash of everything that determines a scorecard: the transcript with
+    whitespace normalized (the conversation id is left out), the compiled
+    rubric prompt, the model settings and the LLM provider mode (a fake or
+    replayed scorecard is never served to a live deployment).
+    """
+    transcript = [[_normalize(m.get("user")), _normalize(m.get("response"))] for m in conversation.get("messages", [])]
+    payload = json.dumps({
+        "transcript": transcript,
+        "prompt": compile_rubric_prompt(criteria),
+        "model": model,
+        "max_tokens": SCORECARD_MAX_TOKENS,
+        "provider": provider_mode("llm"),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def _generate_and_cache(key: str, conversation: dict, generate, criteria) -> dict:
+    result = await generate(conversation, criteria)
+    if "error" not in result:
+        await scorecard_cache.aset(key, result)
+    return result
+
+
+async def cached_scorecard(conversation: dict, generate, criteria=None) -> dict:
+    """
+    Return the cached scorecard for this transcript and rubric, or run ``await
+    generate(conversation, criteria)`` once (concurrent duplicates wait for the
+    same call) and cache it. Failed evaluations are never cached.
+    """
+    key = scorecard_cache_key(conversation, criteria)
+    result = await scorecard_cache.aget(key)
+    if result is None:
+        task = _in_flight.get(key)
+        if task is None:
+            # Shielded so a caller that disconnects does not throw the evaluation away.
+            task = _in_flight[key] = asyncio.ensure_future(_generate_and_cache(key, conversation, generate, criteria))
+            task.add_done_callback(lambda _: _in_flight.pop(key, None))
+        result = await asyncio.shield(task)
+    if "conversation_id" in result:
+        # The same transcript may belong to another interview id; report the caller's.
+        result = {**result, "conversation_id": conversation.get("_id", "unknown_id")}
+    return result
+
+
+class IdempotencyConflict(Exception):
+    """The Idempotency-Key was already used with a different request body."""
+
+
+class IdempotentRequests:
+    """
+    Replays stored responses for requests repeated with the same
+    Idempotency-Key. Entries live in the session store ("idempotency"
+    namespace) so a retry that lands on another worker is still recognized.
+    Concurrent duplicates in one process wait for the first request.
+    """
+
+    NAMESPACE = "idempotency"
+
+    def __init__(self, store, ttl: float = IDEMPOTENCY_TTL_SECONDS):
+        self.store = store
+        self.ttl = ttl
+        self._in_flight = {}
+
+    async def run(self, key: str, fingerprint: str, handler, should_store=None):
+        """
+        Parameters:
+            key (str): The client's Idempotency-Key
+            fingerprint (str): Hash of the request body; reusing a key with a different body raises IdempotencyConflict
+            handler: Coroutine function producing the response
+            should_store: Predicate on the response; responses it rejects are not replayed
+        """
+        running = self._in_flight.get(key)
+        if running is None:
+            saved = await self.store.aget(self.NAMESPACE, key)
+            if saved and time.time() - saved["created_at"] <= self.ttl:
+                if saved["fingerprint"] != fingerprint:
+                    raise IdempotencyConflict("Idempotency-Key was already used with a different request.")
+                return saved["response"]
+            # A duplicate may have started while the store was being read
+            running = self._in_flight.get(key)
+        if running is not None:
+            if running[0] != fingerprint:
+                raise IdempotencyConflict("Idempotency-Key is in use by a different request.")
+            return await asyncio.shield(running[1])
+
+        task = asyncio.ensure_future(self._handle(key, fingerprint, handler, should_store))
+        self._in_flight[key] = (fingerprint, task)
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _handle(self, key, fingerprint, handler, should_store):
+        response = await handler()
+        if should_store is None or should_store(response):
+            await self.store.aset(self.NAMESPACE, key, {
+                "fingerprint": fingerprint, "response": response, "created_at": time.time()
+            })
+        return response
@@ -0,0 +1,477 @@
+import os
+import json
+import asyncio
+import socket
+import sqlite3
+import threading
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+from Functions.executor import run_blocking
+
+load_dotenv()
+
+# "memory" (single process), "sqlite" (processes on one host) or "redis" (any number of hosts)
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "sessions.db")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_KEY_PREFIX = os.getenv("REDIS_KEY_PREFIX", "interview:")
+
+
+class SessionStore:
+    """
+    Interface for interview session state shared between worker processes.
+    Values are namespaced (e.g. "extracted_texts") and must be JSON-serializable.
+
+    The methods block (SQLite locks, the Redis socket); coroutines use the
+    ``a``-prefixed variants, which run them on the shared blocking pool.
+    """
+
+    # False for stores that never wait on I/O, whose async variants just call through
+    blocking = True
+
+    def get(self, namespace: str, key: str, default=None):
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value):
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str):
+        raise NotImplementedError
+
+    def contains(self, namespace: str, key: str) -> bool:
+        raise NotImplementedError
+
+    def keys(self, namespace: str) -> list:
+        raise NotImplementedError
+
+    def append(self, namespace: str, key: str, value):
+        """Append one item to the list stored at ``key`` in O(1)."""
+        raise NotImplementedError
+
+    def get_list(self, namespace: str, key: str) -> list:
+        raise NotImplementedError
+
+    async def _call(self, method, *args):
+        if not self.blocking:
+            return method(*args)
+        return await run_blocking(method, *args)
+
+    async def aget(self, namespace: str, key: str, default=None):
+        return await self._call(self.get, namespace, key, default)
+
+    async def aset(self, namespace: str, key: str, value):
+        await self._call(self.set, namespace, key, value)
+
+    async def adelete(self, namespace: str, key: str):
+        await self._call(self.delete, namespace, key)
+
+    async def acontains(self, namespace: str, key: str) -> bool:
+        return await self._call(self.contains, namespace, key)
+
+    async def akeys(self, namespace: str) -> list:
+        return await self._call(self.keys, namespace)
+
+    async def aappend(self, namespace: str, key: str, value):
+        await self._call(self.append, namespace, key, value)
+
+    async def aget_list(self, namespace: str, key: str) -> list:
+        return await self._call(self.get_list, namespace, key)
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store; the default, and only correct with a single worker."""
+
+    blocking = False
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace, key, default=None):
+        return self._data.get(namespace, {}).get(key, default)
+
+    def set(self, namespace, key, value):
+        with self._lock:
+            self._data.setdefault(namespace, {})[key] = value
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._data.get(namespace, {}).pop(key, None)
+
+    def contains(self, namespace, key):
+        return key in self._data.get(namespace, {})
+
+    def keys(self, namespace):
+        return list(self._data.get(namespace, {}))
+
+    def append(self, namespace, key, value):
+        with self._lock:
+            self._data.setdefault(namespace, {}).setdefault(key, []).append(value)
+
+    def get_list(self, namespace, key):
+        return list(self._data.get(namespace, {}).get(key, []))
+
+
+class SQLiteSessionStore(SessionStore):
+    """Shares sessions between worker processes on one host through a WAL-mode SQLite file."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_lists ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS session_lists_key ON session_lists (namespace, key, id)"
+            )
+
+    def get(self, namespace, key, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM sessions WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, namespace, key, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (namespace, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value",
+                (namespace, key, json.dumps(value))
+            )
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE namespace = ? AND key = ?", (namespace, key))
+            self._conn.execute("DELETE FROM session_lists WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def contains(self, namespace, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM sessions WHERE namespace = ? AND key = ? "
+                "UNION ALL SELECT 1 FROM session_lists WHERE namespace = ? AND key = ?",
+                (namespace, key, namespace, key),
+            ).fetchone()
+        return row is not None
+
+    def keys(self, namespace):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM sessions WHERE namespace = ? "
+                "UNION SELECT key FROM session_lists WHERE namespace = ?",
+                (namespace, namespace),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def append(self, namespace, key, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO session_lists (namespace, key, value) VALUES (?, ?, ?)",
+                (namespace, key, json.dumps(value))
+            )
+
+    def get_list(self, namespace, key):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM session_lists WHERE namespace = ? AND key = ? ORDER BY id", (namespace, key)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Shares sessions across hosts through any server speaking the Redis protocol
+    (RESP2). Uses a single persistent connection with a minimal built-in client,
+    so no extra dependency is needed; it reconnects once on a dropped connection.
+    A command that may already have reached the server is only retried when
+    running it twice is harmless (not RPUSH, which would duplicate a turn).
+    """
+
+    IDEMPOTENT_COMMANDS = frozenset({"GET", "SET", "DEL", "EXISTS", "LRANGE", "SCAN", "PING"})
+
+    def __init__(self, url: str, key_prefix: str = REDIS_KEY_PREFIX, timeout: float = 5.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.key_prefix = key_prefix
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            self._roundtrip("AUTH", self.password)
+        if self.db:
+            self._roundtrip("SELECT", str(self.db))
+
+    def _close(self):
+        for closable in (self._reader, self._sock):
+            try:
+                if closable:
+                    closable.close()
+            except OSError:
+                pass
+        self._sock = self._reader = None
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis connection closed")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode("utf-8")
+        if prefix == b"-":
+            raise RedisError(payload.decode("utf-8"))
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            count = int(payload)
+            if count == -1:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def _roundtrip(self, *args):
+        self._sock.sendall(self._encode(*args))
+        return self._read_reply()
+
+    def execute(self, *args):
+        retry_after_send = str(args[0]).upper() in self.IDEMPOTENT_COMMANDS
+        with self._lock:
+            for attempt in (1, 2):
+                sent = False
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(self._encode(*args))
+                    sent = True
+                    return self._read_reply()
+                except (ConnectionError, socket.timeout, OSError):
+                    self._close()
+                    # Once sendall returned the server may have run the command; only the reply was lost
+                    if attempt == 2 or (sent and not retry_after_send):
+                        raise
+
+    def _key(self, namespace, key):
+        return f"{self.key_prefix}{namespace}:{key}"
+
+    def get(self, namespace, key, default=None):
+        value = self.execute("GET", self._key(namespace, key))
+        return json.loads(value) if value is not None else default
+
+    def set(self, namespace, key, value):
+        self.execute("SET", self._key(namespace, key), json.dumps(value))
+
+    def delete(self, namespace, key):
+        self.execute("DEL", self._key(namespace, key))
+
+    def contains(self, namespace, key):
+        return bool(self.execute("EXISTS", self._key(namespace, key)))
+
+    def append(self, namespace, key, value):
+        self.execute("RPUSH", self._key(namespace, key), json.dumps(value))
+
+    def get_list(self, namespace, key):
+        return [json.loads(item) for item in self.execute("LRANGE", self._key(namespace, key), "0", "-1")]
+
+    def keys(self, namespace):
+        prefix = self._key(namespace, "")
+        found, cursor = [], "0"
+        while True:
+            cursor, batch = self.execute("SCAN", cursor, "MATCH", f"{prefix}*", "COUNT", "500")
+            found.extend(k.decode("utf-8")[len(prefix):] for k in batch)
+            cursor = cursor.decode("utf-8") if isinstance(cursor, bytes) else cursor
+            if cursor == "0":
+                return found
+
+
+class SessionMapping:
+    """
+    Dict-style view of one namespace of a SessionStore, so route code can keep
+    using ``extracted_texts[file_name]`` whichever backend is configured.
+    """
+
+    def __init__(self, store: SessionStore, namespace: str):
+        self.store = store
+        self.namespace = namespace
+
+    def __getitem__(self, key):
+        value = self.store.get(self.namespace, key)
+        if value is None and not self.store.contains(self.namespace, key):
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.store.set(self.namespace, key, value)
+
+    def __delitem__(self, key):
+        self.store.delete(self.namespace, key)
+
+    def __contains__(self, key):
+        return self.store.contains(self.namespace, key)
+
+    def get(self, key, default=None):
+        return self.store.get(self.namespace, key, default)
+
+    def keys(self):
+        return self.store.keys(self.namespace)
+
+    async def aget(self, key, default=None):
+        return await self.store.aget(self.namespace, key, default)
+
+    async def aset(self, key, value):
+        await self.store.aset(self.namespace, key, value)
+
+    async def acontains(self, key) -> bool:
+        return await self.store.acontains(self.namespace, key)
+
+    def __repr__(self):
+        # No keys(): that is a full namespace scan on the shared stores
+        return f"SessionMapping({self.namespace!r})"
+
+
+def create_session_store(kind: str = SESSION_STORE) -> SessionStore:
+    if kind == "memory":
+        return InMemorySessionStore()
+    if kind == "sqlite":
+        return SQLiteSessionStore(SESSION_STORE_PATH)
+    if kind == "redis":
+        return RedisSessionStore(REDIS_URL)
+    raise ValueError(f"Unknown SESSION_STORE: {kind}")
+
+
+def check_store(store: SessionStore) -> list:
+    """
+    Run every SessionStore operation against ``store`` in a scratch namespace.
+
+    Returns:
+        list: Descriptions of the checks that failed (empty when all pass).
+    """
+    namespace = f"store-check-{os.getpid()}-{threading.get_ident()}"
+    failures = []
+
+    def expect(description, actual, expected):
+        if actual != expected:
+            failures.append(f"{description}: expected {expected!r}, got {actual!r}")
+
+    value = {"text": "résumé\r\n$3\r\n*", "pages": [1, 2], "none": None}
+    expect("get missing", store.get(namespace, "a", "default"), "default")
+    expect("contains missing", store.contains(namespace, "a"), False)
+    store.set(namespace, "a", value)
+    expect("get after set", store.get(namespace, "a"), value)
+    expect("contains after set", store.contains(namespace, "a"), True)
+    store.set(namespace, "null", None)
+    expect("stored None is present", store.contains(namespace, "null"), True)
+    for item in ({"turn": 1}, {"turn": 2}, "three"):
+        store.append(namespace, "turns", item)
+    expect("list keeps order", store.get_list(namespace, "turns"), [{"turn": 1}, {"turn": 2}, "three"])
+    expect("missing list", store.get_list(namespace, "nothing"), [])
+    expect("keys", sorted(store.keys(namespace)), ["a", "null", "turns"])
+
+    async def async_roundtrip():
+        await store.aset(namespace, "b", value)
+        await store.aappend(namespace, "turns", {"turn": 4})
+        return (await store.aget(namespace, "b"), await store.acontains(namespace, "b"),
+                (await store.aget_list(namespace, "turns"))[-1], sorted(await store.akeys(namespace)))
+
+    expect("async variants", asyncio.run(async_roundtrip()), (value, True, {"turn": 4}, ["a", "b", "null", "turns"]))
+    for key in ("a", "b", "null", "turns"):
+        store.delete(namespace, key)
+    expect("keys after delete", store.keys(namespace), [])
+    return failures
+
+
+def _check_redis_retries(server, store) -> list:
+    """A lost reply is retried for idempotent commands and never for RPUSH."""
+    failures = []
+    store.set("retry", "k", 1)
+    server.drop_replies = 1
+    store.set("retry", "k", 2)
+    if store.get("retry", "k") != 2:
+        failures.append("SET was not retried after a lost reply")
+    server.drop_replies = 1
+    try:
+        store.append("retry", "turns", {"turn": 1})
+        failures.append("RPUSH with a lost reply did not raise")
+    except OSError:
+        pass
+    turns = store.get_list("retry", "turns")
+    if turns != [{"turn": 1}]:
+        failures.append(f"RPUSH with a lost reply stored {turns!r}, expected exactly one turn")
+    return failures
+
+
+def main(argv=None):
+    import argparse
+    import tempfile
+    parser = argparse.ArgumentParser(
+        prog="python -m Functions.session_store",
+        description="Check a session store backend. By default the Redis client is checked "
+                    "against the built-in RESP stand-in (Functions/resp_server.py).",
+    )
+    parser.add_argument("--store", choices=("memory", "sqlite", "redis"), default="redis")
+    parser.add_argument("--url", help="Redis URL to check instead of a stand-in (the check writes a scratch namespace)")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.store == "memory":
+        store = InMemorySessionStore()
+    elif args.store == "sqlite":
+        store = SQLiteSessionStore(os.path.join(tempfile.mkdtemp(), "sessions.db"))
+    elif args.url:
+        store = RedisSessionStore(args.url)
+    else:
+        from Functions.resp_server import RESPStandIn
+        server = RESPStandIn(password="check").start()
+        store = RedisSessionStore(server.url, timeout=1.0)
+    try:
+        failures = check_store(store)
+        if server is not None:
+            failures += _check_redis_retries(server, store)
+    finally:
+        if server is not None:
+            server.stop()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{type(store).__name__}: {'ok' if not failures else f'{len(failures)} check(s) failed'}")
+    return 1 if failures else 0
+
+
+session_store = create_session_store()
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import re
+import json
+from pydantic import ValidationError
+from Functions.token_count import estimate_tokens
+
+# Give up closing a truncated document after this many cut-backs.
+MAX_TRUNCATION_CUTS = 50
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*([\s\S]*?)(?:```|$)")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"'})
+
+
+class StructuredOutputError(ValueError):
+    """
+    The model output could not be turned into the expected schema.
+
+    Attributes:
+        text (str): The cleaned candidate JSON text
+        errors (str): What failed (parse error or validation errors)
+    """
+
+    def __init__(self, message: str, text: str, errors: str):
+        super().__init__(message)
+        self.text = text
+        self.errors = errors
+
+
+def _object_end(text: str, start: int):
+    """Index just past the object opened at ``start``, or None if it is never closed."""
+    depth, in_string, escaped = 0, False, False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+
+def strip_fences(text: str) -> str:
+    """
+    The JSON object inside an LLM reply: the first fenced block that holds one
+    (or the whole reply), trimmed to the outermost ``{...}``. An object that is
+    never closed (a truncated reply) is returned up to the end of the text.
+    """
+    text = text or ""
+    for block in _FENCE.findall(text):
+        if "{" in block:
+            text = block
+            break
+    start = text.find("{")
+    if start == -1:
+        return text.strip()
+    end = _object_end(text, start)
+    return text[start:end].strip() if end else text[start:].strip()
+
+
+def _close(text: str) -> str:
+    """Terminate an open string and append the closers for every open bracket."""
+    stack, in_string, escaped = [], False, False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",")
+    if text.endswith(":"):
+        # A key whose value never arrived: drop the key rather than invent a null
+        text = text[:-1].rstrip()
+        text = text[:text.rfind('"', 0, len(text) - 1)].rstrip().rstrip(",")
+    return text + "".join(reversed(stack))
+
+
+def _close_truncated(text: str):
+    """Close a truncated document, dropping the last incomplete member until it parses."""
+    for _ in range(MAX_TRUNCATION_CUTS):
+        try:
+            return json.loads(_close(text))
+        except json.JSONDecodeError:
+            cut = text.rfind(",")
+            if cut <= 0:
+                return None
+            text = text[:cut]
+    return None
+
+
+def tolerant_loads(text: str):
+    """
+    ``json.loads`` that also accepts the usual LLM slips: markdown fences or
+    prose around the object, smart quotes, trailing commas and a reply cut
+    off mid-object. Raises json.JSONDecodeError when nothing works.
+    """
+    candidate = strip_fences(text)
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError as first_error:
+        loosened = _TRAILING_COMMA.sub(r"\1", candidate.translate(_SMART_QUOTES))
+        try:
+            return json.loads(loosened)
+        except json.JSONDecodeError:
+            pass
+        closed = _close_truncated(loosened)
+        if closed is None:
+            raise first_error
+        return closed
+
+
+def parse_structured(text: str, model_cls):
+    """
+    Parse and validate an LLM reply against a pydantic model.
+
+    Returns:
+        An instance of ``model_cls``; raises StructuredOutputError otherwise.
+    """
+    candidate = strip_fences(text)
+    try:
+        data = tolerant_loads(candidate)
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"Invalid JSON: {str(e)}", candidate, f"JSON syntax error: {str(e)}")
+    try:
+        return model_cls.model_validate(data)
+    except ValidationError as e:
+        errors = "; ".join(f"{'.'.join(str(p) for p in err['loc']) or '<root>'}: {err['msg']}" for err in e.errors())
+        raise StructuredOutputError(f"Schema validation failed: {errors}", json.dumps(data), errors)
+
+
+def build_repair_prompt(text: str, errors: str, model_cls) -> str:
+    schema = json.dumps(model_cls.model_json_schema(), separators=(",", ":"))
+    return (
+        "The JSON below does not match the required schema.\n"
+        f"Problems: {errors}\n"
+        f"JSON Schema: {schema}\n\n"
+        "Return only the corrected JSON object, with no markdown or extra text. Fix the structure and types; "
+        "keep every existing value and do not invent new assessments.\n\n"
+        f"{text}"
+    )
+
+
+def parse_or_repair(text: str, model_cls, repair=None):
+    """
+    ``parse_structured``, falling back to one targeted repair request when the
+    reply cannot be parsed or validated. The repair call only sees the broken
+    JSON and the validation errors (not the original transcript or video), so
+    it costs a fraction of a full regeneration.
+
+    Parameters:
+        text (str): The raw model reply
+        model_cls: Pydantic model to validate against
+        repair: Optional ``repair(prompt, max_tokens) -> str`` issuing the repair request
+
+    Returns:
+        An instance of ``model_cls``; raises StructuredOutputError if the repair
+        fails too. A repair call that errors (timeout, outage) raises the original
+        StructuredOutputError, so callers keep their fallback to the cleaned text.
+    """
+    try:
+        return parse_structured(text, model_cls)
+    except StructuredOutputError as e:
+        if repair is None:
+            raise
+        print(f"Warning: Structured output needs repair ({model_cls.__name__}): {e.errors}")
+        prompt = build_repair_prompt(e.text, e.errors, model_cls)
+        try:
+            repaired = repair(prompt, estimate_tokens(e.text) * 2 + 256)
+        except Exception as repair_error:
+            print(f"Warning: Structured output repair call failed ({model_cls.__name__}): {str(repair_error)}")
+            raise e from repair_error
+        return parse_structured(repaired, model_cls)
@@ -0,0 +1,50 @@
+import os
+import asyncio
+import functools
+from dotenv import load_dotenv
+
+load_dotenv()
+
+VOICE_NAME = "en-US-Chirp3-HD-Charon"
+LANGUAGE_CODE = "en-US"
+# texttospeech.AudioEncoding.MP3; kept as a number so the TTS cache key needs no SDK import
+AUDIO_ENCODING_MP3 = 2
+TTS_TIMEOUT_SECONDS = float(os.getenv("TTS_TIMEOUT_SECONDS", "15"))
+
+
+@functools.lru_cache(maxsize=None)
+def request_params():
+    """Voice and audio settings, built on first synthesis so importing this module stays cheap."""
+    from google.cloud import texttospeech
+    voice_params = texttospeech.VoiceSelectionParams(
+        language_code=LANGUAGE_CODE,
+        name=VOICE_NAME
+    )
+    audio_config = texttospeech.AudioConfig(
+        audio_encoding=AUDIO_ENCODING_MP3
+    )
+    return voice_params, audio_config
+
+
+async def synthesize_speech(tts_client, text: str) -> bytes:
+    """
+    Synthesize ``text`` with the interviewer voice without blocking the event loop.
+
+    Parameters:
+        tts_client: An async Text-to-Speech client bound to the running loop
+        text (str): The text to speak
+
+    Returns:
+        bytes: MP3 audio content. Raises asyncio.TimeoutError after TTS_TIMEOUT_SECONDS.
+    """
+    from google.cloud import texttospeech
+    voice_params, audio_config = request_params()
+    synthesis_response = await asyncio.wait_for(
+        tts_client.synthesize_speech(
+            input=texttospeech.SynthesisInput(text=text),
+            voice=voice_params,
+            audio_config=audio_config
+        ),
+        TTS_TIMEOUT_SECONDS
+    )
+    return synthesis_response.audio_content
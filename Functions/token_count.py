@@ -0,0 +1,14 @@
+import re
+
+# Rough cross-model heuristic: English averages ~4 characters or ~0.75 words per
+# token. Taking the larger of the two keeps estimates on the safe side for both
+# prose and code-like resume text, without pulling in a tokenizer.
+_WORD = re.compile(r"\S+")
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    by_chars = (len(text) + 3) // 4
+    by_words = (len(_WORD.findall(text)) * 4 + 2) // 3
+    return max(by_chars, by_words)
@@ -0,0 +1,45 @@
+import os
+import json
+import hashlib
+from dotenv import load_dotenv
+from Functions.cache import TwoTierCache
+from Providers.registry import provider_mode, STORAGE_BACKEND
+from Functions.text_to_speech import VOICE_NAME, LANGUAGE_CODE, AUDIO_ENCODING_MP3
+
+load_dotenv()
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+TTS_CACHE_MEMORY_ITEMS = int(os.getenv("TTS_CACHE_MEMORY_ITEMS", "256"))
+TTS_CACHE_DISK_ITEMS = int(os.getenv("TTS_CACHE_DISK_ITEMS", "5000"))
+
+
+def _dumps(entry: dict) -> bytes:
+    # "<url>\n<mp3 bytes>" keeps the audio raw on disk instead of base64-inflating it.
+    return (entry.get("audio_url") or "").encode("utf-8") + b"\n" + entry["audio"]
+
+
+def _loads(data: bytes) -> dict:
+    audio_url, _, audio = data.partition(b"\n")
+    return {"audio_url": audio_url.decode("utf-8") or None, "audio": audio}
+
+
+tts_cache = TwoTierCache(
+    TTS_CACHE_DIR,
+    max_memory_items=TTS_CACHE_MEMORY_ITEMS,
+    max_disk_items=TTS_CACHE_DISK_ITEMS,
+    dumps=_dumps,
+    loads=_loads,
+    suffix=".mp3",
+)
+
+
+def tts_cache_key(text: str, voice_name: str = VOICE_NAME, language_code: str = LANGUAGE_CODE,
+                  audio_encoding=AUDIO_ENCODING_MP3) -> str:
+    """
+    Content address of a synthesized phrase: same text and voice settings, same
+    audio. The TTS and storage modes and the storage backend are part of the
+    key, so fake audio and URLs from another backend are never served live.
+    """
+    providers = [provider_mode("tts"), provider_mode("storage"), STORAGE_BACKEND]
+    payload = json.dumps([text, voice_name, language_code, int(audio_encoding), providers])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,196 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from dotenv import load_dotenv
+from Functions.metrics import registry, track
+
+load_dotenv()
+
+# Re-encoding settings per profile. The analysis looks at expressions, posture and voice tone in
+# roughly 10-second windows, and the Gen AI service samples video at about one frame per second,
+# so frame rate, resolution and audio bitrate can drop far below what a browser records.
+VIDEO_PREPROCESS_PROFILES = {
+    "balanced": {"max_height": 720, "fps": 10, "crf": 28, "audio_bitrate": "48k"},
+    "small": {"max_height": 480, "fps": 5, "crf": 30, "audio_bitrate": "32k"},
+    "tiny": {"max_height": 360, "fps": 2, "crf": 32, "audio_bitrate": "24k"},
+}
+# "off" uploads recordings as they are
+VIDEO_PREPROCESS_PROFILE = os.getenv("VIDEO_PREPROCESS_PROFILE", "off").lower()
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+VIDEO_PREPROCESS_TIMEOUT_SECONDS = float(os.getenv("VIDEO_PREPROCESS_TIMEOUT_SECONDS", "600"))
+# Recordings smaller than this are uploaded untouched; encoding would cost more than it saves
+VIDEO_PREPROCESS_MIN_BYTES = int(os.getenv("VIDEO_PREPROCESS_MIN_BYTES", str(5 * 1024 * 1024)))
+# ffmpeg threads per recording (0 lets ffmpeg decide); analysis jobs run VIDEO_ANALYSIS_WORKERS at once
+VIDEO_PREPROCESS_THREADS = int(os.getenv("VIDEO_PREPROCESS_THREADS", "0"))
+
+preprocess_bytes = registry.counter(
+    "interview_video_preprocess_bytes_total",
+    "Recording bytes before (input) and after (output) local pre-processing.",
+    ("kind",),
+)
+preprocess_runs = registry.counter(
+    "interview_video_preprocess_total",
+    "Recordings seen by local pre-processing, by outcome.",
+    ("result",),
+)
+
+
+def profile_settings(profile: str) -> dict:
+    """
+    Settings for a named profile. VIDEO_PREPROCESS_MAX_HEIGHT, _FPS, _CRF and
+    _AUDIO_BITRATE override individual values of the configured profile.
+    """
+    if profile not in VIDEO_PREPROCESS_PROFILES:
+        raise ValueError(f"Unknown video pre-processing profile {profile!r}; expected one of "
+                         f"off, {', '.join(VIDEO_PREPROCESS_PROFILES)}")
+    settings = dict(VIDEO_PREPROCESS_PROFILES[profile])
+    for name, cast in (("max_height", int), ("fps", float), ("crf", int), ("audio_bitrate", str)):
+        variable = f"VIDEO_PREPROCESS_{name.upper()}"
+        value = os.getenv(variable)
+        if value:
+            try:
+                settings[name] = cast(value)
+            except ValueError:
+                raise ValueError(f"Invalid {variable} {value!r}") from None
+    return settings
+
+
+# A bad profile or override stops the app at startup instead of failing every analysis job
+if VIDEO_PREPROCESS_PROFILE != "off":
+    profile_settings(VIDEO_PREPROCESS_PROFILE)
+
+
+def ffmpeg_command(source: str, destination: str, settings: dict) -> list:
+    """H.264 video at the profile's height and frame rate plus mono AAC speech audio, in MP4."""
+    height = settings["max_height"]
+    # Never upscale; libx264 needs even dimensions
+    video_filter = f"scale=-2:'min({height},trunc(ih/2)*2)',fps={settings['fps']:g}"
+    command = [
+        FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+        "-i", source,
+        "-vf", video_filter,
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", str(settings["crf"]), "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", settings["audio_bitrate"], "-ac", "1",
+        "-movflags", "+faststart",
+    ]
+    if VIDEO_PREPROCESS_THREADS > 0:
+        command += ["-threads", str(VIDEO_PREPROCESS_THREADS)]
+    return command + [destination]
+
+
+def _skip(path: str, profile: str, input_bytes: int, reason: str, started: float) -> dict:
+    preprocess_runs.inc("failed" if reason.startswith("ffmpeg") else "skipped")
+    return {
+        "path": path,
+        "profile": profile,
+        "input_bytes": input_bytes,
+        "output_bytes": input_bytes,
+        "saved_bytes": 0,
+        "seconds": round(time.perf_counter() - started, 3),
+        "skipped": reason,
+    }
+
+
+def preprocess_video(path: str, profile: str = None, min_bytes: int = None) -> dict:
+    """
+    Shrink a recording with ffmpeg before it is uploaded for analysis (blocking).
+    Any problem (ffmpeg missing, failing or too slow, or no size gain) leaves
+    the original to be uploaded, so this stage can only make the upload smaller.
+
+    Parameters:
+        path (str): The downloaded recording
+        profile (str): A VIDEO_PREPROCESS_PROFILES name or "off"; VIDEO_PREPROCESS_PROFILE when None
+        min_bytes (int): Smaller files are left alone; VIDEO_PREPROCESS_MIN_BYTES when None
+
+    Returns:
+        dict: ``path`` (the file to upload: a new temp file the caller deletes, or
+        ``path`` itself), ``profile``, ``input_bytes``, ``output_bytes``,
+        ``saved_bytes``, ``seconds`` and ``skipped`` (the reason, or None).
+    """
+    profile = (profile or VIDEO_PREPROCESS_PROFILE).lower()
+    started = time.perf_counter()
+    input_bytes = os.path.getsize(path)
+    if profile == "off":
+        return _skip(path, profile, input_bytes, "disabled", started)
+    settings = profile_settings(profile)
+    if input_bytes < (VIDEO_PREPROCESS_MIN_BYTES if min_bytes is None else min_bytes):
+        return _skip(path, profile, input_bytes, "below the minimum size", started)
+
+    fd, destination = tempfile.mkstemp(suffix=".mp4")
+    os.close(fd)
+    try:
+        with track("video_preprocess"):
+            result = subprocess.run(
+                ffmpeg_command(path, destination, settings),
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=VIDEO_PREPROCESS_TIMEOUT_SECONDS,
+            )
+    except FileNotFoundError:
+        os.remove(destination)
+        print(f"Warning: Video pre-processing skipped; {FFMPEG_BINARY} was not found")
+        return _skip(path, profile, input_bytes, "ffmpeg not found", started)
+    except subprocess.TimeoutExpired:
+        os.remove(destination)
+        print(f"Warning: Video pre-processing took longer than {VIDEO_PREPROCESS_TIMEOUT_SECONDS:g}s; uploading the original")
+        return _skip(path, profile, input_bytes, "ffmpeg timed out", started)
+    if result.returncode != 0:
+        os.remove(destination)
+        error = result.stderr.decode("utf-8", "replace").strip().splitlines()[-1:] or [""]
+        print(f"Warning: Video pre-processing failed (exit {result.returncode}): {error[0]}")
+        return _skip(path, profile, input_bytes, f"ffmpeg exited with {result.returncode}", started)
+
+    output_bytes = os.path.getsize(destination)
+    if output_bytes >= input_bytes:
+        os.remove(destination)
+        return _skip(path, profile, input_bytes, "no size reduction", started)
+
+    preprocess_runs.inc("reencoded")
+    preprocess_bytes.inc("input", amount=input_bytes)
+    preprocess_bytes.inc("output", amount=output_bytes)
+    report = {
+        "path": destination,
+        "profile": profile,
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "saved_bytes": input_bytes - output_bytes,
+        "seconds": round(time.perf_counter() - started, 3),
+        "skipped": None,
+    }
+    print(f"Video pre-processing ({profile}): {input_bytes / 1e6:.1f}MB -> {output_bytes / 1e6:.1f}MB "
+          f"(-{100 * report['saved_bytes'] / input_bytes:.0f}%) in {report['seconds']:.1f}s")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m Functions.video_preprocess",
+        description="Compare the pre-processing profiles on a recording: output size and encode time.",
+    )
+    parser.add_argument("recording", help="Video file, e.g. a downloaded interview recording")
+    parser.add_argument("--profile", action="append", choices=sorted(VIDEO_PREPROCESS_PROFILES),
+                        help="Profile to try (repeatable; default all)")
+    parser.add_argument("--keep", action="store_true", help="Keep the encoded files and print their paths")
+    args = parser.parse_args(argv)
+
+    input_bytes = os.path.getsize(args.recording)
+    print(f"{'profile':<10} {'bytes':>12} {'saved':>7} {'seconds':>8}")
+    print(f"{'original':<10} {input_bytes:>12} {'':>7} {'':>8}")
+    failed = False
+    for profile in args.profile or list(VIDEO_PREPROCESS_PROFILES):
+        report = preprocess_video(args.recording, profile, min_bytes=0)
+        if report["skipped"]:
+            failed = True
+            print(f"{profile:<10} {'-':>12} {'-':>7} {report['seconds']:>8.1f}  ({report['skipped']})")
+            continue
+        saved = 100 * report["saved_bytes"] / input_bytes
+        print(f"{profile:<10} {report['output_bytes']:>12} {saved:>6.0f}% {report['seconds']:>8.1f}"
+              + (f"  {report['path']}" if args.keep else ""))
+        if not args.keep:
+            os.remove(report["path"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
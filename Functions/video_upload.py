@@ -0,0 +1,289 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import contextlib
+from dotenv import load_dotenv
+from Functions.executor import run_blocking
+from Providers.registry import get_storage
+from Functions.metrics import track
+
+load_dotenv()
+
+VIDEO_UPLOADS_DIR = "video_uploads"
+# Where main.py serves VIDEO_UPLOADS_DIR
+LOCAL_VIDEO_BASE_URL = "http://localhost:8000/video_uploads"
+# Kept outside video_uploads so half-received files are never served by the static mount.
+PARTIAL_UPLOADS_DIR = "video_uploads_partial"
+VIDEO_CHUNK_SIZE = int(os.getenv("VIDEO_CHUNK_SIZE", str(1024 * 1024)))
+VIDEO_STORAGE_WORKERS = int(os.getenv("VIDEO_STORAGE_WORKERS", "2"))
+# Seconds an upload is remembered after it finished or last received data. An
+# unfinished resumable upload is recovered from disk when it is next used.
+VIDEO_UPLOAD_RESULT_TTL_SECONDS = float(os.getenv("VIDEO_UPLOAD_RESULT_TTL_SECONDS", "3600"))
+
+# Upload state keyed by upload_id: file_name, offset, total_size, status, video_url, error, updated_at.
+# Per process, like the partial files on local disk; see "Running multiple workers" in the readme.
+upload_jobs = {}
+
+_storage_slots = None
+_storage_tasks = set()
+# The storage task of each recording's newest upload, until it finishes
+_storage_tasks_by_file = {}
+# Uploads a request is appending to or finalizing right now
+_upload_locks = {}
+
+
+class UploadBusy(Exception):
+    """Another request is already appending to or completing this upload."""
+
+
+@contextlib.asynccontextmanager
+async def exclusive_upload(upload_id: str):
+    """
+    Hold an upload for the whole check-append-update sequence. A request that
+    overlaps one already running (e.g. a client retrying a PUT while the first
+    is still streaming) raises UploadBusy instead of waiting, since its offset
+    check would be stale by the time it ran.
+    """
+    lock = _upload_locks.setdefault(upload_id, asyncio.Lock())
+    if lock.locked():
+        raise UploadBusy(f"Upload {upload_id} is busy with another request.")
+    async with lock:
+        try:
+            yield
+        finally:
+            # Nobody ever waits on the lock, so it is dropped as soon as it is released
+            del _upload_locks[upload_id]
+
+
+def _prune_upload_jobs():
+    now = time.time()
+    for upload_id in list(upload_jobs):
+        job = upload_jobs[upload_id]
+        if job["status"] in ("queued", "storing") or upload_id in _upload_locks:
+            continue
+        if now - job["updated_at"] > VIDEO_UPLOAD_RESULT_TTL_SECONDS:
+            del upload_jobs[upload_id]
+
+
+def local_video_path(file_name: str) -> str:
+    return os.path.join(VIDEO_UPLOADS_DIR, f"{file_name}-interview.webm")
+
+
+def local_video_url(file_name: str) -> str:
+    return f"{LOCAL_VIDEO_BASE_URL}/{file_name}-interview.webm"
+
+
+def uploaded_video_path(url: str):
+    """The file behind a ``local_video_url``, or None for any other URL or a file that is gone."""
+    if not url or not url.startswith(LOCAL_VIDEO_BASE_URL + "/"):
+        return None
+    name = url[len(LOCAL_VIDEO_BASE_URL) + 1:]
+    if os.path.basename(name) != name or name.startswith("."):
+        return None
+    path = os.path.join(VIDEO_UPLOADS_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def _partial_path(upload_id: str) -> str:
+    return os.path.join(PARTIAL_UPLOADS_DIR, f"{upload_id}.part")
+
+
+def _meta_path(upload_id: str) -> str:
+    return os.path.join(PARTIAL_UPLOADS_DIR, f"{upload_id}.json")
+
+
+def _save_meta(upload_id: str):
+    job = upload_jobs[upload_id]
+    with open(_meta_path(upload_id), "w") as f:
+        json.dump({"file_name": job["file_name"], "total_size": job["total_size"]}, f)
+
+
+def get_upload_job(upload_id: str):
+    """
+    Look up an upload, recovering it from disk after a restart. The byte offset
+    is always the size of the partial file, so it survives crashes as well.
+    """
+    job = upload_jobs.get(upload_id)
+    if job is None and os.path.exists(_meta_path(upload_id)):
+        with open(_meta_path(upload_id)) as f:
+            meta = json.load(f)
+        job = upload_jobs[upload_id] = {
+            "upload_id": upload_id,
+            "file_name": meta["file_name"],
+            "total_size": meta.get("total_size"),
+            "offset": os.path.getsize(_partial_path(upload_id)) if os.path.exists(_partial_path(upload_id)) else 0,
+            "status": "uploading",
+            "video_url": None,
+            "error": None,
+            "updated_at": time.time(),
+        }
+    return job
+
+
+def create_upload_job(file_name: str, total_size=None) -> dict:
+    _prune_upload_jobs()
+    os.makedirs(PARTIAL_UPLOADS_DIR, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    upload_jobs[upload_id] = {
+        "upload_id": upload_id,
+        "file_name": file_name,
+        "total_size": total_size,
+        "offset": 0,
+        "status": "uploading",
+        "video_url": None,
+        "error": None,
+        "updated_at": time.time(),
+    }
+    _save_meta(upload_id)
+    open(_partial_path(upload_id), "wb").close()
+    return upload_jobs[upload_id]
+
+
+def _append_chunk(path: str, chunk: bytes):
+    with open(path, "ab") as f:
+        f.write(chunk)
+
+
+async def append_stream(upload_id: str, stream) -> int:
+    """
+    Append an async byte stream (e.g. ``request.stream()``) to the partial file,
+    flushing every VIDEO_CHUNK_SIZE bytes so memory use stays flat. Returns the
+    new offset; bytes written before a dropped connection are kept.
+    """
+    job = upload_jobs[upload_id]
+    path = _partial_path(upload_id)
+    buffer = bytearray()
+    try:
+        async for data in stream:
+            buffer += data
+            if len(buffer) >= VIDEO_CHUNK_SIZE:
+                await run_blocking(_append_chunk, path, bytes(buffer))
+                job["offset"] += len(buffer)
+                buffer.clear()
+    finally:
+        if buffer:
+            await run_blocking(_append_chunk, path, bytes(buffer))
+            job["offset"] += len(buffer)
+        job["updated_at"] = time.time()
+    return job["offset"]
+
+
+def _finalize_partial(upload_id: str, destination: str):
+    os.replace(_partial_path(upload_id), destination)
+    os.remove(_meta_path(upload_id))
+
+
+async def complete_upload(upload_id: str, on_stored=None) -> dict:
+    """Move a fully received upload into place and queue it for storage."""
+    job = upload_jobs[upload_id]
+    file_path = local_video_path(job["file_name"])
+    await run_blocking(_finalize_partial, upload_id, file_path)
+    queue_storage_upload(job, file_path, on_stored)
+    return job
+
+
+def _copy_to_disk(source, destination: str):
+    with open(destination, "wb") as f:
+        shutil.copyfileobj(source, f, VIDEO_CHUNK_SIZE)
+
+
+async def save_upload_file(upload_file, file_name: str, on_stored=None) -> dict:
+    """
+    Save a multipart ``UploadFile`` to ``video_uploads`` in VIDEO_CHUNK_SIZE
+    pieces (never the whole recording in memory) and queue the storage upload.
+    """
+    _prune_upload_jobs()
+    os.makedirs(VIDEO_UPLOADS_DIR, exist_ok=True)
+    file_path = local_video_path(file_name)
+    await run_blocking(_copy_to_disk, upload_file.file, file_path)
+    upload_id = uuid.uuid4().hex
+    job = upload_jobs[upload_id] = {
+        "upload_id": upload_id,
+        "file_name": file_name,
+        "total_size": os.path.getsize(file_path),
+        "offset": os.path.getsize(file_path),
+        "status": "uploading",
+        "video_url": None,
+        "error": None,
+        "updated_at": time.time(),
+    }
+    queue_storage_upload(job, file_path, on_stored)
+    return job
+
+
+def _upload_to_storage(file_path: str, file_name: str) -> str:
+    with track("recording_upload"):
+        return get_storage().upload_file(file_path, "interview_recordings", "video", f"{file_name}-interview")
+
+
+async def _store(job: dict, file_path: str, on_stored):
+    global _storage_slots
+    if _storage_slots is None:
+        _storage_slots = asyncio.Semaphore(VIDEO_STORAGE_WORKERS)
+    async with _storage_slots:
+        job["status"] = "storing"
+        try:
+            video_url = await run_blocking(_upload_to_storage, file_path, job["file_name"])
+        except Exception as cloud_error:
+            print(f"Storage upload error: {str(cloud_error)}")
+            # If the upload fails, we'll still keep the local file and use a local URL
+            job["status"] = "failed"
+            job["error"] = str(cloud_error)
+            job["video_url"] = local_video_url(job["file_name"])
+            job["updated_at"] = time.time()
+            return job["video_url"]
+
+        job["video_url"] = video_url
+        if on_stored:
+            await run_blocking(on_stored, job["file_name"], video_url)
+        print(f"Stored video URL: {job['file_name']} -> {video_url}")
+
+        # Clean up local file after successful upload
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        job["status"] = "completed"
+        job["updated_at"] = time.time()
+        return video_url
+
+
+def pending_storage_uploads() -> int:
+    """Recordings waiting for or in the middle of their storage upload."""
+    return len(_storage_tasks)
+
+
+def queue_storage_upload(job: dict, file_path: str, on_stored=None):
+    """
+    Hand the storage upload to a background task; at most
+    VIDEO_STORAGE_WORKERS uploads run at once and the caller returns immediately.
+    ``on_stored(file_name, video_url)`` is called on the blocking pool once
+    the upload succeeds, so it may write to the session store.
+    """
+    job["status"] = "queued"
+    file_name = job["file_name"]
+    task = asyncio.create_task(_store(job, file_path, on_stored))
+    _storage_tasks.add(task)
+    _storage_tasks_by_file[file_name] = task
+
+    def finished(task):
+        _storage_tasks.discard(task)
+        if _storage_tasks_by_file.get(file_name) is task:
+            del _storage_tasks_by_file[file_name]
+
+    task.add_done_callback(finished)
+
+
+async def wait_for_stored_video(file_name: str, timeout=None):
+    """
+    Wait for the newest storage upload of ``file_name`` queued in this process
+    and return its video URL: the stored URL, or ``local_video_url`` if the
+    storage upload failed (the local file is then kept). None when no upload of
+    that recording is pending here. Raises asyncio.TimeoutError after
+    ``timeout`` seconds; the upload itself keeps running.
+    """
+    task = _storage_tasks_by_file.get(file_name)
+    if task is None:
+        return None
+    return await asyncio.wait_for(asyncio.shield(task), timeout)
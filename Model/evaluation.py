@@ -0,0 +1,53 @@
+from pydantic import BaseModel, field_validator
+from typing import Dict, List, Union
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class ParameterEvaluation(BaseModel):
+    """One rubric parameter in a scorecard."""
+    parameter: str
+    result: Union[int, float, str]  # numeric score or "Pass"/"Fail"
+    score: str  # "<score>/<max score>"
+    evidence: List[str] = []
+
+    @field_validator("score", mode="before")
+    @classmethod
+    def _score_as_text(cls, value):
+        return str(value)
+
+    @field_validator("evidence", mode="before")
+    @classmethod
+    def _evidence_as_list(cls, value):
+        return [str(item) for item in _as_list(value)]
+
+
+class InterviewEvaluation(BaseModel):
+    """The scorecard JSON the evaluator model is asked for."""
+    evaluations: List[ParameterEvaluation]
+    Overall_score: str
+    Overall_grammar: str = ""
+    Overall_accent: str = ""
+    Overall_analysis: str = ""
+
+    @field_validator("Overall_score", mode="before")
+    @classmethod
+    def _overall_as_text(cls, value):
+        return str(value)
+
+
+class EmotionAnalysis(BaseModel):
+    """The video emotion analysis JSON."""
+    timestamps: Dict[str, Dict[str, Union[int, float]]] = {}
+    interview_strengths: List[str] = []
+    areas_for_improvement: List[str] = []
+    overall_analysis: str
+
+    @field_validator("interview_strengths", "areas_for_improvement", mode="before")
+    @classmethod
+    def _text_list(cls, value):
+        return [str(item) for item in _as_list(value)]
@@ -9,5 +9,5 @@ class Criteria(BaseModel):
 
 class ScoreCard(BaseModel):
     name: str
-    criterias: List[Criteria]
+    criterias: List[Criteria] = Field(..., min_length=1)
     created_company: str
\ No newline at end of file
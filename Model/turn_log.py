@@ -0,0 +1,85 @@
+import time
+from pydantic import BaseModel, Field
+from typing import List
+from Functions.token_count import estimate_tokens
+
+
+class Turn(BaseModel):
+    """One candidate answer and the interviewer reply that followed it."""
+    user: str
+    assistant: str
+    timestamp: float = Field(default_factory=time.time)
+    user_tokens: int = 0
+    assistant_tokens: int = 0
+    prompt_tokens: int = 0  # size of the interviewer prompt that produced ``assistant``
+
+    @classmethod
+    def create(cls, user: str, assistant: str, prompt_tokens: int = 0) -> "Turn":
+        return cls(
+            user=user,
+            assistant=assistant,
+            user_tokens=estimate_tokens(user),
+            assistant_tokens=estimate_tokens(assistant),
+            prompt_tokens=prompt_tokens,
+        )
+
+    def to_record(self) -> list:
+        # Positional record keeps each stored turn small; see from_record for the order.
+        return [self.timestamp, self.user, self.assistant, self.user_tokens, self.assistant_tokens, self.prompt_tokens]
+
+    @classmethod
+    def from_record(cls, record: list) -> "Turn":
+        timestamp, user, assistant, user_tokens, assistant_tokens = record[:5]
+        prompt_tokens = record[5] if len(record) > 5 else 0
+        return cls(user=user, assistant=assistant, timestamp=timestamp,
+                   user_tokens=user_tokens, assistant_tokens=assistant_tokens, prompt_tokens=prompt_tokens)
+
+    def to_message(self) -> dict:
+        """The scorecard's ``{"user", "response"}`` message shape."""
+        return {"user": self.user, "response": self.assistant}
+
+
+def render_history(turns: List[Turn]) -> str:
+    """Prompt-ready transcript in the ``User: ...\\nAssistant: ...`` form the prompts expect."""
+    return "".join(f"User: {turn.user}\nAssistant: {turn.assistant}\n" for turn in turns)
+
+
+def turns_to_messages(turns: List[Turn]) -> List[dict]:
+    return [turn.to_message() for turn in turns]
+
+
+def turns_from_messages(messages: List[dict]) -> List[Turn]:
+    return [Turn.create(message["user"], message["response"]) for message in messages]
+
+
+class TurnLog:
+    """
+    Append-only turn log for one interview, persisted in the session store as a
+    list of compact records. Appends are O(1) on every backend; newlines inside
+    answers survive because nothing is re-parsed from text.
+    """
+
+    NAMESPACE = "turns"
+
+    def __init__(self, store, file_name: str):
+        self.store = store
+        self.file_name = file_name
+
+    def append(self, turn: Turn):
+        self.store.append(self.NAMESPACE, self.file_name, turn.to_record())
+
+    def turns(self) -> List[Turn]:
+        return [Turn.from_record(record) for record in self.store.get_list(self.NAMESPACE, self.file_name)]
+
+    def reset(self):
+        self.store.delete(self.NAMESPACE, self.file_name)
+
+    # Async variants for request handlers, so a shared store is never waited on from the event loop
+    async def aappend(self, turn: Turn):
+        await self.store.aappend(self.NAMESPACE, self.file_name, turn.to_record())
+
+    async def aturns(self) -> List[Turn]:
+        return [Turn.from_record(record) for record in await self.store.aget_list(self.NAMESPACE, self.file_name)]
+
+    async def areset(self):
+        await self.store.adelete(self.NAMESPACE, self.file_name)
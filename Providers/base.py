@@ -0,0 +1,67 @@
+import io
+import os
+
+
+class ProviderError(Exception):
+    """A provider could not serve the request (e.g. nothing recorded for it in replay mode)."""
+
+
+class Provider:
+    async def warm_up(self):
+        """Open connections and load what the first request would otherwise wait for (optional)."""
+
+
+class LLMProvider(Provider):
+    """
+    Text generation. ``options`` are provider-neutral generation settings:
+    temperature, top_p, top_k, max_tokens, timeout (seconds) and model (to
+    override the provider's default model).
+    """
+
+    async def generate(self, prompt: str, system=None, **options) -> str:
+        raise NotImplementedError
+
+    async def stream(self, prompt: str, system=None, **options):
+        """Async iterator over text chunks as they are produced."""
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    def complete(self, prompt: str, system=None, cache_system: bool = False, **options) -> str:
+        """
+        Blocking variant for worker threads. ``cache_system`` marks the system
+        prompt as a cacheable prefix where the provider supports it.
+        """
+        raise NotImplementedError
+
+
+class TTSProvider(Provider):
+    async def synthesize(self, text: str) -> bytes:
+        """MP3 audio for ``text`` in the interviewer voice."""
+        raise NotImplementedError
+
+
+class StorageProvider(Provider):
+    """
+    Blob storage for recordings and interviewer audio. All methods block and
+    return the object's public URL. Backends implement ``upload_stream``;
+    ``upload_bytes`` and ``upload_file`` are built on it unless the backend
+    has a cheaper path for them. ``extension`` (e.g. ".mp3") names the type
+    of content that has no file name.
+    """
+
+    def upload_stream(self, stream, folder: str, resource_type: str = "auto", public_id=None, extension: str = "") -> str:
+        """Store everything read from a binary file object."""
+        raise NotImplementedError
+
+    def upload_bytes(self, data: bytes, folder: str, resource_type: str = "auto", public_id=None, extension: str = "") -> str:
+        return self.upload_stream(io.BytesIO(data), folder, resource_type, public_id, extension)
+
+    def upload_file(self, path: str, folder: str, resource_type: str = "auto", public_id=None) -> str:
+        with open(path, "rb") as f:
+            return self.upload_stream(f, folder, resource_type, public_id, os.path.splitext(path)[1])
+
+
+class VideoAnalysisProvider(Provider):
+    def analyze(self, video_url: str):
+        """Emotion analysis of an interview recording (blocking); an ``EmotionAnalysis`` dict."""
+        raise NotImplementedError
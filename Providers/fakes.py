@@ -0,0 +1,194 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from dotenv import load_dotenv
+from Providers.base import LLMProvider, TTSProvider, StorageProvider, VideoAnalysisProvider
+
+load_dotenv()
+
+# Default simulated latency per provider kind, in milliseconds
+DEFAULT_FAKE_LATENCY_MS = {"llm": 400, "tts": 200, "storage": 150, "video": 3000}
+FAKE_SEED = int(os.getenv("FAKE_SEED", "0"))
+# Simulated MP3 size; Chirp voices at the default bitrate come to roughly this per character
+FAKE_AUDIO_BYTES_PER_CHAR = int(os.getenv("FAKE_AUDIO_BYTES_PER_CHAR", "250"))
+
+FAKE_QUESTIONS = [
+    "Can you walk me through the most challenging project on your resume?",
+    "How did you decide on the architecture for that system?",
+    "Tell me about a time you disagreed with a teammate. How did you resolve it?",
+    "What would you do differently if you built it again today?",
+    "How do you test and monitor the code you ship?",
+    "Which part of that work are you most proud of, and why?",
+    "How did you measure whether the project was a success?",
+    "What trade-offs did you make to hit the deadline?",
+]
+
+_CRITERION = re.compile(r"^- (.+?) \(Max Score: (\d+), ([^)]+)\)", re.MULTILINE)
+_LATEST_ANSWER = re.compile(r"Candidate's latest response: (.*)")
+
+
+class InjectedFault(TimeoutError):
+    """
+    A simulated provider failure. Subclasses TimeoutError so the app's retry
+    logic treats it like a real transient outage.
+    """
+
+
+class FaultInjector:
+    """
+    Latency and error injection for one provider kind, configured by
+    FAKE_<KIND>_LATENCY_MS, FAKE_<KIND>_JITTER_MS and FAKE_<KIND>_ERROR_RATE.
+    Draws come from a seeded RNG so runs are repeatable.
+    """
+
+    def __init__(self, kind: str):
+        prefix = f"FAKE_{kind.upper()}_"
+        self.kind = kind
+        self.latency = float(os.getenv(prefix + "LATENCY_MS", str(DEFAULT_FAKE_LATENCY_MS[kind]))) / 1000
+        self.jitter = float(os.getenv(prefix + "JITTER_MS", str(self.latency * 200))) / 1000
+        self.error_rate = float(os.getenv(prefix + "ERROR_RATE", "0"))
+        self._random = random.Random(f"{FAKE_SEED}:{kind}")
+        self._lock = threading.Lock()
+
+    def _draw(self, operation: str) -> float:
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.error_rate
+        if failed:
+            raise InjectedFault(f"Injected {self.kind} failure in {operation}")
+        return delay
+
+    async def wait(self, operation: str, scale: float = 1.0):
+        delay = self._draw(operation)
+        await asyncio.sleep(delay * scale)
+
+    def wait_blocking(self, operation: str, scale: float = 1.0):
+        delay = self._draw(operation)
+        time.sleep(delay * scale)
+
+
+def _digest(*parts) -> int:
+    return int(hashlib.sha256("\x00".join(str(p) for p in parts).encode("utf-8")).hexdigest(), 16)
+
+
+def fake_scorecard(system: str, prompt: str) -> dict:
+    """A valid scorecard for the criteria listed in the compiled rubric prompt."""
+    criteria = _CRITERION.findall(system or "") or [("Overall", "100", "Numeric")]
+    evaluations, total, total_max = [], 0, 0
+    for parameter, top_score, marking_type in criteria:
+        top_score = int(top_score)
+        score = top_score * (50 + _digest(prompt, parameter) % 50) // 100
+        total, total_max = total + score, total_max + top_score
+        evaluations.append({
+            "parameter": parameter,
+            "result": ("Pass" if score * 2 >= top_score else "Fail") if "pass" in marking_type.lower() else score,
+            "score": f"{score}/{top_score}",
+            "evidence": [f"Simulated evidence for {parameter}."],
+        })
+    return {
+        "evaluations": evaluations,
+        "Overall_score": f"{total}/{total_max}",
+        "Overall_grammar": "Simulated grammar assessment.",
+        "Overall_accent": "Simulated tone assessment.",
+        "Overall_analysis": "Simulated analysis generated by the fake evaluator.",
+    }
+
+
+class FakeLLM(LLMProvider):
+    """
+    Deterministic stand-in for Gemini and Claude: interviewer prompts get a
+    canned question picked by prompt hash, summary prompts a short summary and
+    JSON-format prompts a schema-valid scorecard. Streaming yields a few words
+    at a time, spreading the latency like a real token stream.
+    """
+
+    def __init__(self):
+        self.faults = FaultInjector("llm")
+
+    def _reply(self, prompt, system):
+        if "valid JSON object" in (system or "") + prompt:
+            return json.dumps(fake_scorecard(system, prompt))
+        if prompt.lstrip().startswith("Summarize"):
+            return "The candidate discussed their recent projects and answered questions on design and testing."
+        if "concluding an interview" in prompt:
+            return "Thank you for your time today. We will contact you about the next round soon."
+        question = FAKE_QUESTIONS[_digest(prompt) % len(FAKE_QUESTIONS)]
+        # Echo the answer so replies differ turn to turn, as real ones do (and miss the TTS cache)
+        answer = _LATEST_ANSWER.search(prompt)
+        if answer and answer.group(1).strip():
+            return f"You said {' '.join(answer.group(1).split()[:8])}. {question}"
+        return f"Thanks, that is helpful. {question}"
+
+    async def generate(self, prompt, system=None, **options):
+        await self.faults.wait("generate")
+        return self._reply(prompt, system)
+
+    async def stream(self, prompt, system=None, **options):
+        words = self._reply(prompt, system).split(" ")
+        chunks = [" ".join(words[i:i + 4]) + " " for i in range(0, len(words), 4)]
+        # Roughly half the latency goes to the first chunk, the rest is spread across the stream
+        await self.faults.wait("stream", 0.5)
+        for index, chunk in enumerate(chunks):
+            if index:
+                await asyncio.sleep(self.faults.latency * 0.5 / len(chunks))
+            yield chunk
+
+    def complete(self, prompt, system=None, cache_system=False, **options):
+        self.faults.wait_blocking("complete")
+        return self._reply(prompt, system)
+
+
+class FakeTTS(TTSProvider):
+    """Returns deterministic MP3-sized bytes (ID3 header plus filler) for each text."""
+
+    def __init__(self):
+        self.faults = FaultInjector("tts")
+
+    async def synthesize(self, text):
+        await self.faults.wait("synthesize")
+        seed = hashlib.sha256(text.encode("utf-8")).digest()
+        size = max(len(text), 1) * FAKE_AUDIO_BYTES_PER_CHAR
+        return b"ID3" + (seed * (size // len(seed) + 1))[:size]
+
+
+class FakeStorage(StorageProvider):
+    """Hands out stable fake URLs (content-addressed) without storing anything."""
+
+    BASE_URL = "https://fake-storage.invalid"
+
+    def __init__(self):
+        self.faults = FaultInjector("storage")
+
+    def upload_stream(self, stream, folder, resource_type="auto", public_id=None, extension=""):
+        self.faults.wait_blocking("upload")
+        digest = hashlib.sha256()
+        for block in iter(lambda: stream.read(1024 * 1024), b""):
+            digest.update(block)
+        return f"{self.BASE_URL}/{folder}/{public_id or digest.hexdigest()[:32]}{extension}"
+
+
+class FakeVideoAnalysis(VideoAnalysisProvider):
+    def __init__(self):
+        self.faults = FaultInjector("video")
+
+    def analyze(self, video_url):
+        self.faults.wait_blocking("analyze")
+        seed = _digest(video_url)
+        return {
+            "timestamps": {
+                f"0:{start:02d}-0:{start + 10:02d}": {
+                    "confident": 1 + (seed >> start) % 3,
+                    "engaged": 1 + (seed >> (start + 1)) % 3,
+                    "nervous": (seed >> (start + 2)) % 2,
+                }
+                for start in range(0, 30, 10)
+            },
+            "interview_strengths": ["Clear explanations", "Steady eye contact"],
+            "areas_for_improvement": ["Pace slightly fast when nervous"],
+            "overall_analysis": "Simulated analysis generated by the fake video analyzer.",
+        }
@@ -0,0 +1,256 @@
+import io
+import os
+import asyncio
+import threading
+from dotenv import load_dotenv
+from Functions.executor import run_blocking
+from Providers.base import LLMProvider, TTSProvider, StorageProvider, VideoAnalysisProvider
+
+load_dotenv()
+
+# Cloudinary's single-request upload is capped at 100MB; larger files use upload_large.
+CLOUDINARY_LARGE_THRESHOLD = 100 * 1024 * 1024
+
+# Independent gRPC channels to Text-to-Speech per event loop; synthesis calls rotate across them.
+TTS_CHANNEL_POOL_SIZE = max(1, int(os.getenv("TTS_CHANNEL_POOL_SIZE", "2")))
+GOOGLE_SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+_credentials_lock = threading.Lock()
+_credentials = None
+
+
+def google_credentials():
+    """
+    Process-wide Google credentials, built once in memory from the
+    service-account environment variables. Without a ``private_key`` the
+    application default credentials are used (GOOGLE_APPLICATION_CREDENTIALS
+    or the metadata server). Vertex and TTS clients share the object, so the
+    access token is refreshed once for all of them.
+    """
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            private_key = os.getenv("private_key")
+            if private_key:
+                from google.oauth2 import service_account
+                info = {
+                    "type": os.getenv("type") or "service_account",
+                    "project_id": os.getenv("project_id"),
+                    "private_key_id": os.getenv("private_key_id"),
+                    "private_key": private_key.replace('\\n', '\n'),  # Ensure correct newline handling
+                    "client_email": os.getenv("client_email"),
+                    "client_id": os.getenv("client_id"),
+                    "auth_uri": os.getenv("auth_uri"),
+                    "token_uri": os.getenv("token_uri"),
+                    "auth_provider_x509_cert_url": os.getenv("auth_provider_x509_cert_url"),
+                    "client_x509_cert_url": os.getenv("client_x509_cert_url"),
+                    "universe_domain": os.getenv("universe_domain") or "googleapis.com",
+                }
+                _credentials = service_account.Credentials.from_service_account_info(info, scopes=GOOGLE_SCOPES)
+            else:
+                import google.auth
+                _credentials, _ = google.auth.default(scopes=GOOGLE_SCOPES)
+        return _credentials
+
+
+def refresh_google_credentials():
+    """Fetch an access token now (blocking) instead of on the first request."""
+    import google.auth.transport.requests
+    credentials = google_credentials()
+    with _credentials_lock:
+        if not credentials.valid:
+            credentials.refresh(google.auth.transport.requests.Request())
+
+
+class GeminiLLM(LLMProvider):
+    """Gemini through google.generativeai (the interviewer model)."""
+
+    def __init__(self, model_name: str = "gemini-2.0-flash"):
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        self.genai = genai
+        self.model_name = model_name
+        self._models = {}
+
+    def _model(self, options, system):
+        key = (options.get("model") or self.model_name, system)
+        if key not in self._models:
+            self._models[key] = self.genai.GenerativeModel(key[0], system_instruction=system)
+        return self._models[key]
+
+    def _config(self, options):
+        settings = {
+            "temperature": options.get("temperature"),
+            "top_p": options.get("top_p"),
+            "top_k": options.get("top_k"),
+            "max_output_tokens": options.get("max_tokens"),
+        }
+        return self.genai.GenerationConfig(**{k: v for k, v in settings.items() if v is not None})
+
+    def _request_options(self, options):
+        return {"timeout": options["timeout"]} if options.get("timeout") else None
+
+    async def generate(self, prompt, system=None, **options):
+        response = await self._model(options, system).generate_content_async(
+            prompt, generation_config=self._config(options), request_options=self._request_options(options)
+        )
+        return response.text
+
+    async def stream(self, prompt, system=None, **options):
+        response = await self._model(options, system).generate_content_async(
+            prompt, generation_config=self._config(options), stream=True,
+            request_options=self._request_options(options)
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    def complete(self, prompt, system=None, cache_system=False, **options):
+        response = self._model(options, system).generate_content(
+            prompt, generation_config=self._config(options), request_options=self._request_options(options)
+        )
+        return response.text
+
+
+class AnthropicLLM(LLMProvider):
+    """Claude on Vertex AI (the scorecard evaluator)."""
+
+    def __init__(self, model_name: str = "claude-3-5-sonnet-v2@20241022"):
+        self.model_name = model_name
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from anthropic import AnthropicVertex
+                # One client (and its HTTP connection pool) for every scorecard thread
+                self._client = AnthropicVertex(
+                    project_id=os.getenv("project_id"), region=os.getenv("region"), credentials=google_credentials()
+                )
+            return self._client
+
+    async def warm_up(self):
+        await run_blocking(self.client)
+        await run_blocking(refresh_google_credentials)
+
+    def complete(self, prompt, system=None, cache_system=False, **options):
+        kwargs = {
+            "model": options.get("model") or self.model_name,
+            "max_tokens": options.get("max_tokens") or 1024,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        if system:
+            if cache_system:
+                kwargs["system"] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+            else:
+                kwargs["system"] = system
+        if options.get("temperature") is not None:
+            kwargs["temperature"] = options["temperature"]
+        if options.get("timeout"):
+            kwargs["timeout"] = options["timeout"]
+        return self.client().messages.create(**kwargs).content[0].text
+
+    async def generate(self, prompt, system=None, **options):
+        return await run_blocking(self.complete, prompt, system, **options)
+
+    async def stream(self, prompt, system=None, **options):
+        yield await self.generate(prompt, system, **options)
+
+
+class GoogleTTS(TTSProvider):
+    """Google Cloud Text-to-Speech with the interviewer voice."""
+
+    def __init__(self, pool_size: int = TTS_CHANNEL_POOL_SIZE):
+        # Loading the SDK here keeps it off the event loop when warm-up builds the provider in a thread
+        from google.cloud import texttospeech  # noqa: F401
+        self.pool_size = pool_size
+        self._clients = []
+        self._loop = None
+        self._next = 0
+
+    def _new_client(self):
+        from google.cloud import texttospeech
+        from google.cloud.texttospeech_v1.services.text_to_speech.transports import TextToSpeechGrpcAsyncIOTransport
+        channel = TextToSpeechGrpcAsyncIOTransport.create_channel(
+            credentials=google_credentials(),
+            scopes=GOOGLE_SCOPES,
+            options=[
+                # Without a local subchannel pool gRPC would share one connection between all the channels
+                ("grpc.use_local_subchannel_pool", 1),
+                ("grpc.keepalive_time_ms", 30000),
+                ("grpc.max_send_message_length", -1),
+                ("grpc.max_receive_message_length", -1),
+            ],
+        )
+        return texttospeech.TextToSpeechAsyncClient(transport=TextToSpeechGrpcAsyncIOTransport(channel=channel))
+
+    def clients(self) -> list:
+        # The async clients are bound to the event loop they were created on.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._clients = [self._new_client() for _ in range(self.pool_size)]
+            self._loop = loop
+        return self._clients
+
+    def client(self):
+        clients = self.clients()
+        self._next = (self._next + 1) % len(clients)
+        return clients[self._next]
+
+    async def warm_up(self):
+        # Connect every channel (TLS handshake and token fetch) before the first interview needs audio
+        from Functions.text_to_speech import LANGUAGE_CODE
+        await run_blocking(refresh_google_credentials)
+        await asyncio.gather(*(client.list_voices(language_code=LANGUAGE_CODE, timeout=15) for client in self.clients()))
+
+    async def synthesize(self, text):
+        from Functions.text_to_speech import synthesize_speech
+        return await synthesize_speech(self.client(), text)
+
+
+class CloudinaryStorage(StorageProvider):
+    def __init__(self):
+        import cloudinary
+        from cloudinary import uploader
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET")
+        )
+        self.uploader = uploader
+
+    def _options(self, folder, resource_type, public_id, extension=""):
+        options = {"resource_type": resource_type, "folder": folder}
+        if public_id:
+            options["public_id"] = public_id
+        if extension:
+            # Lets resource_type="auto" tell audio from video for unnamed content
+            options["filename"] = f"upload{extension}"
+        return options
+
+    def upload_file(self, path, folder, resource_type="auto", public_id=None):
+        options = self._options(folder, resource_type, public_id)
+        if os.path.getsize(path) > CLOUDINARY_LARGE_THRESHOLD:
+            result = self.uploader.upload_large(path, chunk_size=20 * 1024 * 1024, **options)
+        else:
+            result = self.uploader.upload(path, **options)
+        return result["secure_url"]
+
+    def upload_bytes(self, data, folder, resource_type="auto", public_id=None, extension=""):
+        if len(data) > CLOUDINARY_LARGE_THRESHOLD:
+            return self.upload_stream(io.BytesIO(data), folder, resource_type, public_id, extension)
+        # The SDK posts bytes as they are; no temp file or base64 round trip
+        return self.uploader.upload(data, **self._options(folder, resource_type, public_id, extension))["secure_url"]
+
+    def upload_stream(self, stream, folder, resource_type="auto", public_id=None, extension=""):
+        # upload_large sends the stream one chunk at a time (it seeks to the end once to learn the size)
+        options = self._options(folder, resource_type, public_id, extension)
+        result = self.uploader.upload_large(stream, chunk_size=20 * 1024 * 1024, **options)
+        return result["secure_url"]
+
+
+class GeminiVideoAnalysis(VideoAnalysisProvider):
+    def analyze(self, video_url):
+        from Functions.analyse_video import analyze_video_emotion_from_cloud_url
+        return analyze_video_emotion_from_cloud_url(video_url)
@@ -0,0 +1,121 @@
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+from dotenv import load_dotenv
+from Providers.base import StorageProvider
+
+load_dotenv()
+
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "storage")
+# Where Routes/storage.py is reachable; object URLs are this plus the object name
+LOCAL_STORAGE_BASE_URL = os.getenv("LOCAL_STORAGE_BASE_URL", "http://localhost:8000/storage").rstrip("/")
+LOCAL_STORAGE_CHUNK_SIZE = 1024 * 1024
+
+# <sha256 hex><optional extension>
+_OBJECT_NAME = re.compile(r"^([0-9a-f]{64})(\.[A-Za-z0-9]{1,10})?$")
+_EXTENSION = re.compile(r"^\.[A-Za-z0-9]{1,10}$")
+
+
+def _clean_extension(extension: str) -> str:
+    extension = (extension or "").lower()
+    return extension if _EXTENSION.match(extension) else ""
+
+
+def object_path(name: str, directory: str = LOCAL_STORAGE_DIR):
+    """Filesystem path of an object name, or None if the name is not one this store produces."""
+    match = _OBJECT_NAME.match(name)
+    if match is None:
+        return None
+    return os.path.join(directory, match.group(1)[:2], name)
+
+
+def stored_path(url: str, directory: str = LOCAL_STORAGE_DIR, base_url: str = LOCAL_STORAGE_BASE_URL):
+    """
+    The local file behind a URL handed out by the local store, or None for any
+    other URL. Lets readers in this deployment skip the HTTP round trip.
+    """
+    if not url or not url.startswith(base_url + "/"):
+        return None
+    path = object_path(url[len(base_url) + 1:], directory)
+    return path if path and os.path.isfile(path) else None
+
+
+class LocalStorage(StorageProvider):
+    """
+    Content-addressed store on the local filesystem. Each object is named by
+    the SHA-256 of its bytes plus the file extension. Identical uploads (the
+    same TTS phrase, a re-sent recording) are stored once, and a URL always
+    refers to the same bytes, so Routes/storage.py can serve objects as
+    immutable. ``folder``, ``resource_type`` and ``public_id`` do not affect
+    the address.
+
+    A file that is already on disk is hard-linked into the store instead of
+    copied, when both are on the same filesystem.
+    """
+
+    def __init__(self, directory: str = LOCAL_STORAGE_DIR, base_url: str = LOCAL_STORAGE_BASE_URL):
+        self.directory = directory
+        self.base_url = base_url
+        # Incoming data is written here first, on the same filesystem, so the final rename is atomic
+        self.incoming = os.path.join(directory, ".incoming")
+        os.makedirs(self.incoming, exist_ok=True)
+
+    def path_for(self, name: str):
+        return object_path(name, self.directory)
+
+    def url_for(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+    def _place(self, source: str, name: str, link: bool) -> str:
+        destination = self.path_for(name)
+        if os.path.exists(destination):
+            # Already stored: the content is identical by construction
+            if not link:
+                os.remove(source)
+            return self.url_for(name)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        if link:
+            try:
+                os.link(source, destination)
+            except FileExistsError:
+                pass
+            except OSError:
+                # Another filesystem (or no hard links): fall back to a copy
+                fd, temp_path = tempfile.mkstemp(dir=self.incoming)
+                os.close(fd)
+                shutil.copyfile(source, temp_path)
+                os.replace(temp_path, destination)
+        else:
+            os.replace(source, destination)
+        return self.url_for(name)
+
+    def upload_stream(self, stream, folder, resource_type="auto", public_id=None, extension=""):
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.incoming)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for block in iter(lambda: stream.read(LOCAL_STORAGE_CHUNK_SIZE), b""):
+                    digest.update(block)
+                    f.write(block)
+            return self._place(temp_path, digest.hexdigest() + _clean_extension(extension), link=False)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def upload_bytes(self, data, folder, resource_type="auto", public_id=None, extension=""):
+        name = hashlib.sha256(data).hexdigest() + _clean_extension(extension)
+        if os.path.exists(self.path_for(name)):
+            return self.url_for(name)
+        fd, temp_path = tempfile.mkstemp(dir=self.incoming)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return self._place(temp_path, name, link=False)
+
+    def upload_file(self, path, folder, resource_type="auto", public_id=None):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(LOCAL_STORAGE_CHUNK_SIZE), b""):
+                digest.update(block)
+        return self._place(path, digest.hexdigest() + _clean_extension(os.path.splitext(path)[1]), link=True)
@@ -0,0 +1,126 @@
+import os
+import time
+import asyncio
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "live" (real services), "fake" (simulated, no credentials), "record" (live,
+# saving every response) or "replay" (answer from recordings only)
+PROVIDER_MODE = os.getenv("PROVIDER_MODE", "live")
+PROVIDER_MODES = ("live", "fake", "record", "replay")
+INTERVIEWER_MODEL = os.getenv("INTERVIEWER_MODEL", "gemini-2.0-flash")
+EVALUATOR_MODEL = os.getenv("EVALUATOR_MODEL", "claude-3-5-sonnet-v2@20241022")
+# Where live storage goes: "cloudinary" or "local" (content-addressed files served at /storage)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "cloudinary").lower()
+# Build the providers and open their connections in the background at startup
+PROVIDER_WARMUP = os.getenv("PROVIDER_WARMUP", "true").lower() == "true"
+
+_providers = {}
+_lock = threading.Lock()
+
+
+def provider_mode(kind: str) -> str:
+    """Mode for one provider kind; PROVIDER_MODE_<KIND> overrides PROVIDER_MODE."""
+    mode = os.getenv(f"PROVIDER_MODE_{kind.upper()}", PROVIDER_MODE).lower()
+    if mode not in PROVIDER_MODES:
+        raise ValueError(f"Unknown provider mode {mode!r} for {kind}; expected one of {', '.join(PROVIDER_MODES)}")
+    return mode
+
+
+def _build(kind: str, live, fake, replayable):
+    from Providers.replay import PROVIDER_REPLAY_MISS
+    mode = provider_mode(kind)
+    if mode == "live":
+        return live()
+    if mode == "fake":
+        return fake()
+    if mode == "record":
+        return replayable(inner=live())
+    return replayable(fallback=fake() if PROVIDER_REPLAY_MISS == "fake" else None)
+
+
+def _get(name: str, factory):
+    provider = _providers.get(name)
+    if provider is None:
+        with _lock:
+            provider = _providers.get(name)
+            if provider is None:
+                provider = _providers[name] = factory()
+                print(f"Provider {name}: {type(provider).__name__}")
+    return provider
+
+
+def get_llm(role: str = "interviewer"):
+    """
+    The LLM for a role: "interviewer" (Gemini, asks the questions) or
+    "evaluator" (Claude, writes scorecards).
+    """
+    from Providers import fakes, live, replay
+    if role == "interviewer":
+        factory = lambda: live.GeminiLLM(INTERVIEWER_MODEL)
+    elif role == "evaluator":
+        factory = lambda: live.AnthropicLLM(EVALUATOR_MODEL)
+    else:
+        raise ValueError(f"Unknown LLM role: {role}")
+    return _get(f"llm:{role}", lambda: _build("llm", factory, fakes.FakeLLM, replay.ReplayLLM))
+
+
+def get_tts():
+    from Providers import fakes, live, replay
+    return _get("tts", lambda: _build("tts", live.GoogleTTS, fakes.FakeTTS, replay.ReplayTTS))
+
+
+def get_storage():
+    from Providers import fakes, live, replay
+    if STORAGE_BACKEND == "cloudinary":
+        factory = live.CloudinaryStorage
+    elif STORAGE_BACKEND == "local":
+        from Providers.local_storage import LocalStorage
+        factory = LocalStorage
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}; expected cloudinary or local")
+    return _get("storage", lambda: _build("storage", factory, fakes.FakeStorage, replay.ReplayStorage))
+
+
+def get_video_analyzer():
+    from Providers import fakes, live, replay
+    return _get("video", lambda: _build("video", live.GeminiVideoAnalysis, fakes.FakeVideoAnalysis, replay.ReplayVideoAnalysis))
+
+
+def _build_all():
+    return [get_llm("interviewer"), get_llm("evaluator"), get_tts(), get_storage(), get_video_analyzer()]
+
+
+async def warm_up_providers():
+    """
+    Construct every provider and let it open its connections, so the first
+    interview does not pay for SDK imports, token fetches and TLS handshakes.
+    Construction runs in a worker thread to keep the SDK imports off the
+    event loop. Failures are logged; the provider retries on first real use.
+    """
+    from Functions.executor import run_blocking
+    started = time.perf_counter()
+    try:
+        providers = await run_blocking(_build_all)
+    except Exception as e:
+        print(f"Warning: Provider warm-up failed: {str(e)}")
+        return
+    results = await asyncio.gather(*(provider.warm_up() for provider in providers), return_exceptions=True)
+    for provider, result in zip(providers, results):
+        if isinstance(result, Exception):
+            print(f"Warning: Could not warm up {type(provider).__name__}: {str(result)}")
+    print(f"Providers warmed up in {time.perf_counter() - started:.2f}s")
+
+
+def set_provider(name: str, provider):
+    """Install a provider instance directly ("llm:interviewer", "llm:evaluator", "tts", "storage", "video")."""
+    with _lock:
+        _providers[name] = provider
+
+
+def reset_providers():
+    """Drop every provider so the next lookup re-reads the configuration."""
+    with _lock:
+        _providers.clear()
@@ -0,0 +1,187 @@
+import os
+import json
+import base64
+import hashlib
+from dotenv import load_dotenv
+from Functions.cache import TwoTierCache
+from Providers.base import ProviderError, LLMProvider, TTSProvider, StorageProvider, VideoAnalysisProvider
+
+load_dotenv()
+
+PROVIDER_CASSETTE_DIR = os.getenv("PROVIDER_CASSETTE_DIR", "provider_cassettes")
+# What a replay does when nothing was recorded for a request: "error" or "fake"
+PROVIDER_REPLAY_MISS = os.getenv("PROVIDER_REPLAY_MISS", "error")
+
+# Only options that change the output are part of a recording's key
+_KEYED_OPTIONS = ("temperature", "top_p", "top_k", "max_tokens", "model")
+
+
+class Cassette:
+    """
+    Recorded provider responses, one JSON file per request under
+    PROVIDER_CASSETTE_DIR/<kind>. A request is identified by a hash of its
+    inputs, so replays do not depend on call order or concurrency.
+    """
+
+    def __init__(self, kind: str, directory: str = None):
+        self.kind = kind
+        self.cache = TwoTierCache(
+            os.path.join(directory or PROVIDER_CASSETTE_DIR, kind),
+            max_memory_items=1024,
+            max_disk_items=1000000,
+            dumps=lambda value: json.dumps(value).encode("utf-8"),
+            loads=lambda data: json.loads(data.decode("utf-8")),
+            suffix=".json",
+        )
+
+    @staticmethod
+    def key(operation: str, *parts) -> str:
+        return hashlib.sha256(json.dumps([operation, *parts], sort_keys=True).encode("utf-8")).hexdigest()
+
+    def load(self, key: str):
+        return self.cache.get(key)
+
+    def save(self, key: str, value):
+        self.cache.set(key, value)
+
+
+def _options_key(options: dict) -> dict:
+    return {name: options[name] for name in _KEYED_OPTIONS if options.get(name) is not None}
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _Replayable:
+    """
+    Shared record/replay logic. With ``inner`` set, every call goes to it and
+    the result is recorded; without it, calls are answered from the cassette
+    and a miss raises ProviderError (or goes to ``fallback`` when configured).
+    """
+
+    def __init__(self, kind: str, inner=None, fallback=None):
+        self.cassette = Cassette(kind)
+        self.inner = inner
+        self.fallback = fallback
+
+    async def warm_up(self):
+        if self.inner is not None:
+            await self.inner.warm_up()
+
+    def _miss(self, operation: str):
+        if self.fallback is not None:
+            return self.fallback
+        raise ProviderError(f"No recorded {self.cassette.kind} response for {operation} in {self.cassette.cache.directory}")
+
+
+class ReplayLLM(_Replayable, LLMProvider):
+    def __init__(self, inner=None, fallback=None):
+        super().__init__("llm", inner, fallback)
+
+    async def generate(self, prompt, system=None, **options):
+        key = self.cassette.key("generate", prompt, system, _options_key(options))
+        if self.inner is None:
+            recorded = self.cassette.load(key)
+            if recorded is None:
+                return await self._miss("generate").generate(prompt, system, **options)
+            return recorded
+        text = await self.inner.generate(prompt, system, **options)
+        self.cassette.save(key, text)
+        return text
+
+    async def stream(self, prompt, system=None, **options):
+        # Chunks are recorded individually so replays keep the stream's shape
+        key = self.cassette.key("stream", prompt, system, _options_key(options))
+        if self.inner is None:
+            recorded = self.cassette.load(key)
+            if recorded is None:
+                async for chunk in self._miss("stream").stream(prompt, system, **options):
+                    yield chunk
+                return
+            for chunk in recorded:
+                yield chunk
+            return
+        chunks = []
+        async for chunk in self.inner.stream(prompt, system, **options):
+            chunks.append(chunk)
+            yield chunk
+        self.cassette.save(key, chunks)
+
+    def complete(self, prompt, system=None, cache_system=False, **options):
+        key = self.cassette.key("complete", prompt, system, _options_key(options))
+        if self.inner is None:
+            recorded = self.cassette.load(key)
+            if recorded is None:
+                return self._miss("complete").complete(prompt, system, cache_system, **options)
+            return recorded
+        text = self.inner.complete(prompt, system, cache_system, **options)
+        self.cassette.save(key, text)
+        return text
+
+
+class ReplayTTS(_Replayable, TTSProvider):
+    def __init__(self, inner=None, fallback=None):
+        super().__init__("tts", inner, fallback)
+
+    async def synthesize(self, text):
+        key = self.cassette.key("synthesize", text)
+        if self.inner is None:
+            recorded = self.cassette.load(key)
+            if recorded is None:
+                return await self._miss("synthesize").synthesize(text)
+            return base64.b64decode(recorded)
+        audio = await self.inner.synthesize(text)
+        self.cassette.save(key, base64.b64encode(audio).decode("ascii"))
+        return audio
+
+
+class ReplayStorage(_Replayable, StorageProvider):
+    def __init__(self, inner=None, fallback=None):
+        super().__init__("storage", inner, fallback)
+
+    def upload_file(self, path, folder, resource_type="auto", public_id=None):
+        key = self.cassette.key("upload_file", _file_digest(path), folder, resource_type, public_id)
+        if self.inner is None:
+            recorded = self.cassette.load(key)
+            if recorded is None:
+                return self._miss("upload_file").upload_file(path, folder, resource_type, public_id)
+            return recorded
+        url = self.inner.upload_file(path, folder, resource_type, public_id)
+        self.cassette.save(key, url)
+        return url
+
+    def upload_bytes(self, data, folder, resource_type="auto", public_id=None, extension=""):
+        key = self.cassette.key("upload_bytes", hashlib.sha256(data).hexdigest(), folder, resource_type, public_id, extension)
+        if self.inner is None:
+            recorded = self.cassette.load(key)
+            if recorded is None:
+                return self._miss("upload_bytes").upload_bytes(data, folder, resource_type, public_id, extension)
+            return recorded
+        url = self.inner.upload_bytes(data, folder, resource_type, public_id, extension)
+        self.cassette.save(key, url)
+        return url
+
+    def upload_stream(self, stream, folder, resource_type="auto", public_id=None, extension=""):
+        # The key needs the content's hash, so streams are recorded like bytes
+        return self.upload_bytes(stream.read(), folder, resource_type, public_id, extension)
+
+
+class ReplayVideoAnalysis(_Replayable, VideoAnalysisProvider):
+    def __init__(self, inner=None, fallback=None):
+        super().__init__("video", inner, fallback)
+
+    def analyze(self, video_url):
+        key = self.cassette.key("analyze", video_url)
+        if self.inner is None:
+            recorded = self.cassette.load(key)
+            if recorded is None:
+                return self._miss("analyze").analyze(video_url)
+            return recorded
+        analysis = self.inner.analyze(video_url)
+        self.cassette.save(key, analysis)
+        return analysis
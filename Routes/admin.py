@@ -0,0 +1,86 @@
+import os
+import hmac
+import threading
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Header, Depends
+from fastapi.responses import Response
+from dotenv import load_dotenv
+from Functions.loop_watchdog import loop_watchdog
+from Functions.sampling_profiler import profiler, ProfilerBusy, PROFILE_MAX_SECONDS, PROFILE_DEFAULT_INTERVAL_MS
+
+load_dotenv()
+
+# Admin endpoints expose stack traces, so they stay off unless a token is configured
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them.")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/loop_stalls")
+async def loop_stalls(limit: int = 20):
+    """Most recent event-loop stalls (newest first) with the stack of the blocking call."""
+    return {
+        "running": loop_watchdog.running,
+        "threshold_ms": loop_watchdog.threshold * 1000,
+        "stalls": loop_watchdog.recent(max(1, min(limit, loop_watchdog.stalls.maxlen))),
+    }
+
+
+@router.post("/profile")
+async def start_profile(seconds: float = 30, interval_ms: float = PROFILE_DEFAULT_INTERVAL_MS, all_threads: bool = False):
+    """
+    Start a sampling profile of this worker for ``seconds``. By default only the
+    event-loop thread is sampled; ``all_threads`` adds the worker pools.
+    """
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {PROFILE_MAX_SECONDS:g}.")
+    if interval_ms < 1:
+        raise HTTPException(status_code=400, detail="interval_ms must be at least 1.")
+    # This handler runs on the loop thread
+    thread_ids = None if all_threads else {threading.get_ident()}
+    try:
+        return profiler.start(seconds, interval_ms / 1000, thread_ids)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/profile/stop")
+async def stop_profile():
+    profile = profiler.stop()
+    if profile is None:
+        raise HTTPException(status_code=404, detail="No profile is running.")
+    return profile
+
+
+@router.get("/profile")
+async def list_profiles():
+    return [profiler.get(profile_id) for profile_id in list(profiler.profiles)]
+
+
+@router.get("/profile/{profile_id}")
+async def profile_status(profile_id: str):
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return profile
+
+
+@router.get("/profile/{profile_id}/download")
+async def download_profile(profile_id: str):
+    """Collapsed stacks (flamegraph.pl / speedscope input); partial while the profile is running."""
+    collapsed = profiler.collapsed(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return Response(
+        collapsed,
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.collapsed"'},
+    )
@@ -1,95 +1,77 @@
 import os
-import re
-import json
-import base64
-import fitz  # PyMuPDF
-from fastapi import APIRouter, UploadFile, File, HTTPException,Form
+import time
+import hashlib
+from fastapi import APIRouter, UploadFile, File, HTTPException,Form,Request,Header
 from fastapi.concurrency import run_in_threadpool
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
-from google.cloud import texttospeech
+from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import WebSocket, WebSocketDisconnect, HTTPException
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 from typing import List
-from anthropic import AnthropicVertex  # Ensure your AnthropicVertex package is installed and configured
-from Functions.response_to_question import response,end_response  # Import your response function
-from Functions.extract_text_from_pdf import extract_text_from_bytes  # Import your PDF extraction function
+from Functions.response_to_question import response_async,end_response_async,stream_sentences  # Import your response function
+from Functions.extraction_cache import extract_resume, extraction_cache
+from Functions.extract_text_from_pdf import PDFTooLargeError
+from Functions.pdf_pool import check_pdf_size, PDFExtractionTimeout
+from Functions.bulk_ingest import collect_sources, ingest_stream, BULK_MAX_FILES
 from Functions.create_analysis_to_chats import generate_scorecard  # Import your scorecard generation function
-from Functions.analyse_video import analyze_video_emotion_from_cloud_url
-from cloudinary import uploader
-import cloudinary
+from Functions.analyse_video import submit_video_analysis, video_analysis_jobs
+from Functions.scorecard_cache import cached_scorecard, scorecard_cache, IdempotentRequests, IdempotencyConflict
+from Functions.rubrics import RubricStore, DEFAULT_RUBRIC_ID
+from Model.score_card import ScoreCard
+from Functions.batch_scoring import submit_batch, batch_status, batch_paths, valid_batch_id, batch_scoring_jobs
+from Functions.metrics import registry, track, observe_stage
+from Functions.executor import run_blocking
+from Functions.tts_cache import tts_cache, tts_cache_key
+from Functions.session_store import session_store, SessionMapping
+from Model.turn_log import Turn, TurnLog, turns_to_messages
+from Functions.prompt_context import PromptContext
+from Functions.resume_index import build_resume_index, ResumeIndex
+from Functions.video_upload import (
+    save_upload_file, create_upload_job, get_upload_job, append_stream, complete_upload, local_video_url,
+    local_video_path, wait_for_stored_video, pending_storage_uploads, exclusive_upload, UploadBusy
+)
+from Providers.registry import get_tts, get_storage
 import asyncio
 from typing import Dict, List
 router = APIRouter()
-import tempfile
   
 
-# Load environment variables and set credentials
+# Load environment variables. Credentials for Google, Anthropic and Cloudinary
+# are only needed by the live providers (Providers/live.py), which set them up
+# on first use.
 load_dotenv()
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET")
-)
 
+# WebSocket objects are bound to this process, so connections are tracked locally
+# even when session state lives in a shared store.
 active_connections: Dict[str, List[WebSocket]] = {}  # Track active WebSocket connections by file_name
 
-# Build credentials from environment variables and write to a file
-credentials_json = {
-    "type": os.getenv("type"),
-    "project_id": os.getenv("project_id"),
-    "private_key_id": os.getenv("private_key_id"),
-    "private_key": os.getenv("private_key").replace('\\n', '\n'),  # Ensure correct newline handling
-    "client_email": os.getenv("client_email"),
-    "client_id": os.getenv("client_id"),
-    "auth_uri": os.getenv("auth_uri"),
-    "token_uri": os.getenv("token_uri"),
-    "auth_provider_x509_cert_url": os.getenv("auth_provider_x509_cert_url"),
-    "client_x509_cert_url": os.getenv("client_x509_cert_url"),
-    "universe_domain": os.getenv("universe_domain")
-}
-
-with open("credentials.json", "w") as f:
-    json.dump(credentials_json, f, indent=2)
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = r"credentials.json"
-project_id = os.getenv("project_id")
-region = os.getenv("region")
-client = AnthropicVertex(project_id=project_id, region=region)
-async def upload_audio_to_cloudinary(audio_base64: str) -> str:
-    temp_file_path = None
+UPLOAD_TIMEOUT_SECONDS = float(os.getenv("UPLOAD_TIMEOUT_SECONDS", "30"))
+
+def _upload_audio_bytes(audio_binary: bytes) -> str:
+    # The MP3 goes to storage as it is: no base64 round trip or temp file
+    with track("audio_upload"):
+        return get_storage().upload_bytes(audio_binary, "audio_responses", extension=".mp3")
+
+async def upload_audio(audio_binary: bytes) -> str:
+    # Storage uploads are synchronous, so they run on the shared bounded pool
+    # instead of the event loop.
     try:
-        # Create a temporary file to store the audio
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as temp_audio:
-            temp_file_path = temp_audio.name
-            # Decode base64 and write to temp file
-            audio_binary = base64.b64decode(audio_base64)
-            temp_audio.write(audio_binary)
-        
-        # File is now closed, upload to Cloudinary
-        result = cloudinary.uploader.upload(
-            temp_file_path,
-            resource_type="auto",
-            folder="audio_responses"
-        )
-        
-        return result['secure_url']
-    
+        return await run_blocking(_upload_audio_bytes, audio_binary, timeout=UPLOAD_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise
     except Exception as e:
-        raise Exception(f"Error uploading to Cloudinary: {str(e)}")
-    
-    finally:
-        # Clean up temp file in finally block to ensure it always happens
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-            except Exception as e:
-                print(f"Warning: Could not delete temporary file {temp_file_path}: {str(e)}")
+        raise Exception(f"Error uploading audio: {str(e)}")
 
-# Dictionaries to store extracted PDF text and chat history keyed by filename
-extracted_texts = {}
-chat_histories = {}
+# Extracted PDF text and video URLs keyed by filename, plus each interview's
+# TurnLog. They live in the configured session store (SESSION_STORE) so any
+# worker can serve any session.
+extracted_texts = SessionMapping(session_store, "extracted_texts")
+# BM25 index over resume chunks, and how often the interviewer has asked about each chunk
+resume_indexes = SessionMapping(session_store, "resume_indexes")
+resume_coverage = SessionMapping(session_store, "resume_coverage")
 
-video_urls = {}
+video_urls = SessionMapping(session_store, "video_urls")
+rubrics = RubricStore(session_store)
 
 # Endpoint to upload a PDF file and extract its text
 @router.post("/upload")
@@ -97,16 +79,65 @@ async def upload_pdf(file: UploadFile = File(...)):
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Invalid file type. Please upload a PDF file.")
     
-    contents = await file.read()
     try:
-        text_content = await run_in_threadpool(extract_text_from_bytes, contents)
+        if file.size is not None:
+            check_pdf_size(file.size)
+        contents = await file.read()
+        # Cached by content hash: re-uploads of the same PDF skip parsing entirely
+        extraction = await extract_resume(contents)
+    except PDFTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except PDFExtractionTimeout as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
-    extracted_texts[file.filename] = text_content
-    chat_histories[file.filename] = ""  # Initialize empty chat history for the file
+    await register_resume(file.filename, extraction)
     return {"message": "File successfully processed", "file": file.filename}
 
+async def register_resume(file_name: str, extraction: dict) -> int:
+    """Store an extracted resume as a fresh interview session; returns its chunk count."""
+    text_content = extraction["text"]
+    
+    # Index the resume once here so each turn only sends the sections it needs
+    resume_index = await run_in_threadpool(build_resume_index, text_content, extraction["sections"])
+    
+    await asyncio.gather(
+        extracted_texts.aset(file_name, text_content),
+        resume_indexes.aset(file_name, resume_index),
+        resume_coverage.aset(file_name, [0] * len(resume_index["chunks"])),
+        TurnLog(session_store, file_name).areset(),  # Start the file with an empty turn log
+        PromptContext(session_store, file_name).reset()
+    )
+    return len(resume_index["chunks"])
+
+# Endpoint to upload many resumes at once (several PDF parts and/or zip archives).
+# Results stream back as NDJSON, one line per resume as soon as it is processed.
+@router.post("/upload/bulk")
+async def upload_bulk(request: Request):
+    # Parsed here rather than with File(...) so the part limit can go past
+    # Starlette's default of 1000 files per form.
+    form = await request.form(max_files=BULK_MAX_FILES, max_fields=BULK_MAX_FILES)
+    try:
+        upload_files = [value for _, value in form.multi_items() if not isinstance(value, str)]
+        if not upload_files:
+            raise HTTPException(status_code=400, detail="No files uploaded.")
+        sources = await run_in_threadpool(collect_sources, upload_files)
+        if len(sources) > BULK_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"Batch has {len(sources)} files; the limit is {BULK_MAX_FILES}.")
+    except BaseException:
+        # Nothing will stream, so the spooled parts are released here
+        await form.close()
+        raise
+
+    async def results():
+        try:
+            async for line in ingest_stream(sources, register_resume):
+                yield line
+        finally:
+            await form.close()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 # Endpoint for chat: uses a response function (assumed to be defined elsewhere)
 # @router.get("/chat")
 # async def chat(file_name: str, query: str):
@@ -153,37 +184,149 @@ async def start():
     # Define your welcome message
     welcome_message = "Hello My name is Alex I am the interviewer for you today.Lets start with the breif introduction about yourself?"
     
-    # Initialize the Text-to-Speech client
-    tts_client = texttospeech.TextToSpeechClient()
-    
-    # Set up the voice parameters and audio configuration
-    voice_params = texttospeech.VoiceSelectionParams(
-        language_code="en-US",
-        name="en-US-Chirp3-HD-Charon"
-    )
-    audio_config = texttospeech.AudioConfig(
-        audio_encoding=texttospeech.AudioEncoding.MP3
-    )
-    
-    # Prepare the synthesis input
-    synthesis_input = texttospeech.SynthesisInput(text=welcome_message)
-    
-    # Synthesize speech from the welcome message text
-    synthesis_response = tts_client.synthesize_speech(
-        input=synthesis_input, 
-        voice=voice_params, 
-        audio_config=audio_config
-    )
-    
-    # Encode the audio content to base64 so it can be sent in a JSON response
-    audio_base64 = base64.b64encode(synthesis_response.audio_content).decode("utf-8")
-    
-    # Upload the audio to Cloudinary (or another storage service) to obtain a URL
-    audio_url = await upload_audio_to_cloudinary(audio_base64)
+    # The welcome message never changes, so after the first call this is served
+    # from the TTS cache without touching Text-to-Speech or storage.
+    audio_url, _, audio_error = await synthesize_audio(welcome_message)
+    if audio_error:
+        raise HTTPException(status_code=504, detail=audio_error)
     
     # Return the welcome message along with the URL to the audio
     return {"message": welcome_message, "audio": audio_url}
 
+async def synthesize_audio(text: str, binary: bool = False):
+    """
+    Produce the audio for ``text``; returns (audio_url, audio_content, audio_error).
+
+    With ``binary=False`` the MP3 is uploaded and only the URL is returned.
+    With ``binary=True`` the raw MP3 bytes are returned for inline delivery and
+    nothing is uploaded. Phrases already in the TTS cache cost neither a TTS call
+    nor an upload.
+    """
+    key = tts_cache_key(text)
+    cached = await tts_cache.aget(key)
+    if cached and (binary or cached["audio_url"]):
+        return (None if binary else cached["audio_url"]), (cached["audio"] if binary else None), None
+    audio_url = cached["audio_url"] if cached else None
+    try:
+        if cached:
+            audio_content = cached["audio"]
+        else:
+            with track("tts_synthesize"):
+                audio_content = await get_tts().synthesize(text)
+        if not binary:
+            audio_url = await upload_audio(audio_content)
+    except asyncio.TimeoutError:
+        # A slow TTS or upload stage only costs this turn its audio;
+        # the text reply still goes out and the session stays open.
+        return None, None, "Audio generation timed out"
+    await tts_cache.aset(key, {"audio": audio_content, "audio_url": audio_url})
+    if binary:
+        return None, audio_content, None
+    return audio_url, None, None
+
+class InterviewSocket:
+    """
+    Wraps the interview websocket so every send goes through one lock. In binary
+    audio mode a JSON message carrying ``audio_bytes`` is the header for the
+    binary frame that immediately follows it, so nothing (pings, streamed text)
+    may be sent in between.
+    """
+
+    def __init__(self, websocket: WebSocket, binary_audio: bool):
+        self.websocket = websocket
+        self.binary_audio = binary_audio
+        self._send_lock = asyncio.Lock()
+
+    async def send_json(self, message: dict):
+        async with self._send_lock:
+            await self.websocket.send_json(message)
+
+    async def send_with_audio(self, message: dict, audio_url, audio_content, audio_error):
+        message["audio"] = audio_url
+        if audio_error:
+            message["audio_error"] = audio_error
+        async with self._send_lock:
+            if audio_content is None:
+                await self.websocket.send_json(message)
+                return
+            message["audio_format"] = "mp3"
+            message["audio_bytes"] = len(audio_content)
+            await self.websocket.send_json(message)
+            await self.websocket.send_bytes(audio_content)
+
+async def stream_turn(channel: InterviewSocket, pdf_content: str, query: str, history: str, final: bool, stage=None) -> str:
+    """
+    Stream one interviewer reply: every sentence is sent as a ``response_chunk``
+    the moment Gemini finishes it, and its audio is synthesized concurrently and
+    sent as an ``audio_chunk`` in sentence order as soon as it is ready.
+
+    Returns:
+        str: The full reply text, for the chat history.
+    """
+    audio_jobs = asyncio.Queue()
+
+    async def send_audio_in_order():
+        while True:
+            job = await audio_jobs.get()
+            if job is None:
+                return
+            index, task = job
+            audio_url, audio_content, audio_error = await task
+            await channel.send_with_audio({"type": "audio_chunk", "index": index}, audio_url, audio_content, audio_error)
+
+    sender = asyncio.create_task(send_audio_in_order())
+    sentences = []
+    try:
+        async for sentence in stream_sentences(pdf_content, query, history, final=final, stage=stage):
+            index = len(sentences)
+            sentences.append(sentence)
+            await channel.send_json({"type": "response_chunk", "index": index, "text": sentence})
+            audio_jobs.put_nowait((index, asyncio.create_task(synthesize_audio(sentence, channel.binary_audio))))
+        audio_jobs.put_nowait(None)
+        await sender
+    finally:
+        if not sender.done():
+            sender.cancel()
+    return " ".join(sentences)
+
+@router.get("/tts_cache/stats")
+async def tts_cache_stats():
+    return tts_cache.stats()
+
+@router.get("/extraction_cache/stats")
+async def extraction_cache_stats():
+    return extraction_cache.stats()
+
+@router.get("/scorecard_cache/stats")
+async def scorecard_cache_stats():
+    return scorecard_cache.stats()
+
+# Scrape-time views of state that already exists, for /metrics
+_caches = {"tts": tts_cache, "extraction": extraction_cache, "scorecard": scorecard_cache}
+registry.callback(
+    "interview_active_sessions", "Open interview websocket connections in this worker.", (),
+    lambda: [((), sum(len(connections) for connections in active_connections.values()))]
+)
+registry.callback(
+    "interview_cache_lookups_total", "Cache lookups by result.", ("cache", "result"),
+    lambda: [((name, result), cache.stats()[result]) for name, cache in _caches.items()
+             for result in ("memory_hits", "disk_hits", "misses")],
+    kind="counter"
+)
+registry.callback(
+    "interview_cache_items", "Entries held by each cache tier.", ("cache", "tier"),
+    lambda: [((name, tier), cache.stats()[f"{tier}_items"]) for name, cache in _caches.items() for tier in ("memory", "disk")]
+)
+registry.callback(
+    "interview_jobs", "Background jobs by status (finished jobs are kept for their result TTL).", ("queue", "status"),
+    lambda: [((queue.name, status), count) for queue in (video_analysis_jobs, batch_scoring_jobs)
+             for status, count in queue.counts().items()]
+)
+registry.callback(
+    "interview_pending_recording_uploads", "Interview recordings queued for or in their storage upload.", (),
+    lambda: [((), pending_storage_uploads())]
+)
+
 @router.websocket("/ws/chat")
 async def websocket_interview(websocket: WebSocket):
     await websocket.accept()
@@ -201,7 +344,8 @@ async def websocket_interview(websocket: WebSocket):
             await websocket.close()
             return
 
-        if file_name not in extracted_texts:
+        pdf_content = await extracted_texts.aget(file_name)
+        if pdf_content is None:
             await websocket.send_json({"error": "Extracted text for the requested file not found"})
             await websocket.close()
             return
@@ -210,23 +354,43 @@ async def websocket_interview(websocket: WebSocket):
             active_connections[file_name] = []
         active_connections[file_name].append(websocket)
 
-        if file_name not in chat_histories:
-            chat_histories[file_name] = ""
-
-        tts_client = texttospeech.TextToSpeechClient()
-        voice_params = texttospeech.VoiceSelectionParams(
-            language_code="en-US",
-            name="en-US-Chirp3-HD-Charon"
-        )
-        audio_config = texttospeech.AudioConfig(
-            audio_encoding=texttospeech.AudioEncoding.MP3
+        # Loaded once per connection; afterwards turns are appended to both the
+        # local list and the store, so no turn ever re-reads the whole log.
+        turn_log = TurnLog(session_store, file_name)
+        turns, prompt_context, index_data, coverage = await asyncio.gather(
+            turn_log.aturns(),
+            PromptContext.load(session_store, file_name),
+            resume_indexes.aget(file_name),
+            resume_coverage.aget(file_name)
         )
+        if index_data is None:
+            index_data = await run_in_threadpool(build_resume_index, pdf_content)
+            await resume_indexes.aset(file_name, index_data)
+        resume_index = ResumeIndex(index_data, coverage)
+
+        async def record_turn(query: str, res: str, prompt_tokens: int):
+            turn = Turn.create(query, res, prompt_tokens)
+            turns.append(turn)
+            prompt_context.schedule_refresh(turns)
+            resume_index.record_coverage(res)
+            await asyncio.gather(turn_log.aappend(turn), resume_coverage.aset(file_name, resume_index.coverage))
+
+        # Clients opt into sentence-level streaming in the handshake; everyone
+        # else keeps receiving a single "response" message per turn.
+        stream = bool(init_data.get("stream", False))
+        # "binary" sends the MP3 itself as a websocket frame instead of a storage URL.
+        audio_delivery = init_data.get("audio_delivery", "url")
+        if audio_delivery not in ("url", "binary"):
+            await websocket.send_json({"error": f"Unsupported audio_delivery: {audio_delivery}"})
+            await websocket.close()
+            return
+        channel = InterviewSocket(websocket, binary_audio=audio_delivery == "binary")
 
         async def keepalive():
             try:
                 while True:
                     await asyncio.sleep(30)  # Send ping every 30 seconds
-                    await websocket.send_json({"type": "ping"})
+                    await channel.send_json({"type": "ping"})
             except Exception:
                 pass
 
@@ -242,43 +406,57 @@ async def websocket_interview(websocket: WebSocket):
             if not query.strip():
                 continue
 
-            await websocket.send_json({
+            await channel.send_json({
                 "type": "status",
                 "status": "processing"
             })
 
+            turn_started = time.perf_counter()
             # Increase question counter and choose appropriate response function
             question_count += 1
-            if question_count < 10:
-                res = response(extracted_texts[file_name], query, chat_histories[file_name])
+            final = question_count >= 10
+
+            # Recent turns verbatim plus a running summary of older ones, kept under PROMPT_TOKEN_BUDGET
+            stage = min(len(turns) * 10, 100)
+            # Only the resume chunks relevant to this answer plus the least-covered areas
+            with track("prompt_build"):
+                resume_context = resume_index.select_context(query)
+                history, prompt_tokens = prompt_context.build(resume_context, query, turns, final, stage)
+
+            if stream:
+                res = await stream_turn(channel, resume_context, query, history, final, stage)
+                await record_turn(query, res, prompt_tokens)
+                message = {
+                    "type": "response_end",
+                    "response": res,
+                    "prompt_tokens": prompt_tokens
+                }
+                if final:
+                    message["finished"] = True
+                await channel.send_json(message)
             else:
-                res = end_response(extracted_texts[file_name], query, chat_histories[file_name])
-
-            chat_histories[file_name] += f"User: {query}\nAssistant: {res}\n"
-
-            synthesis_input = texttospeech.SynthesisInput(text=res)
-            synthesis_response = tts_client.synthesize_speech(
-                input=synthesis_input, 
-                voice=voice_params, 
-                audio_config=audio_config
-            )
-
-            audio_base64 = base64.b64encode(synthesis_response.audio_content).decode("utf-8")
-            audio_url = await upload_audio_to_cloudinary(audio_base64)
-
-            # Build the response message and include the finished flag on the 10th question.
-            message = {
-                "type": "response",
-                "response": res,
-                "audio": audio_url
-            }
-            if question_count == 10:
-                message["finished"] = True
-
-            await websocket.send_json(message)
+                if not final:
+                    res = await response_async(resume_context, query, history, stage)
+                else:
+                    res = await end_response_async(resume_context, query, history)
+
+                await record_turn(query, res, prompt_tokens)
+
+                audio_url, audio_content, audio_error = await synthesize_audio(res, channel.binary_audio)
+
+                # Build the response message and include the finished flag on the 10th question.
+                message = {
+                    "type": "response",
+                    "response": res,
+                    "prompt_tokens": prompt_tokens
+                }
+                if final:
+                    message["finished"] = True
+                await channel.send_with_audio(message, audio_url, audio_content, audio_error)
+            observe_stage("turn", time.perf_counter() - turn_started)
 
             # If finished, break the loop so no further queries are processed.
-            if question_count == 10:
+            if final:
                 break
 
     except asyncio.TimeoutError:
@@ -288,10 +466,7 @@ async def websocket_interview(websocket: WebSocket):
             pass
 
     except WebSocketDisconnect:
-        if file_name and file_name in active_connections and websocket in active_connections[file_name]:
-            active_connections[file_name].remove(websocket)
-            if not active_connections[file_name]:
-                del active_connections[file_name]
+        pass
 
     except Exception as e:
         error_message = f"Error: {str(e)}"
@@ -301,6 +476,11 @@ async def websocket_interview(websocket: WebSocket):
             pass
 
     finally:
+        # Every exit (finished interview, error or disconnect) releases the connection
+        if file_name and file_name in active_connections and websocket in active_connections[file_name]:
+            active_connections[file_name].remove(websocket)
+            if not active_connections[file_name]:
+                del active_connections[file_name]
         if ping_task:
             ping_task.cancel()
             try:
@@ -315,152 +495,314 @@ from typing import Optional, List
 class ConversationPayload(BaseModel):
     messages: List[ConversationMessage]
     id: Optional[str] = None  # optional identifier if needed for video lookup
+    rubric_id: Optional[str] = None  # company rubric to score with; the default rubric when omitted
+SCORECARD_TIMEOUT_SECONDS = float(os.getenv("SCORECARD_TIMEOUT_SECONDS", "120"))
+VIDEO_ANALYSIS_TIMEOUT_SECONDS = float(os.getenv("VIDEO_ANALYSIS_TIMEOUT_SECONDS", "300"))
+
+async def _generate_scorecard_blocking(conversation: dict, criteria=None) -> dict:
+    try:
+        return await run_blocking(generate_scorecard, conversation, criteria, timeout=SCORECARD_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return {
+            "error": f"Scorecard generation timed out after {SCORECARD_TIMEOUT_SECONDS:g}s",
+            "message": "Failed to generate scorecard"
+        }
+
+async def generate_scorecard_with_timeout(conversation: dict, criteria=None) -> dict:
+    # Cached by transcript + rubric + model, so re-analysing the same interview
+    # returns the stored evaluation instead of another LLM call.
+    with track("scorecard"):
+        return await cached_scorecard(conversation, _generate_scorecard_blocking, criteria)
+
+async def rubric_criteria(rubric_id: Optional[str]):
+    try:
+        return await run_blocking(rubrics.criteria, rubric_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Rubric not found.")
+
+async def wait_for_video_analysis(video_job):
+    """
+    Wait up to VIDEO_ANALYSIS_TIMEOUT_SECONDS for the emotion analysis. On timeout
+    the job keeps running and the caller gets its job_id to poll
+    /analyze_video/{job_id} later, so the scorecard is never held back.
+    """
+    if video_job is None:
+        return None
+    try:
+        video_job = await video_analysis_jobs.wait(video_job["job_id"], timeout=VIDEO_ANALYSIS_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return {"status": "pending", "job_id": video_job["job_id"], "error": "Video analysis is still running"}
+    if video_job["status"] == "completed":
+        return video_job["result"]
+    return {"status": video_job["status"], "job_id": video_job["job_id"], "error": video_job["error"]}
+
+async def recording_url(file_name: str):
+    """
+    URL of the interview recording for ``file_name``. A recording whose storage
+    upload is still running is waited for (the client may end the chat right
+    after /upload-video), and one that never reached storage is analysed from
+    its local copy. None when there is no recording.
+    """
+    video_url = await video_urls.aget(file_name)
+    if video_url:
+        return video_url
+    video_url = await wait_for_stored_video(file_name, timeout=VIDEO_ANALYSIS_TIMEOUT_SECONDS)
+    if video_url:
+        return video_url
+    if os.path.exists(local_video_path(file_name)):
+        return local_video_url(file_name)
+    return None
+
+async def analyse_recording(file_name: Optional[str]):
+    """Find the recording for ``file_name`` and wait for its emotion analysis (see wait_for_video_analysis)."""
+    if not file_name:
+        return None
+    try:
+        video_url = await recording_url(file_name)
+    except asyncio.TimeoutError:
+        return {"status": "pending", "job_id": None, "error": "The recording is still being stored"}
+    print(f"Using video URL: {video_url}")
+    if not video_url:
+        return None
+    return await wait_for_video_analysis(submit_video_analysis(video_url))
+
+def turns_from_transcript(conversation_data: List[ConversationMessage]) -> List[Turn]:
+    """Pair each user message with the assistant reply that follows it; a leading intro message is skipped."""
+    turns = []
+    pending_user = None
+    for message in conversation_data:
+        if message.type.lower() == "user":
+            pending_user = message.text
+        elif message.type.lower() == "assistant" and pending_user is not None:
+            turns.append(Turn.create(pending_user, message.text))
+            pending_user = None
+    return turns
+
+idempotent_requests = IdempotentRequests(session_store)
+
 # Modified end_chat function to use the global video_urls dictionary
 @router.delete("/end_chat")
-async def end_chat(payload: ConversationPayload):
-    conversation_data = payload.messages.copy()
-    messages = []
-    
-    # Handle intro message if present
-    intro_message = None
-    if conversation_data and conversation_data[0].type.lower() == "assistant":
-        intro_message = conversation_data.pop(0).text
-    
-    # Pair up messages
-    for i in range(0, len(conversation_data), 2):
-        if i + 1 < len(conversation_data):
-            user_msg = conversation_data[i]
-            assistant_msg = conversation_data[i + 1]
-            if user_msg.type.lower() == "user" and assistant_msg.type.lower() == "assistant":
-                messages.append({
-                    "user": user_msg.text,
-                    "response": assistant_msg.text
-                })
+async def end_chat(payload: ConversationPayload, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    with track("end_chat"):
+        if not idempotency_key:
+            return await _end_chat(payload)
+        # A retried request with the same key gets the stored response back; failed
+        # scorecards are not stored, so those retries run again.
+        fingerprint = hashlib.sha256(payload.model_dump_json().encode("utf-8")).hexdigest()
+        try:
+            return await idempotent_requests.run(
+                idempotency_key, fingerprint, lambda: _end_chat(payload),
+                should_store=lambda response: "error" not in response[0]
+            )
+        except IdempotencyConflict as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+async def _end_chat(payload: ConversationPayload):
+    criteria = await rubric_criteria(payload.rubric_id)
+    # Prefer the server-side turn log: it is complete and lossless. Fall back to
+    # pairing the client's transcript for sessions this server never saw.
+    turns = await TurnLog(session_store, payload.id).aturns() if payload.id else []
+    if not turns:
+        turns = turns_from_transcript(payload.messages)
+    messages = turns_to_messages(turns)
     
     # Prepare conversation structure for analysis
     conversation = {"messages": messages}
-    print(' Payload ',payload.id)
-    print(payload)
     if payload.id:
         conversation["_id"] = payload.id
     
-    # Retrieve video URL from global dictionary
-    video_url = None
-    if payload.id:
-        # Access the video URL from the global dictionary
-        global video_urls
-        print("Video urls",video_urls)
-        video_url = video_urls.get(payload.id)
-        print(f"Found video URL from global dictionary: {video_url}")
-        
-        # Fall back to checking local files if URL not found in global dict
-        if not video_url:
-            video_uploads_dir = "video_uploads"
-            if os.path.exists(video_uploads_dir) and os.path.isdir(video_uploads_dir):
-                video_files = [
-                    f for f in os.listdir(video_uploads_dir)
-                    if f.startswith(f"{payload.id}-interview")
-                ]
-                if video_files:
-                    latest_video = sorted(
-                        video_files,
-                        key=lambda x: os.path.getmtime(os.path.join(video_uploads_dir, x)),
-                        reverse=True
-                    )[0]
-                    video_url = f"/video_uploads/{latest_video}"
-                    print(f"Found video URL from local file: {video_url}")
-    
-    print(f"Using video URL: {video_url}")
-    
-    # Generate interview evaluation scorecard
-    result = generate_scorecard(conversation)
-    
-    emotion_data = None
-    if video_url:
-        emotion_data = analyze_video_emotion_from_cloud_url(video_url)
+    # The scorecard and the video analysis are independent, so run them side by
+    # side: end-of-interview latency is the slower of the two, not their sum.
+    result, emotion_data = await asyncio.gather(
+        generate_scorecard_with_timeout(conversation, criteria),
+        analyse_recording(payload.id)
+    )
 
     return result, conversation, emotion_data
 
 
 
+class VideoAnalysisRequest(BaseModel):
+    video_url: Optional[str] = None
+    file_name: Optional[str] = None  # looks up the URL stored by /upload-video
+
+@router.post("/analyze_video")
+async def analyze_video(payload: VideoAnalysisRequest):
+    video_url = payload.video_url or await video_urls.aget(payload.file_name)
+    if not video_url:
+        raise HTTPException(status_code=404, detail="Video URL for the requested file not found.")
+    return submit_video_analysis(video_url)
+
+@router.get("/analyze_video/{job_id}")
+async def analyze_video_status(job_id: str, wait: float = 0):
+    """Job status and result; ``wait`` long-polls up to that many seconds for completion."""
+    if video_analysis_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if wait > 0:
+        try:
+            await video_analysis_jobs.wait(job_id, timeout=min(wait, 60))
+        except asyncio.TimeoutError:
+            pass
+    return video_analysis_jobs.get(job_id)
+
 @router.post("/analyze_interview")
-async def analyze_interview(file_name: str):
-    if file_name not in chat_histories:
+async def analyze_interview(file_name: str, rubric_id: Optional[str] = None):
+    if not await extracted_texts.acontains(file_name):
         raise HTTPException(status_code=404, detail="Chat history for the requested file not found.")
+    criteria = await rubric_criteria(rubric_id)
     
-    # Convert stored chat history string into a structured conversation transcript
-    conversation_history = chat_histories[file_name]
-    print(conversation_history)
-    messages = []
-    # Filter out any empty lines caused by trailing newlines
-    lines = [line for line in conversation_history.strip().split("\n") if line]
-    
-    for i in range(0, len(lines), 2):
-        if i + 1 < len(lines):
-            user_line = lines[i]
-            assistant_line = lines[i + 1]
-            if user_line.startswith("User: ") and assistant_line.startswith("Assistant: "):
-                user_text = user_line[len("User: "):].strip()
-                assistant_text = assistant_line[len("Assistant: "):].strip()
-                messages.append({"user": user_text, "response": assistant_text})
+    # The turn log is already structured, so answers containing newlines are kept intact
+    messages = turns_to_messages(await TurnLog(session_store, file_name).aturns())
     
     conversation = {"messages": messages, "_id": file_name}
     
-    # Generate the interview evaluation scorecard using hardcoded criteria
-    result = generate_scorecard(conversation)
+    # Generate the interview evaluation scorecard with the selected rubric
+    result = await generate_scorecard_with_timeout(conversation, criteria)
     return result
+
+@router.get("/rubrics")
+async def list_rubrics(company: Optional[str] = None):
+    return await run_blocking(rubrics.list, company)
+
+@router.post("/rubrics")
+async def create_rubric(scorecard: ScoreCard):
+    return await run_blocking(rubrics.save, scorecard)
+
+@router.get("/rubrics/{rubric_id}")
+async def get_rubric(rubric_id: str):
+    rubric = await run_blocking(rubrics.get, rubric_id)
+    if rubric is None:
+        raise HTTPException(status_code=404, detail="Rubric not found.")
+    return rubric
+
+@router.put("/rubrics/{rubric_id}")
+async def update_rubric(rubric_id: str, scorecard: ScoreCard):
+    if rubric_id == DEFAULT_RUBRIC_ID:
+        raise HTTPException(status_code=400, detail="The default rubric cannot be changed.")
+    if await run_blocking(rubrics.get, rubric_id) is None:
+        raise HTTPException(status_code=404, detail="Rubric not found.")
+    return await run_blocking(rubrics.save, scorecard, rubric_id)
+
+@router.delete("/rubrics/{rubric_id}")
+async def delete_rubric(rubric_id: str):
+    if rubric_id == DEFAULT_RUBRIC_ID:
+        raise HTTPException(status_code=400, detail="The default rubric cannot be deleted.")
+    if not await run_blocking(rubrics.delete, rubric_id):
+        raise HTTPException(status_code=404, detail="Rubric not found.")
+    return {"message": "Rubric deleted", "id": rubric_id}
+
+class BatchScoreRequest(BaseModel):
+    # Conversations in generate_scorecard format: {"_id", "messages": [{"user", "response"}]}
+    conversations: Optional[List[dict]] = None
+    # Interviews to score from their stored turn logs
+    file_names: Optional[List[str]] = None
+    # Re-submit an existing batch_id (without conversations) to resume it
+    batch_id: Optional[str] = None
+    # Rubric for conversations that do not carry their own "criteria"
+    rubric_id: Optional[str] = None
+
+@router.post("/batch_score")
+async def batch_score(payload: BatchScoreRequest):
+    if payload.batch_id is not None and not valid_batch_id(payload.batch_id):
+        raise HTTPException(status_code=400, detail="batch_id may only contain letters, digits, '-' and '_'.")
+    conversations = list(payload.conversations or [])
+    for file_name in payload.file_names or []:
+        messages = turns_to_messages(await TurnLog(session_store, file_name).aturns())
+        conversations.append({"messages": messages, "_id": file_name})
+    if not conversations and payload.batch_id is None:
+        raise HTTPException(status_code=400, detail="Provide conversations, file_names or a batch_id to resume.")
+    criteria = await rubric_criteria(payload.rubric_id)
+    if criteria is not None:
+        conversations = [{"criteria": criteria, **conversation} for conversation in conversations]
+    try:
+        return await submit_batch(conversations, payload.batch_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/batch_score/{batch_id}")
+async def batch_score_status(batch_id: str):
+    status = batch_status(batch_id) if valid_batch_id(batch_id) else None
+    if status is None:
+        raise HTTPException(status_code=404, detail="Batch not found.")
+    return status
+
+@router.get("/batch_score/{batch_id}/results")
+async def batch_score_results(batch_id: str):
+    """Scorecards written so far, one JSON object per line."""
+    output_path = batch_paths(batch_id)[1] if valid_batch_id(batch_id) else None
+    if output_path is None or not os.path.exists(output_path):
+        raise HTTPException(status_code=404, detail="No results for this batch yet.")
+    return FileResponse(output_path, media_type="application/x-ndjson")
+
+def _remember_video_url(file_name: str, video_url: str):
+    video_urls[file_name] = video_url
+
 @router.post("/upload-video")
 async def upload_video(
     file_name: str = Form(...),
     video: UploadFile = File(...)
 ):
     try:
-        # Create directory if it doesn't exist
-        video_uploads_dir = "video_uploads"
-        os.makedirs(video_uploads_dir, exist_ok=True)
-        
-        # Save the video file locally
-        file_path = os.path.join(video_uploads_dir, f"{file_name}-interview.webm")
-        contents = await video.read()
-        
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        
-        # Upload to Cloudinary for storage
-        try:
-            upload_result = cloudinary.uploader.upload(
-                file_path,
-                resource_type="video",
-                folder="interview_recordings",
-                public_id=f"{file_name}-interview"
-            )
-            
-            video_url = upload_result["secure_url"]
-        except Exception as cloud_error:
-            print(f"Cloudinary upload error: {str(cloud_error)}")
-            # If Cloudinary fails, we'll still keep the local file and use a local URL
-            video_url = f"http://localhost:8000/video_uploads/{file_name}-interview.webm"
-            
-            # Don't delete the local file if Cloudinary upload failed
-            return {
-                "message": "Video saved locally",
-                "video_url": video_url,
-                "note": "Cloudinary upload failed, using local storage"
-            }
-        
-        # Store the URL in the global dictionary
-        global video_urls
-        video_urls[file_name] = video_url
-        print(f"Stored video URL: {file_name} -> {video_url}")
-        
-        # Clean up local file after successful upload
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        
+        # Copied to disk in fixed-size chunks; the storage upload runs in the background.
+        job = await save_upload_file(video, file_name, on_stored=_remember_video_url)
         return {
-            "message": "Video uploaded successfully",
-            "video_url": video_url
+            "message": "Video received, storage upload in progress",
+            "upload_id": job["upload_id"],
+            "status": job["status"],
+            "video_url": local_video_url(file_name)
         }
     
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error uploading video: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error uploading video: {str(e)}")
+
+@router.post("/upload-video/init")
+async def init_video_upload(file_name: str = Form(...), total_size: Optional[int] = Form(None)):
+    job = await run_blocking(create_upload_job, file_name, total_size)
+    return {"upload_id": job["upload_id"], "offset": job["offset"]}
+
+@router.put("/upload-video/{upload_id}")
+async def upload_video_chunk(upload_id: str, request: Request, offset: int):
+    """
+    Append the raw request body at ``offset``. After a dropped connection the
+    client asks GET /upload-video/{upload_id} for the offset and resumes there.
+    """
+    job = get_upload_job(upload_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload not found.")
+    try:
+        async with exclusive_upload(upload_id):
+            if job["status"] != "uploading":
+                raise HTTPException(status_code=409, detail=f"Upload is already {job['status']}.")
+            if offset != job["offset"]:
+                raise HTTPException(status_code=409, detail={"message": "Offset mismatch", "offset": job["offset"]})
+            new_offset = await append_stream(upload_id, request.stream())
+    except UploadBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"upload_id": upload_id, "offset": new_offset}
+
+@router.post("/upload-video/{upload_id}/complete")
+async def complete_video_upload(upload_id: str):
+    job = get_upload_job(upload_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload not found.")
+    try:
+        async with exclusive_upload(upload_id):
+            if job["status"] != "uploading":
+                raise HTTPException(status_code=409, detail=f"Upload is already {job['status']}.")
+            if job["total_size"] is not None and job["offset"] != job["total_size"]:
+                raise HTTPException(status_code=409, detail={"message": "Upload incomplete", "offset": job["offset"]})
+            job = await complete_upload(upload_id, on_stored=_remember_video_url)
+    except UploadBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {
+        "upload_id": upload_id,
+        "status": job["status"],
+        "video_url": local_video_url(job["file_name"])
+    }
+
+@router.get("/upload-video/{upload_id}")
+async def video_upload_status(upload_id: str):
+    job = get_upload_job(upload_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload not found.")
+    return job
@@ -0,0 +1,28 @@
+import os
+import mimetypes
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from Providers.local_storage import object_path
+
+router = APIRouter()
+
+# Object names are content hashes, so a URL's bytes never change and clients may cache them for good
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.api_route("/{name}", methods=["GET", "HEAD"])
+async def get_object(name: str, request: Request):
+    """
+    Serve an object from the local content-addressed store. Range requests
+    (audio/video seeking, resumed downloads) are answered with 206 partial
+    content, and a matching If-None-Match with 304.
+    """
+    path = object_path(name)
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Object not found.")
+    etag = '"%s"' % name.split(".")[0]
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": etag}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    return FileResponse(path, media_type=media_type, headers=headers)
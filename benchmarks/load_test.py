@@ -0,0 +1,406 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+import statistics
+from datetime import datetime, timezone
+
+# Run from anywhere: the app's packages live one directory up
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+DEFAULT_RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+LAG_PROBE_INTERVAL_SECONDS = 0.05
+
+ANSWER_TOPICS = [
+    "the Kafka consumer rebalancing issue", "our Postgres partitioning scheme", "the payments retry queue",
+    "migrating the monolith to services", "on-call and incident reviews", "load testing the checkout API",
+    "mentoring two junior engineers", "the React dashboard rewrite", "caching product search results",
+    "a disagreement about code review standards",
+]
+
+
+def percentiles(values) -> dict:
+    """count, mean, p50/p95/p99 and max in milliseconds (nearest-rank percentiles)."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered) * 1000, 2),
+        "p50": round(rank(50) * 1000, 2),
+        "p95": round(rank(95) * 1000, 2),
+        "p99": round(rank(99) * 1000, 2),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+
+def resume_pdf(candidate: int) -> bytes:
+    """A small one-page resume, different for every candidate so nothing is served from the extraction cache."""
+    import fitz
+    doc = fitz.open()
+    page = doc.new_page()
+    lines = [f"Candidate {candidate}", "Senior Software Engineer", ""]
+    rng = random.Random(candidate)
+    for topic in rng.sample(ANSWER_TOPICS, 5):
+        lines.append(f"- Led work on {topic} at company {rng.randint(1, 50)}.")
+    page.insert_text((50, 72), "\n".join(lines))
+    return doc.tobytes()
+
+
+def candidate_answer(candidate: int, turn: int) -> str:
+    topic = ANSWER_TOPICS[(candidate + turn) % len(ANSWER_TOPICS)]
+    return f"In turn {turn} I would talk about {topic}, candidate {candidate}, and what I learned from it."
+
+
+class Recorder:
+    """Collects per-stage timings (seconds) and errors from every simulated candidate."""
+
+    def __init__(self):
+        self.timings = {name: [] for name in ("upload", "ttft", "ttfa", "turn", "end_chat", "interview")}
+        self.errors = []
+        self.completed = 0
+        self.turns = 0
+
+    def add(self, name: str, seconds: float):
+        self.timings[name].append(seconds)
+
+    def error(self, candidate: int, stage: str, exc):
+        self.errors.append({"candidate": candidate, "stage": stage, "error": f"{type(exc).__name__}: {exc}"})
+
+
+class LoopLagProbe:
+    """
+    Measures how late the server's event loop wakes up from a short sleep; any
+    delay beyond the interval is time some callback held the loop.
+    """
+
+    def __init__(self, interval: float = LAG_PROBE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.samples = []
+        self.active = False
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            if self.active:
+                self.samples.append(max(0.0, loop.time() - started - self.interval))
+
+
+class AppServer:
+    """Runs main:app under uvicorn on a free local port in a background thread with its own event loop."""
+
+    def __init__(self):
+        self.lag = LoopLagProbe()
+        self.port = None
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        import socket
+        import uvicorn
+        import main
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        config = uvicorn.Config(main.app, host="127.0.0.1", port=self.port, log_level="warning", ws="websockets")
+        self._server = uvicorn.Server(config)
+
+        async def serve():
+            probe = asyncio.create_task(self.lag.run())
+            try:
+                await self._server.serve()
+            finally:
+                probe.cancel()
+
+        self._thread = threading.Thread(target=asyncio.run, args=(serve(),), name="load-test-server", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 30
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("The app did not start")
+            time.sleep(0.05)
+        return f"http://127.0.0.1:{self.port}"
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=30)
+
+
+async def receive_turn(ws, stream: bool, started: float, recorder: Recorder):
+    """Read one turn's messages; records time to first text, first audio and the whole reply."""
+    first_text = first_audio = None
+    while True:
+        message = await ws.recv()
+        now = time.perf_counter()
+        if isinstance(message, bytes):
+            continue
+        data = json.loads(message)
+        if data.get("audio_bytes") is not None:
+            # Binary audio delivery: the MP3 is the frame right after this header
+            await ws.recv()
+            now = time.perf_counter()
+            first_audio = first_audio or now
+        kind = data.get("type")
+        if "error" in data and kind is None:
+            raise RuntimeError(data["error"])
+        if kind in ("ping", "status"):
+            continue
+        if kind == "response_chunk":
+            first_text = first_text or now
+        if data.get("audio"):
+            # Audio delivered as a URL
+            first_audio = first_audio or now
+        if (stream and kind == "response_end") or (not stream and kind == "response"):
+            first_text = first_text or now
+            recorder.add("ttft", first_text - started)
+            if first_audio is not None:
+                recorder.add("ttfa", first_audio - started)
+            recorder.add("turn", now - started)
+            return data
+
+
+async def run_candidate(candidate: int, base_url: str, args, recorder: Recorder, http):
+    import websockets
+    file_name = f"loadtest-{args.run_id}-{candidate}.pdf"
+    stage = "upload"
+    interview_started = time.perf_counter()
+    try:
+        started = time.perf_counter()
+        response = await http.post(
+            f"{base_url}/interview/upload",
+            files={"file": (file_name, resume_pdf(candidate), "application/pdf")},
+        )
+        response.raise_for_status()
+        recorder.add("upload", time.perf_counter() - started)
+
+        stage = "ws"
+        ws_url = base_url.replace("http", "ws", 1) + "/interview/ws/chat"
+        async with websockets.connect(ws_url, max_size=None, open_timeout=30) as ws:
+            await ws.send(json.dumps({"file_name": file_name, "stream": args.stream, "audio_delivery": args.audio_delivery}))
+            for turn in range(args.turns):
+                started = time.perf_counter()
+                await ws.send(json.dumps({"query": candidate_answer(candidate, turn)}))
+                data = await asyncio.wait_for(receive_turn(ws, args.stream, started, recorder), args.turn_timeout)
+                recorder.turns += 1
+                if data.get("finished"):
+                    break
+                if args.think_time:
+                    await asyncio.sleep(args.think_time)
+
+        if args.video:
+            stage = "upload-video"
+            response = await http.post(
+                f"{base_url}/interview/upload-video",
+                files={"video": ("interview.webm", os.urandom(args.video_kb * 1024), "video/webm")},
+                data={"file_name": file_name},
+            )
+            response.raise_for_status()
+
+        stage = "end_chat"
+        started = time.perf_counter()
+        response = await http.request(
+            "DELETE", f"{base_url}/interview/end_chat",
+            json={"messages": [], "id": file_name}, timeout=args.end_chat_timeout,
+        )
+        response.raise_for_status()
+        body = response.json()
+        if isinstance(body, list) and isinstance(body[0], dict) and "error" in body[0]:
+            raise RuntimeError(body[0]["error"])
+        recorder.add("end_chat", time.perf_counter() - started)
+        recorder.add("interview", time.perf_counter() - interview_started)
+        recorder.completed += 1
+    except Exception as e:
+        recorder.error(candidate, stage, e)
+
+
+async def drive(base_url: str, args, recorder: Recorder, lag: LoopLagProbe = None) -> float:
+    """Start ``args.candidates`` interviews spread over ``args.ramp`` seconds; returns the wall time."""
+    import httpx
+    limits = httpx.Limits(max_connections=args.candidates * 2, max_keepalive_connections=args.candidates)
+    async with httpx.AsyncClient(timeout=args.turn_timeout, limits=limits) as http:
+        if lag:
+            lag.active = True
+        started = time.perf_counter()
+        tasks = []
+        for candidate in range(args.candidates):
+            if args.ramp and candidate:
+                await asyncio.sleep(args.ramp / args.candidates)
+            tasks.append(asyncio.create_task(run_candidate(candidate, base_url, args, recorder, http)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        if lag:
+            lag.active = False
+    return elapsed
+
+
+def configure_environment(args):
+    """Provider mode and fake latencies must be set before the app is imported."""
+    os.environ["PROVIDER_MODE"] = args.provider_mode
+    for kind in ("llm", "tts", "storage", "video"):
+        latency = getattr(args, f"{kind}_latency_ms")
+        if latency is not None:
+            os.environ[f"FAKE_{kind.upper()}_LATENCY_MS"] = str(latency)
+        if args.error_rate is not None:
+            os.environ[f"FAKE_{kind.upper()}_ERROR_RATE"] = str(args.error_rate)
+    os.environ.setdefault("FAKE_SEED", str(args.seed))
+    os.environ.setdefault("SESSION_STORE", "memory")
+
+
+def build_report(args, recorder: Recorder, elapsed: float, lag_samples) -> dict:
+    return {
+        "run_id": args.run_id,
+        "started_at": args.started_at,
+        "config": {
+            "candidates": args.candidates,
+            "turns": args.turns,
+            "stream": args.stream,
+            "audio_delivery": args.audio_delivery,
+            "video": args.video,
+            "ramp_seconds": args.ramp,
+            "think_time_seconds": args.think_time,
+            "url": args.url,
+            "provider_mode": args.provider_mode,
+            "fake_latency_ms": {kind: os.getenv(f"FAKE_{kind.upper()}_LATENCY_MS") for kind in ("llm", "tts", "storage", "video")},
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+        },
+        "duration_seconds": round(elapsed, 3),
+        "interviews": {"completed": recorder.completed, "failed": args.candidates - recorder.completed},
+        "throughput": {
+            "interviews_per_second": round(recorder.completed / elapsed, 3) if elapsed else 0,
+            "turns_per_second": round(recorder.turns / elapsed, 3) if elapsed else 0,
+        },
+        "latency_ms": {name: percentiles(values) for name, values in recorder.timings.items()},
+        "event_loop_lag_ms": percentiles(lag_samples) if lag_samples is not None else None,
+        "errors": recorder.errors[:50],
+        "error_count": len(recorder.errors),
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """
+    Print p50/p95/p99 against a previous run and return the metrics that got
+    more than ``threshold`` percent slower.
+    """
+    regressions = []
+    print(f"\nCompared with {baseline.get('run_id')} ({baseline.get('started_at')}):")
+    sections = dict(report["latency_ms"], event_loop_lag=report["event_loop_lag_ms"] or {})
+    base_sections = dict(baseline.get("latency_ms", {}), event_loop_lag=baseline.get("event_loop_lag_ms") or {})
+    for name, current in sections.items():
+        previous = base_sections.get(name) or {}
+        for stat in ("p50", "p95", "p99"):
+            if stat not in current or not previous.get(stat):
+                continue
+            change = (current[stat] - previous[stat]) / previous[stat] * 100
+            flag = ""
+            if change > threshold:
+                flag = "  <- regression"
+                regressions.append(f"{name}.{stat}")
+            print(f"  {name:>15} {stat}: {previous[stat]:>9.1f} -> {current[stat]:>9.1f} ms ({change:+.1f}%){flag}")
+    previous_rate = baseline.get("throughput", {}).get("turns_per_second")
+    if previous_rate:
+        change = (report["throughput"]["turns_per_second"] - previous_rate) / previous_rate * 100
+        print(f"  {'turns/s':>15}     : {previous_rate:>9.2f} -> {report['throughput']['turns_per_second']:>9.2f} ({change:+.1f}%)")
+        if -change > threshold:
+            regressions.append("throughput.turns_per_second")
+    return regressions
+
+
+def print_summary(report: dict):
+    print(f"\n{report['interviews']['completed']}/{report['config']['candidates']} interviews in "
+          f"{report['duration_seconds']}s: {report['throughput']['interviews_per_second']} interviews/s, "
+          f"{report['throughput']['turns_per_second']} turns/s")
+    rows = dict(report["latency_ms"])
+    if report["event_loop_lag_ms"] is not None:
+        rows["event_loop_lag"] = report["event_loop_lag_ms"]
+    print(f"  {'ms':>15} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for name, stats in rows.items():
+        if stats.get("count"):
+            print(f"  {name:>15} {stats['count']:>7} {stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f} {stats['max']:>9.1f}")
+    if report["error_count"]:
+        print(f"  {report['error_count']} errors, first: {report['errors'][0]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load_test",
+        description="Drive concurrent simulated interviews (upload, websocket turns, end_chat) and report latencies.",
+    )
+    parser.add_argument("-n", "--candidates", type=int, default=20, help="Concurrent simulated candidates")
+    parser.add_argument("--turns", type=int, default=10, help="Websocket turns per interview (the interview ends at 10)")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Spread candidate start times over this many seconds")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds a candidate waits between turns")
+    parser.add_argument("--stream", action=argparse.BooleanOptionalAction, default=True, help="Sentence streaming mode")
+    parser.add_argument("--audio-delivery", choices=("url", "binary"), default="url")
+    parser.add_argument("--video", action="store_true", help="Upload a recording before end_chat so video analysis runs too")
+    parser.add_argument("--video-kb", type=int, default=512)
+    parser.add_argument("--url", help="Target an already running server instead of starting one (no loop-lag data)")
+    parser.add_argument("--provider-mode", default="fake", choices=("fake", "replay", "live", "record"))
+    parser.add_argument("--llm-latency-ms", type=float)
+    parser.add_argument("--tts-latency-ms", type=float)
+    parser.add_argument("--storage-latency-ms", type=float)
+    parser.add_argument("--video-latency-ms", type=float)
+    parser.add_argument("--error-rate", type=float, help="FAKE_<KIND>_ERROR_RATE for every provider kind")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--turn-timeout", type=float, default=120.0)
+    parser.add_argument("--end-chat-timeout", type=float, default=300.0)
+    parser.add_argument("-o", "--output", help=f"Results JSON (default: {os.path.relpath(DEFAULT_RESULTS_DIR)}/<run id>.json)")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0,
+                        help="With --baseline, exit non-zero if a percentile gets this many percent slower")
+    args = parser.parse_args(argv)
+    args.started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    args.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    output_path = os.path.abspath(args.output or os.path.join(DEFAULT_RESULTS_DIR, f"{args.run_id}.json"))
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    recorder = Recorder()
+    if args.url:
+        elapsed = asyncio.run(drive(args.url.rstrip("/"), args, recorder))
+        lag_samples = None
+    else:
+        configure_environment(args)
+        # Caches and uploads go to a scratch directory so every run starts cold
+        # and runs stay comparable.
+        with tempfile.TemporaryDirectory(prefix="interview-load-test-") as workdir:
+            os.chdir(workdir)
+            server = AppServer()
+            base_url = server.start()
+            try:
+                elapsed = asyncio.run(drive(base_url, args, recorder, server.lag))
+            finally:
+                server.stop()
+                os.chdir(REPO_ROOT)
+        lag_samples = server.lag.samples
+
+    report = build_report(args, recorder, elapsed, lag_samples)
+    print_summary(report)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output_path}")
+
+    status = 0 if report["interviews"]["failed"] == 0 else 1
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        if regressions:
+            print(f"Regressions over {args.max_regression:g}%: {', '.join(regressions)}")
+            status = 2
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
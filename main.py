@@ -1,7 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import Response
 from Routes.conversation import router as conversation_router
+from Routes.admin import router as admin_router
+from Routes.storage import router as storage_router
+from Functions.pdf_pool import shutdown_pool, ensure_pool
+from Functions.metrics import registry, CONTENT_TYPE
+from Functions.loop_watchdog import loop_watchdog, LOOP_WATCHDOG_ENABLED
+from Providers.registry import warm_up_providers, PROVIDER_WARMUP
+import asyncio
 import os
 import uvicorn
 
@@ -20,6 +28,38 @@ os.makedirs("video_uploads", exist_ok=True)
 # Mount the directory as a static files directory
 app.mount("/video_uploads", StaticFiles(directory="video_uploads"), name="video_uploads")
 app.include_router(conversation_router, prefix="/interview", tags=["conversation"])
+app.include_router(admin_router, prefix="/admin", tags=["admin"])
+# Objects of the local storage backend (STORAGE_BACKEND=local)
+app.include_router(storage_router, prefix="/storage", tags=["storage"])
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Prometheus text format; per-worker, so scrape each worker (or run one per pod)
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+@app.on_event("startup")
+async def start_loop_watchdog():
+    if LOOP_WATCHDOG_ENABLED:
+        loop_watchdog.start()
+
+_warm_up_task = None
+
+@app.on_event("startup")
+async def start_provider_warm_up():
+    # In the background, so the worker accepts requests while SDKs load and connections open
+    global _warm_up_task
+    if PROVIDER_WARMUP:
+        _warm_up_task = asyncio.create_task(warm_up_providers())
+
+@app.on_event("startup")
+async def start_pdf_pool():
+    # Worker processes start on the shared thread pool, not on the first resume upload
+    await ensure_pool()
+
+@app.on_event("shutdown")
+def stop_pdf_pool():
+    shutdown_pool()
+    loop_watchdog.stop()
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", reload=True)
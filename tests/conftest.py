@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# Modules read their configuration at import time, so the environment is set
+# before anything from the app is imported: fake providers (no credentials or
+# network), the in-process session store and a scratch working directory for
+# the caches and uploads.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="interview-tests-"))
+for name in ("private_key", "project_id", "region", "GOOGLE_API_KEY", "GOOGLE_APPLICATION_CREDENTIALS"):
+    os.environ.pop(name, None)
+os.environ.update(
+    PROVIDER_MODE="fake",
+    PROVIDER_WARMUP="false",
+    SESSION_STORE="memory",
+    LOOP_WATCHDOG_ENABLED="false",
+    VIDEO_PREPROCESS_PROFILE="off",
+    PDF_POOL_WORKERS="2",
+    FAKE_LLM_LATENCY_MS="0",
+    FAKE_TTS_LATENCY_MS="0",
+    FAKE_STORAGE_LATENCY_MS="0",
+    FAKE_VIDEO_LATENCY_MS="0",
+)
+
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+    from fastapi.testclient import TestClient
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def resume_pdf():
+    import fitz
+    document = fitz.open()
+    page = document.new_page()
+    page.insert_text((50, 72), "Jane Doe. Python, Kafka, Postgres. Built a payments platform at Acme.")
+    return document.tobytes()
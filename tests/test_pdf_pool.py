@@ -0,0 +1,51 @@
+import time
+import asyncio
+import pytest
+import Functions.pdf_pool as pdf_pool
+from Functions.pdf_pool import PDFExtractionTimeout, PDF_POOL_WORKERS
+
+
+async def _wait_for_full_pool():
+    while pdf_pool._idle is None or pdf_pool._idle.qsize() < PDF_POOL_WORKERS:
+        await asyncio.sleep(0.05)
+
+
+def test_waiting_for_a_worker_does_not_count_against_the_timeout(client, resume_pdf, monkeypatch):
+    monkeypatch.setattr(pdf_pool, "PDF_EXTRACT_TIMEOUT_SECONDS", 1.0)
+
+    async def scenario():
+        await _wait_for_full_pool()
+        # Two rounds of slow documents on every worker, each within the limit
+        busy = [asyncio.ensure_future(pdf_pool._run_in_worker(time.sleep, 0.9)) for _ in range(2 * PDF_POOL_WORKERS)]
+        await asyncio.sleep(0.1)
+        started = time.monotonic()
+        extraction = await pdf_pool.extract_in_pool(resume_pdf)
+        waited = time.monotonic() - started
+        await asyncio.gather(*busy)
+        return extraction, waited
+
+    extraction, waited = client.portal.call(scenario)
+    assert waited > pdf_pool.PDF_EXTRACT_TIMEOUT_SECONDS
+    assert extraction["page_count"] == 1
+
+
+def test_a_hung_pdf_only_recycles_its_own_worker(client, monkeypatch):
+    monkeypatch.setattr(pdf_pool, "PDF_EXTRACT_TIMEOUT_SECONDS", 1.5)
+
+    async def scenario():
+        await _wait_for_full_pool()
+        pids = {worker.process.pid for worker in pdf_pool._workers}
+        hung = asyncio.ensure_future(pdf_pool._run_in_worker(time.sleep, 30))
+        await asyncio.sleep(0.5)
+        # Still parsing when the hung worker is killed
+        neighbour = asyncio.ensure_future(pdf_pool._run_in_worker(time.sleep, 1.2))
+        with pytest.raises(PDFExtractionTimeout):
+            await hung
+        assert not neighbour.done()
+        await neighbour
+        await _wait_for_full_pool()
+        return pids, {worker.process.pid for worker in pdf_pool._workers}
+
+    before, after = client.portal.call(scenario)
+    assert len(after) == PDF_POOL_WORKERS
+    assert len(before & after) == PDF_POOL_WORKERS - 1
@@ -0,0 +1,37 @@
+import Functions.create_analysis_to_chats as scorecards
+from Providers.registry import get_llm, EVALUATOR_MODEL
+from Functions.scorecard_cache import scorecard_cache_key
+
+CONVERSATION = {
+    "_id": "scorecard.pdf",
+    "messages": [{"user": "I built the ingestion service in Go.", "response": "How did you test it?"}],
+}
+
+
+def test_scorecards_use_the_configured_evaluator_model(monkeypatch):
+    evaluator = get_llm("evaluator")
+    calls = []
+    complete = evaluator.complete
+
+    def spy(prompt, system=None, cache_system=False, **options):
+        calls.append(options)
+        return complete(prompt, system, cache_system, **options)
+
+    monkeypatch.setattr(evaluator, "complete", spy)
+    result = scorecards.request_scorecard(CONVERSATION)
+
+    assert "error" not in result
+    assert calls[0]["model"] == EVALUATOR_MODEL
+    assert not hasattr(scorecards, "SCORECARD_MODEL")
+
+
+def test_the_cache_key_follows_the_evaluator_model():
+    assert scorecard_cache_key(CONVERSATION) == scorecard_cache_key(CONVERSATION, model=EVALUATOR_MODEL)
+    assert scorecard_cache_key(CONVERSATION) != scorecard_cache_key(CONVERSATION, model="another-model")
+
+
+def test_only_the_default_rubric_asks_for_elaborate_technical_analysis():
+    custom = [dict(criterion, top_score=10) for criterion in scorecards.SCORECARD_CRITERIA]
+    assert scorecards.SCORECARD_DEFAULT_GUIDANCE in scorecards.compile_rubric_prompt()
+    assert scorecards.SCORECARD_DEFAULT_GUIDANCE in scorecards.compile_rubric_prompt(scorecards.SCORECARD_CRITERIA)
+    assert scorecards.SCORECARD_DEFAULT_GUIDANCE not in scorecards.compile_rubric_prompt(custom)
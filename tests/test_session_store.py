@@ -0,0 +1,37 @@
+import threading
+import pytest
+from Functions.session_store import session_store
+
+STORE_METHODS = ("get", "set", "delete", "contains", "keys", "append", "get_list")
+
+
+@pytest.fixture
+def store_threads(monkeypatch):
+    """Treat the in-process store like a shared one and record which thread every call runs on."""
+    threads = []
+    monkeypatch.setattr(session_store, "blocking", True)
+    for name in STORE_METHODS:
+        def spy(*args, _method=getattr(session_store, name), **kwargs):
+            threads.append(threading.current_thread().name)
+            return _method(*args, **kwargs)
+        monkeypatch.setattr(session_store, name, spy)
+    return threads
+
+
+def test_interview_requests_keep_store_io_off_the_event_loop(client, resume_pdf, store_threads):
+    assert client.post("/interview/upload", files={"file": ("store.pdf", resume_pdf, "application/pdf")}).status_code == 200
+    with client.websocket_connect("/interview/ws/chat") as ws:
+        ws.send_json({"file_name": "store.pdf"})
+        ws.send_json({"query": "I mostly work on backend services"})
+        while ws.receive_json()["type"] != "response":
+            pass
+    response = client.request(
+        "DELETE", "/interview/end_chat", json={"messages": [], "id": "store.pdf"}, headers={"Idempotency-Key": "store-io"}
+    )
+    assert response.status_code == 200
+    assert response.json()[1]["messages"][0]["user"] == "I mostly work on backend services"
+    assert client.post("/interview/analyze_interview", params={"file_name": "store.pdf"}).status_code == 200
+    assert client.get("/interview/rubrics").status_code == 200
+
+    assert store_threads
+    assert all(name.startswith("blocking-io") for name in store_threads), set(store_threads)
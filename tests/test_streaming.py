@@ -0,0 +1,29 @@
+import asyncio
+from Functions.response_to_question import stream_sentences, MIN_SENTENCE_CHARS
+
+
+async def _collect(query):
+    return [sentence async for sentence in stream_sentences("Jane Doe, Python developer.", query, "")]
+
+
+def test_stream_sentences_yields_whole_sentences():
+    sentences = asyncio.run(_collect("I built a payments platform with Kafka and Postgres"))
+    assert len(sentences) >= 2
+    assert all(len(sentence) >= MIN_SENTENCE_CHARS for sentence in sentences)
+    assert all(sentence.rstrip()[-1] in ".!?" for sentence in sentences)
+
+
+def test_websocket_streams_chunks_then_the_full_reply(client, resume_pdf):
+    assert client.post("/interview/upload", files={"file": ("stream.pdf", resume_pdf, "application/pdf")}).status_code == 200
+    with client.websocket_connect("/interview/ws/chat") as ws:
+        ws.send_json({"file_name": "stream.pdf", "stream": True})
+        ws.send_json({"query": "I mostly work on backend services"})
+        chunks = []
+        while True:
+            message = ws.receive_json()
+            if message["type"] == "response_chunk":
+                chunks.append(message)
+            elif message["type"] == "response_end":
+                break
+    assert [chunk["index"] for chunk in chunks] == list(range(len(chunks)))
+    assert " ".join(chunk["text"] for chunk in chunks) == message["response"]
@@ -0,0 +1,55 @@
+import os
+import json
+import types
+import pytest
+import Functions.analyse_video as analyse_video
+from Model.evaluation import EmotionAnalysis
+from Functions.structured_output import parse_or_repair, StructuredOutputError
+from Functions.video_upload import local_video_path, local_video_url
+
+# Valid JSON in a fence, but missing the required overall_analysis
+MALFORMED_ANALYSIS = '```json\n{"timestamps": {"0:00-0:10": {"confident": 2}}, "interview_strengths": ["Clear"]}\n```'
+
+
+def _failing_repair(prompt, max_tokens):
+    raise TimeoutError("repair request timed out")
+
+
+def test_parse_or_repair_keeps_the_parse_error_when_the_repair_call_fails():
+    with pytest.raises(StructuredOutputError) as error:
+        parse_or_repair(MALFORMED_ANALYSIS, EmotionAnalysis, repair=_failing_repair)
+    assert json.loads(error.value.text)["interview_strengths"] == ["Clear"]
+    assert isinstance(error.value.__cause__, TimeoutError)
+
+
+def test_parse_or_repair_uses_a_successful_repair():
+    def repair(prompt, max_tokens):
+        return json.dumps({"overall_analysis": "Calm and clear."})
+
+    assert parse_or_repair(MALFORMED_ANALYSIS, EmotionAnalysis, repair=repair).overall_analysis == "Calm and clear."
+
+
+def test_video_analysis_falls_back_to_the_raw_text_when_the_repair_call_fails(monkeypatch):
+    class Files:
+        def upload(self, file):
+            return types.SimpleNamespace(uri="gs://recording", name="files/recording", state=types.SimpleNamespace(name="ACTIVE"))
+
+        def delete(self, name):
+            pass
+
+    class Models:
+        def generate_content(self, model, contents, config):
+            if len(contents) == 1:
+                # The text-only repair request
+                raise TimeoutError("repair request timed out")
+            return types.SimpleNamespace(text=MALFORMED_ANALYSIS)
+
+    monkeypatch.setattr(analyse_video, "_client", types.SimpleNamespace(files=Files(), models=Models()))
+    os.makedirs("video_uploads", exist_ok=True)
+    with open(local_video_path("repair-fails.pdf"), "wb") as f:
+        f.write(b"\x1a\x45\xdf\xa3" * 64)
+
+    result = analyse_video.analyze_video_emotion_from_cloud_url(local_video_url("repair-fails.pdf"))
+
+    assert isinstance(result, str)
+    assert json.loads(result)["timestamps"] == {"0:00-0:10": {"confident": 2}}
@@ -0,0 +1,100 @@
+import os
+import time
+import pytest
+import Routes.conversation as conversation
+import Functions.video_upload as video_upload
+from Providers.registry import get_storage
+from Functions.video_upload import local_video_url, local_video_path, uploaded_video_path
+
+RECORDING = b"\x1a\x45\xdf\xa3" * 2048
+
+
+@pytest.fixture
+def submitted_urls(monkeypatch):
+    urls = []
+    submit = conversation.submit_video_analysis
+
+    def spy(video_url):
+        urls.append(video_url)
+        return submit(video_url)
+
+    monkeypatch.setattr(conversation, "submit_video_analysis", spy)
+    return urls
+
+
+def _upload(client, file_name):
+    response = client.post(
+        "/interview/upload-video",
+        files={"video": ("interview.webm", RECORDING, "video/webm")},
+        data={"file_name": file_name},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_end_chat_right_after_upload_waits_for_storage(client, monkeypatch, submitted_urls):
+    # The storage upload is still running when the chat ends
+    monkeypatch.setattr(get_storage().faults, "latency", 0.5)
+    upload = _upload(client, "right-after.pdf")
+    assert upload["status"] == "queued"
+
+    response = client.request("DELETE", "/interview/end_chat", json={"messages": [], "id": "right-after.pdf"})
+
+    assert response.status_code == 200
+    assert submitted_urls == [client.get(f"/interview/upload-video/{upload['upload_id']}").json()["video_url"]]
+    assert submitted_urls[0].startswith("https://fake-storage.invalid/")
+    assert "overall_analysis" in response.json()[2]
+
+
+def test_end_chat_analyses_the_local_copy_when_storage_fails(client, monkeypatch, submitted_urls):
+    def fail(*args, **kwargs):
+        raise ConnectionError("storage unavailable")
+
+    monkeypatch.setattr(get_storage(), "upload_file", fail)
+    _upload(client, "storage-down.pdf")
+
+    response = client.request("DELETE", "/interview/end_chat", json={"messages": [], "id": "storage-down.pdf"})
+
+    assert submitted_urls == [local_video_url("storage-down.pdf")]
+    assert uploaded_video_path(submitted_urls[0]) == local_video_path("storage-down.pdf")
+    assert "overall_analysis" in response.json()[2]
+
+
+def test_end_chat_without_a_recording_skips_the_analysis(client, submitted_urls):
+    response = client.request("DELETE", "/interview/end_chat", json={"messages": [], "id": "no-video.pdf"})
+
+    assert response.status_code == 200
+    assert submitted_urls == []
+    assert response.json()[2] is None
+
+
+def test_uploaded_video_path_only_maps_local_recordings():
+    os.makedirs("video_uploads", exist_ok=True)
+    open(local_video_path("mapped.pdf"), "wb").close()
+    assert uploaded_video_path(local_video_url("mapped.pdf")) == local_video_path("mapped.pdf")
+    assert uploaded_video_path(local_video_url("missing.pdf")) is None
+    assert uploaded_video_path(local_video_url("../main.py").replace("-interview.webm", "")) is None
+    assert uploaded_video_path("https://fake-storage.invalid/interview_recordings/x.webm") is None
+
+
+def test_resumable_upload_leaves_no_lock_behind(client):
+    upload_id = client.post("/interview/upload-video/init", data={"file_name": "resumable.pdf"}).json()["upload_id"]
+    assert client.put(f"/interview/upload-video/{upload_id}?offset=0", content=RECORDING).status_code == 200
+    assert client.post(f"/interview/upload-video/{upload_id}/complete").status_code == 200
+    assert upload_id not in video_upload._upload_locks
+
+
+def test_finished_and_idle_uploads_are_forgotten_after_the_ttl(client):
+    finished = _upload(client, "expired.pdf")["upload_id"]
+    idle = client.post("/interview/upload-video/init", data={"file_name": "idle.pdf"}).json()["upload_id"]
+    while client.get(f"/interview/upload-video/{finished}").json()["status"] != "completed":
+        time.sleep(0.01)
+    for upload_id in (finished, idle):
+        video_upload.upload_jobs[upload_id]["updated_at"] = time.time() - video_upload.VIDEO_UPLOAD_RESULT_TTL_SECONDS - 1
+    fresh = _upload(client, "fresh.pdf")["upload_id"]
+
+    assert finished not in video_upload.upload_jobs
+    assert idle not in video_upload.upload_jobs
+    assert fresh in video_upload.upload_jobs
+    # An unfinished resumable upload is recovered from disk when it is used again
+    assert client.get(f"/interview/upload-video/{idle}").json()["status"] == "uploading"